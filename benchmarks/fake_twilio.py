@@ -0,0 +1,293 @@
+"""
+Local stand-in for the Twilio Video Rooms API, to load test room creation without hitting Twilio.
+
+Run it in-process with `start_server()`, or on localhost:
+
+    python -m benchmarks.fake_twilio --port 8080 --latency 0.05 --error-rate 0.01 --rate-limit 100
+
+and point the package at it with `TWILIO_HTTP_BASE_URL = 'http://127.0.0.1:8080'`.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+ROOMS_PATH = '/v1/Rooms'
+
+
+class FakeTwilioConfig(object):
+    """
+    Behaviour of the stand-in server, can be changed while it runs.
+
+    :param float latency: Seconds every request waits before answering.
+    :param float latency_jitter: Additional random wait of up to this many seconds.
+    :param float error_rate: Share of room creations failing with the injected error, from 0 to 1.
+    :param int error_status: HTTP status of the injected error.
+    :param int error_code: Twilio error code of the injected error.
+    :param str error_message: Message of the injected error.
+    :param float rate_limit: Room creations accepted per second before answering 429, unlimited if None.
+    :param int retry_after: `Retry-After` header sent with 429 responses, in seconds.
+    :param int seed: Seed of the random generator, for reproducible runs.
+    """
+
+    def __init__(self, latency=0.0, latency_jitter=0.0, error_rate=0.0, error_status=500, error_code=20500,
+                 error_message='Internal Server Error', rate_limit=None, retry_after=1, seed=None):
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.error_code = error_code
+        self.error_message = error_message
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+
+
+def room_payload(params, account_sid='AC00000000000000000000000000000000'):
+    """
+    Build the room resource Twilio returns for a create request.
+
+    :param dict params: Form parameters of the create request.
+    :rtype: dict
+    """
+    sid = 'RM' + uuid.uuid4().hex
+    now = datetime.now(timezone.utc).strftime('%a, %d %b %Y %H:%M:%S +0000')
+    room_type = params.get('Type', 'group')
+    return {
+        'sid': sid,
+        'status': 'in-progress',
+        'date_created': now,
+        'date_updated': now,
+        'account_sid': account_sid,
+        'enable_turn': params.get('EnableTurn', 'true') == 'true',
+        'unique_name': params.get('UniqueName', sid),
+        'status_callback': params.get('StatusCallback'),
+        'status_callback_method': params.get('StatusCallbackMethod', 'POST'),
+        'end_time': None,
+        'duration': None,
+        'type': room_type,
+        'max_participants': 10 if room_type == 'peer-to-peer' else 50,
+        'record_participants_on_connect': params.get('RecordParticipantsOnConnect', 'false') == 'true',
+        'video_codecs': ['VP8', 'H264'],
+        'media_region': params.get('MediaRegion', 'us1'),
+        'url': 'https://video.twilio.com/v1/Rooms/' + sid,
+        'links': {},
+    }
+
+
+def error_payload(status, code, message):
+    return {'code': code, 'message': message, 'more_info': 'https://www.twilio.com/docs/errors/{}'.format(code),
+            'status': status}
+
+
+class FakeTwilioHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.count('connections')
+
+    def do_GET(self):
+        self.server.count('requests')
+        self.server.wait()
+        room = self.server.find_room(self.room_key())
+        if room is None:
+            return self.send_not_found()
+        self.send_json(200, room)
+
+    def do_POST(self):
+        self.server.count('requests')
+        length = int(self.headers.get('Content-Length') or 0)
+        params = {key: values[-1] for key, values in parse_qs(self.rfile.read(length).decode('utf-8')).items()}
+        self.server.wait()
+
+        key = self.room_key()
+        if key is None:
+            return self.create_room(params)
+        room = self.server.update_room(key, params)
+        if room is None:
+            return self.send_not_found()
+        self.send_json(200, room)
+
+    def create_room(self, params):
+        config = self.server.config
+        if not self.server.acquire_rate_limit():
+            self.server.count('rate_limited')
+            return self.send_json(429, error_payload(429, 20429, 'Too Many Requests'),
+                                  headers={'Retry-After': str(config.retry_after)})
+        if config.error_rate and config.random.random() < config.error_rate:
+            self.server.count('errors')
+            return self.send_json(config.error_status,
+                                  error_payload(config.error_status, config.error_code, config.error_message))
+
+        room = self.server.add_room(params)
+        if room is None:
+            self.server.count('errors')
+            return self.send_json(400, error_payload(400, 53113, 'Room exists'))
+        self.server.count('created')
+        self.send_json(201, room)
+
+    def room_key(self):
+        """
+        Return the sid or unique name of the requested room, or None for the rooms list.
+        """
+        path = self.path.split('?')[0].rstrip('/')
+        if path == ROOMS_PATH:
+            return None
+        if path.startswith(ROOMS_PATH + '/'):
+            return path[len(ROOMS_PATH) + 1:]
+        return ''
+
+    def send_not_found(self):
+        self.send_json(404, error_payload(404, 20404, 'The requested resource was not found'))
+
+    def send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeTwilioServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server keeping the created rooms in memory, with request counters in `stats`.
+    """
+    daemon_threads = True
+
+    def __init__(self, server_address, config=None):
+        super().__init__(server_address, FakeTwilioHandler)
+        self.config = config or FakeTwilioConfig()
+        self.stats = {'connections': 0, 'requests': 0, 'created': 0, 'errors': 0, 'rate_limited': 0}
+        self._lock = threading.Lock()
+        self._rooms = {}
+        self._window = (0, 0)
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return 'http://{}:{}'.format(host, port)
+
+    def count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def wait(self):
+        config = self.config
+        delay = config.latency + (config.random.uniform(0, config.latency_jitter) if config.latency_jitter else 0)
+        if delay > 0:
+            time.sleep(delay)
+
+    def acquire_rate_limit(self):
+        """
+        Count a room creation against the fixed one-second window of `rate_limit`.
+        """
+        if self.config.rate_limit is None:
+            return True
+        second = int(time.time())
+        with self._lock:
+            window, count = self._window
+            if window != second:
+                window, count = second, 0
+            if count >= self.config.rate_limit:
+                return False
+            self._window = (window, count + 1)
+        return True
+
+    def add_room(self, params):
+        """
+        Store a new room, or return None when an in-progress room has the same unique name.
+        """
+        room = room_payload(params)
+        with self._lock:
+            existing = self._rooms.get(room['unique_name'])
+            if existing is not None and existing['status'] == 'in-progress':
+                return None
+            self._rooms[room['unique_name']] = room
+            self._rooms[room['sid']] = room
+        return room
+
+    def find_room(self, key):
+        with self._lock:
+            return self._rooms.get(key)
+
+    def update_room(self, key, params):
+        with self._lock:
+            room = self._rooms.get(key)
+            if room is not None and params.get('Status'):
+                room['status'] = params['Status']
+            return room
+
+
+def start_server(host='127.0.0.1', port=0, config=None):
+    """
+    Start the stand-in server in a background thread.
+
+    :param FakeTwilioConfig config: Behaviour of the server.
+    :returns: Running server, stop it with `shutdown()`.
+    :rtype: FakeTwilioServer
+    """
+    server = FakeTwilioServer((host, port), config=config)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def add_config_arguments(parser, prefix=''):
+    """
+    Add the `FakeTwilioConfig` options to an argument parser.
+    """
+    parser.add_argument('--{}latency'.format(prefix), type=float, default=0.0, help='Seconds every request waits.')
+    parser.add_argument('--{}latency-jitter'.format(prefix), type=float, default=0.0,
+                        help='Additional random wait of up to this many seconds.')
+    parser.add_argument('--{}error-rate'.format(prefix), type=float, default=0.0,
+                        help='Share of room creations failing, from 0 to 1.')
+    parser.add_argument('--{}error-status'.format(prefix), type=int, default=500, help='HTTP status of the errors.')
+    parser.add_argument('--{}error-code'.format(prefix), type=int, default=20500, help='Twilio code of the errors.')
+    parser.add_argument('--{}rate-limit'.format(prefix), type=float, default=None,
+                        help='Room creations per second accepted before answering 429.')
+    parser.add_argument('--{}retry-after'.format(prefix), type=int, default=1, help='Retry-After of 429 responses.')
+    parser.add_argument('--{}seed'.format(prefix), type=int, default=None, help='Seed of the random generator.')
+
+
+def config_from_arguments(args, prefix=''):
+    prefix = prefix.replace('-', '_')
+    return FakeTwilioConfig(**{
+        name: getattr(args, prefix + name)
+        for name in ('latency', 'latency_jitter', 'error_rate', 'error_status', 'error_code', 'rate_limit',
+                     'retry_after', 'seed')
+    })
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Local stand-in for the Twilio Video Rooms API.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    add_config_arguments(parser)
+    args = parser.parse_args(argv)
+
+    server = FakeTwilioServer((args.host, args.port), config=config_from_arguments(args))
+    print('Serving the Twilio Video Rooms API on {}'.format(server.url))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(server.stats))
+
+
+if __name__ == '__main__':
+    main()
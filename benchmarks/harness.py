@@ -0,0 +1,112 @@
+"""
+Timing helpers shared by the benchmarks.
+"""
+import json
+import os
+import platform
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def percentile(sorted_values, percent):
+    """
+    Nearest-rank percentile of already sorted values.
+    """
+    if not sorted_values:
+        return 0.0
+    index = max(0, int(round(percent / 100.0 * len(sorted_values) + 0.5)) - 1)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+def measure(name, fn, iterations, warmup=100, concurrency=1):
+    """
+    Call `fn` `iterations` times spread over `concurrency` threads and summarize its latency.
+
+    :param str name: Name of the scenario.
+    :param callable fn: Function to benchmark, called without arguments.
+    :param int iterations: Total number of calls.
+    :param int warmup: Calls made before measuring, e.g. to fill connection pools.
+    :param int concurrency: Number of threads calling `fn` at the same time.
+    :returns: Latency percentiles in milliseconds and throughput in requests per second.
+    :rtype: dict
+    """
+    for _ in range(warmup):
+        fn()
+
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(calls):
+        timings = []
+        for _ in range(calls):
+            started = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(timings)
+
+    calls = [iterations // concurrency + (1 if i < iterations % concurrency else 0) for i in range(concurrency)]
+    started = time.perf_counter()
+    if concurrency == 1:
+        worker(iterations)
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(worker, calls))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'name': name,
+        'iterations': iterations,
+        'concurrency': concurrency,
+        'mean_ms': sum(latencies) / len(latencies) * 1000,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'rps': iterations / elapsed,
+    }
+
+
+def environment():
+    """
+    Describe where the benchmark ran, so results of different commits can be told apart.
+
+    :rtype: dict
+    """
+    import django
+    import rest_framework
+    import twilio
+
+    try:
+        commit = subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        'commit': commit,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'djangorestframework': rest_framework.VERSION,
+        'twilio': twilio.__version__,
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def save_results(path, results):
+    """
+    Write benchmark results along with their environment as JSON.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as fh:
+        json.dump({'environment': environment(), 'results': results}, fh, indent=2)
+
+
+def load_results(path):
+    with open(path) as fh:
+        return json.load(fh)
@@ -0,0 +1,193 @@
+"""
+Benchmark suite of the token and room endpoints.
+
+Usage: python -m benchmarks.run [--iterations 2000] [--concurrency 1] [--scenario NAME ...]
+                                [--output results.json] [--compare previous.json]
+                                [--fake-latency 0.05] [--fake-error-rate 0.01] [--fake-rate-limit 100] ...
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import uuid
+
+from benchmarks.fake_twilio import add_config_arguments, config_from_arguments, start_server
+from benchmarks.harness import load_results, measure, save_results
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOKEN_PAYLOAD = {
+    'identity': 'some-identity',
+    'valid_until': '2030-10-17T15:53:00+07:00',
+    'room_name': 'some-random-room-name',
+}
+
+SCENARIOS = {}
+
+
+def scenario(name):
+    """
+    Register a benchmark scenario. The decorated function returns the callable to measure.
+    """
+    def decorator(factory):
+        SCENARIOS[name] = factory
+        return factory
+    return decorator
+
+
+def setup_django():
+    sys.path.insert(0, os.path.join(ROOT, 'test_project'))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'test_app.settings')
+
+    import django
+    django.setup()
+
+    # Expected 4xx responses would otherwise be logged for every request.
+    logging.getLogger('django.request').setLevel(logging.ERROR)
+
+
+def room_name():
+    """
+    Return a new 34 characters room name, so every request creates its own room.
+    """
+    return 'RM' + uuid.uuid4().hex
+
+
+def thread_local_client():
+    """
+    Return a function giving each benchmark thread its own Django test client.
+    """
+    from django.test import Client
+
+    local = threading.local()
+
+    def get_client():
+        if not hasattr(local, 'client'):
+            local.client = Client()
+        return local.client
+    return get_client
+
+
+@scenario('serializer.video_token')
+def bench_serializer_video_token(context):
+    from django_twilio_access_token.serializers import TokenSerializer, VideoTokenDeserializer
+
+    def run():
+        deserializer = VideoTokenDeserializer(data=TOKEN_PAYLOAD)
+        deserializer.is_valid(raise_exception=True)
+        deserializer.save()
+        return TokenSerializer(deserializer.instance).data
+    return run
+
+
+@scenario('serializer.group_room')
+def bench_serializer_group_room(context):
+    from django_twilio_access_token.serializers import GroupRoomDeserializer
+
+    payload = {'room_name': room_name(), 'type': 'group', 'status_callback': 'http://example.org'}
+
+    def run():
+        GroupRoomDeserializer(data=payload).is_valid(raise_exception=True)
+    return run
+
+
+@scenario('serializer.group_room_compiled')
+def bench_serializer_group_room_compiled(context):
+    from django_twilio_access_token.serializers import GroupRoomDeserializer
+
+    payload = {'room_name': room_name(), 'type': 'group', 'status_callback': 'http://example.org'}
+
+    def run():
+        assert GroupRoomDeserializer.get_compiled_validation().validate(payload) is not None
+    return run
+
+
+@scenario('http.token_video')
+def bench_http_token_video(context):
+    from django.urls import reverse
+
+    url = reverse('twilio:twilio-token-video')
+    body = json.dumps(TOKEN_PAYLOAD)
+    get_client = thread_local_client()
+
+    def run():
+        response = get_client().post(url, data=body, content_type='application/json')
+        assert response.status_code == 201, response.content
+    return run
+
+
+@scenario('http.token_video_fast')
+def bench_http_token_video_fast(context):
+    from django.urls import reverse
+
+    url = reverse('twilio:fast-twilio-token-video')
+    body = json.dumps(TOKEN_PAYLOAD)
+    get_client = thread_local_client()
+
+    def run():
+        response = get_client().post(url, data=body, content_type='application/json')
+        assert response.status_code == 201, response.content
+    return run
+
+
+@scenario('http.rooms_group')
+def bench_http_rooms_group(context):
+    from django.urls import reverse
+
+    url = reverse('twilio:group-room')
+    get_client = thread_local_client()
+
+    def run():
+        body = json.dumps({'room_name': room_name(), 'type': 'group', 'status_callback': 'http://example.org'})
+        response = get_client().post(url, data=body, content_type='application/json')
+        # Injected Twilio errors surface as 400, they are part of the measured behaviour.
+        assert response.status_code in (201, 400), response.content
+    return run
+
+
+def print_results(results, baseline=None):
+    previous = {result['name']: result for result in (baseline or {}).get('results', [])}
+    print('{:<28} {:>10} {:>10} {:>10} {:>12}'.format('scenario', 'p50 ms', 'p95 ms', 'p99 ms', 'req/s'))
+    for result in results:
+        line = '{name:<28} {p50_ms:>10.3f} {p95_ms:>10.3f} {p99_ms:>10.3f} {rps:>12.1f}'.format(**result)
+        if result['name'] in previous:
+            line += '  ({:+.1f}% req/s)'.format((result['rps'] / previous[result['name']]['rps'] - 1) * 100)
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the token and room endpoints.')
+    parser.add_argument('--iterations', type=int, default=2000, help='Measured calls per scenario.')
+    parser.add_argument('--warmup', type=int, default=100, help='Unmeasured calls made first.')
+    parser.add_argument('--concurrency', type=int, default=1, help='Threads calling each scenario.')
+    parser.add_argument('--scenario', action='append', dest='scenarios',
+                        help='Scenario to run, can be repeated. Defaults to all of them.')
+    parser.add_argument('--output', help='Write the results to this JSON file.')
+    parser.add_argument('--compare', help='Compare against results previously written with --output.')
+    add_config_arguments(parser, prefix='fake-')
+    args = parser.parse_args(argv)
+
+    setup_django()
+
+    from django.test.utils import override_settings
+
+    server = start_server(config=config_from_arguments(args, prefix='fake-'))
+    settings = {'TWILIO_HTTP_BASE_URL': server.url, 'TWILIO_AUTH_TOKEN': 'benchmark-auth-token'}
+    results = []
+    try:
+        with override_settings(**settings):
+            for name in args.scenarios or sorted(SCENARIOS):
+                fn = SCENARIOS[name]({'server': server})
+                results.append(measure(name, fn, args.iterations, warmup=args.warmup, concurrency=args.concurrency))
+    finally:
+        server.shutdown()
+
+    print_results(results, load_results(args.compare) if args.compare else None)
+    print('fake Twilio server: {}'.format(json.dumps(server.stats)))
+    if args.output:
+        save_results(args.output, results)
+
+
+if __name__ == '__main__':
+    main()
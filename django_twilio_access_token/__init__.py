@@ -2,3 +2,5 @@
 A simple library to obtain Twilio access token for particular services.
 """
 __version__ = '0.0.2'
+
+default_app_config = 'django_twilio_access_token.apps.DjangoTwilioAccessTokenConfig'
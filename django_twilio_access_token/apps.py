@@ -0,0 +1,16 @@
+from django.apps import AppConfig
+
+
+class DjangoTwilioAccessTokenConfig(AppConfig):
+    name = 'django_twilio_access_token'
+    verbose_name = 'Django Twilio Access Token'
+
+    def ready(self):
+        from django_twilio_access_token import instrumentation, keyring, signing
+        # Connects the receiver starting the room pool with the first request served, see `RoomPool`.
+        from django_twilio_access_token import pool  # noqa: F401
+
+        # Build the signing context at startup rather than on the first token request.
+        signing.get_signing_context()
+        keyring.key_rotation.start()
+        instrumentation.instrumentation.load_settings()
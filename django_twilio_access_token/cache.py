@@ -0,0 +1,210 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from django_twilio_access_token.conf import get_setting
+from django_twilio_access_token.signing import to_timestamp
+from django_twilio_access_token.singleflight import SingleFlight
+
+
+class LRUCache(object):
+    """
+    Thread-safe, size-bounded in-process cache whose entries expire after their own TTL.
+    """
+
+    def __init__(self, max_size, timer=time.monotonic):
+        self.max_size = max_size
+        self._timer = timer
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key, default=None):
+        """
+        Return the value stored under `key`, or `default` when missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at <= self._timer():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        """
+        Store `value` under `key` for `ttl` seconds, evicting the least recently used entry when full.
+        """
+        with self._lock:
+            self._entries[key] = (self._timer() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def token_cache_key(token):
+    """
+    Build the cache key of an access token from its account, signing key, identity,
+    validity window and grant set.
+
+    :param django_twilio_access_token.signing.PreparedAccessToken token: Twilio access token instance.
+    :rtype: str
+    """
+    grants = sorted(((grant.key, grant.to_payload()) for grant in token.grants), key=lambda grant: grant[0])
+    raw = json.dumps(
+        [token.account_sid, token.signing_key_sid, token.identity, to_timestamp(token.valid_until), grants],
+        sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def token_expires_at(token):
+    """
+    Return the expiry of an access token as a unix timestamp, the same way it ends up in the JWT.
+
+    :param django_twilio_access_token.signing.PreparedAccessToken token: Twilio access token instance.
+    :rtype: int
+    """
+    if token.valid_until:
+        return to_timestamp(token.valid_until)
+    return int(time.time()) + token.ttl
+
+
+class TokenCache(object):
+    """
+    Two-tier cache of signed access tokens, enabled through `TWILIO_TOKEN_CACHE_ENABLED`.
+
+    A signed token is served again for an identical request while at least
+    `TWILIO_TOKEN_CACHE_MIN_REMAINING` seconds of its lifetime remain. Tokens are kept in an
+    in-process LRU first, and in the Django cache named by `TWILIO_TOKEN_CACHE_BACKEND` if set.
+
+    With `TWILIO_TOKEN_SINGLE_FLIGHT`, concurrent identical requests missing the local tier
+    wait on a single shared-tier lookup and signing, see `token_flight`.
+    """
+    KEY_PREFIX = 'django-twilio-access-token:token:'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = None
+        self.reset_stats()
+
+    @property
+    def local(self):
+        if self._local is None:
+            with self._lock:
+                if self._local is None:
+                    self._local = LRUCache(max_size=get_setting('TWILIO_TOKEN_CACHE_MAX_SIZE'))
+        return self._local
+
+    def get_jwt(self, token):
+        """
+        Return the signed JWT of `token`, reusing a cached one when possible.
+
+        :param django_twilio_access_token.signing.PreparedAccessToken token: Twilio access token instance.
+        :rtype: str
+        """
+        cache_enabled = get_setting('TWILIO_TOKEN_CACHE_ENABLED')
+        single_flight = get_setting('TWILIO_TOKEN_SINGLE_FLIGHT')
+        if not cache_enabled and not single_flight:
+            return token.to_jwt()
+
+        key = token_cache_key(token)
+        if cache_enabled:
+            jwt = self.local.get(key)
+            if jwt is not None:
+                self._count('local_hits')
+                return jwt
+
+        if single_flight:
+            return token_flight.do(key, lambda: self._load(key, token, cache_enabled))
+        return self._load(key, token, cache_enabled)
+
+    def _load(self, key, token, cache_enabled):
+        """
+        Return the signed JWT of `token` from the shared tier, or sign and store it.
+        """
+        if not cache_enabled:
+            return token.to_jwt()
+
+        min_remaining = get_setting('TWILIO_TOKEN_CACHE_MIN_REMAINING')
+        backend = self._backend()
+        if backend is not None:
+            entry = backend.get(self.KEY_PREFIX + key)
+            if entry is not None:
+                jwt, expires_at = entry
+                ttl = expires_at - min_remaining - time.time()
+                if ttl > 0:
+                    self.local.set(key, jwt, ttl)
+                    self._count('shared_hits')
+                    return jwt
+
+        self._count('misses')
+        expires_at = token_expires_at(token)
+        jwt = token.to_jwt()
+        ttl = expires_at - min_remaining - time.time()
+        if ttl > 0:
+            self.local.set(key, jwt, ttl)
+            if backend is not None:
+                backend.set(self.KEY_PREFIX + key, (jwt, expires_at), timeout=int(ttl))
+        return jwt
+
+    def stats(self):
+        """
+        Return hit/miss counters of the cache.
+
+        :rtype: dict
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats['hits'] = stats['local_hits'] + stats['shared_hits']
+        total = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = stats['hits'] / total if total else 0.0
+        return stats
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {'local_hits': 0, 'shared_hits': 0, 'misses': 0}
+
+    def clear(self):
+        """
+        Drop every locally cached token and rebuild the local tier from the current settings.
+        """
+        with self._lock:
+            self._local = None
+
+    def _backend(self):
+        alias = get_setting('TWILIO_TOKEN_CACHE_BACKEND')
+        return caches[alias] if alias else None
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+
+token_cache = TokenCache()
+# Coalesces concurrent signing of identical tokens, `token_flight.stats()` gives the coalescing ratio.
+token_flight = SingleFlight()
+
+
+@receiver(setting_changed)
+def _reset_token_cache(setting, **kwargs):
+    if setting.startswith('TWILIO_TOKEN_CACHE_'):
+        token_cache.clear()
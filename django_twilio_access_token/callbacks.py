@@ -0,0 +1,292 @@
+import atexit
+import base64
+import hashlib
+import hmac
+import logging
+import os
+import threading
+from collections import namedtuple
+from urllib.parse import urlparse
+
+from django.apps import apps
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from twilio.request_validator import add_port, remove_port
+
+from django_twilio_access_token.conf import get_setting
+from django_twilio_access_token.credentials import get_auth_token_for_account
+
+logger = logging.getLogger(__name__)
+
+StatusEvent = namedtuple('StatusEvent', [
+    'account_sid', 'room_sid', 'room_name', 'room_status', 'event', 'participant_sid', 'participant_identity',
+    'participant_status', 'sequence_number', 'timestamp', 'params',
+])
+StatusEvent.__doc__ = 'Room or participant event of a Twilio status callback, with all of its `params`.'
+
+# Twilio parameter of each `StatusEvent` field.
+STATUS_EVENT_PARAMS = (
+    ('account_sid', 'AccountSid'),
+    ('room_sid', 'RoomSid'),
+    ('room_name', 'RoomName'),
+    ('room_status', 'RoomStatus'),
+    ('event', 'StatusCallbackEvent'),
+    ('participant_sid', 'ParticipantSid'),
+    ('participant_identity', 'ParticipantIdentity'),
+    ('participant_status', 'ParticipantStatus'),
+    ('sequence_number', 'SequenceNumber'),
+    ('timestamp', 'Timestamp'),
+)
+
+
+def status_event_from_params(params):
+    """
+    :param django.http.QueryDict params: Parameters of a status callback.
+    :rtype: StatusEvent
+    """
+    return StatusEvent(params=params.dict(), **{field: params.get(param) for field, param in STATUS_EVENT_PARAMS})
+
+
+class SignatureValidator(object):
+    """
+    Check the `X-Twilio-Signature` of requests made by Twilio, like `twilio.request_validator.RequestValidator`.
+
+    The HMAC key state is computed once, so checking a request runs a single HMAC over its
+    URL and parameters.
+    """
+
+    def __init__(self, auth_token):
+        """
+        :param str auth_token: Auth token of the Twilio account making the requests.
+        """
+        self._hmac = hmac.new(auth_token.encode('utf-8'), digestmod=hashlib.sha1)
+
+    def compute_signature(self, url, params):
+        """
+        :param str url: URL requested by Twilio.
+        :param django.http.QueryDict params: POST parameters.
+        :rtype: str
+        """
+        mac = self._hmac.copy()
+        mac.update(url.encode('utf-8'))
+        for key in sorted(params):
+            for value in sorted(set(params.getlist(key))):
+                mac.update((key + value).encode('utf-8'))
+        return base64.b64encode(mac.digest()).decode('ascii')
+
+    def validate(self, url, params, signature):
+        """
+        Tell whether `signature` was computed by Twilio for this request. Twilio signs URLs
+        with or without their default port, both are accepted.
+
+        :rtype: bool
+        """
+        if not signature:
+            return False
+        parsed = urlparse(url)
+        return any(hmac.compare_digest(self.compute_signature(candidate, params), signature)
+                   for candidate in (remove_port(parsed), add_port(parsed)))
+
+
+_validator = None
+# Auth token and signature validator of each tenant account.
+_tenant_validators = {}
+
+
+def get_signature_validator(account_sid=None):
+    """
+    Return the signature validator of the Twilio account `account_sid`, built once per account.
+
+    Requests of the account of the project settings, or without account, are checked with
+    `TWILIO_AUTH_TOKEN`, those of a tenant account or subaccount with the auth token of the tenant.
+
+    :param str account_sid: `AccountSid` parameter of the request.
+    :returns: The validator, or None when the auth token of the account is unknown, since anyone
+              can sign with an empty key.
+    :rtype: SignatureValidator
+    """
+    global _validator
+    if not account_sid or account_sid == getattr(settings, 'TWILIO_ACCOUNT_SID', None):
+        validator = _validator
+        if validator is None:
+            auth_token = getattr(settings, 'TWILIO_AUTH_TOKEN', None)
+            if not auth_token:
+                return None
+            validator = _validator = SignatureValidator(auth_token)
+        return validator
+
+    auth_token = get_auth_token_for_account(account_sid)
+    if not auth_token:
+        return None
+    entry = _tenant_validators.get(account_sid)
+    # Rebuilt once the credentials of the tenant have been rotated.
+    if entry is None or entry[0] != auth_token:
+        entry = _tenant_validators[account_sid] = (auth_token, SignatureValidator(auth_token))
+    return entry[1]
+
+
+class BulkCreateSink(object):
+    """
+    Event sink inserting each batch at once into the model named by `TWILIO_STATUS_CALLBACK_MODEL`,
+    e.g. `'myapp.RoomEvent'`. Model fields named like `StatusEvent` fields are filled in.
+    """
+
+    def __init__(self):
+        self.model = apps.get_model(get_setting('TWILIO_STATUS_CALLBACK_MODEL'))
+        names = {field.name for field in self.model._meta.get_fields()}
+        self.fields = [field for field in StatusEvent._fields if field in names]
+
+    def write(self, events):
+        """
+        :param list events: `StatusEvent` instances.
+        """
+        self.model.objects.bulk_create([self.model(**{field: getattr(event, field) for field in self.fields})
+                                        for event in events])
+
+
+class EventBuffer(object):
+    """
+    Status events kept in memory and written to the `TWILIO_STATUS_CALLBACK_SINK` in batches.
+
+    The sink, a class with a `write(events)` method, is called by a daemon thread once
+    `TWILIO_STATUS_CALLBACK_BATCH_SIZE` events are buffered or every `TWILIO_STATUS_CALLBACK_FLUSH_INTERVAL`
+    seconds, so callbacks are answered without waiting for it. Events beyond
+    `TWILIO_STATUS_CALLBACK_MAX_BUFFER` are dropped.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._sink = None
+        self._events = []
+        self.reset_stats()
+
+    def add(self, event):
+        """
+        Buffer an event, unless no sink is configured.
+
+        :param StatusEvent event: Event to write.
+        :returns: Whether the event was buffered.
+        :rtype: bool
+        """
+        if not get_setting('TWILIO_STATUS_CALLBACK_SINK'):
+            return False
+        if self._pid != os.getpid():
+            self.start()
+
+        with self._lock:
+            if len(self._events) >= get_setting('TWILIO_STATUS_CALLBACK_MAX_BUFFER'):
+                self.dropped += 1
+                return False
+            self._events.append(event)
+            self.received += 1
+            full = len(self._events) >= get_setting('TWILIO_STATUS_CALLBACK_BATCH_SIZE')
+        if full:
+            self._wake.set()
+        return True
+
+    def flush(self):
+        """
+        Write the buffered events to the sink. Errors are logged and the events are dropped.
+
+        :returns: Number of events written.
+        :rtype: int
+        """
+        # Batches are written one at a time, in order.
+        with self._flush_lock:
+            with self._lock:
+                events, self._events = self._events, []
+            if not events:
+                return 0
+            try:
+                self._sink.write(events)
+            except Exception:
+                logger.exception('Unable to write %d Twilio status events.', len(events))
+                with self._lock:
+                    self.failed += len(events)
+                return 0
+            with self._lock:
+                self.written += len(events)
+                self.batches += 1
+            return len(events)
+
+    def start(self):
+        """
+        Build the sink and start flushing in the background, once per process.
+        """
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # Threads do not survive a fork, events inherited from the parent are left to it.
+            self._events = []
+            self._sink = import_string(get_setting('TWILIO_STATUS_CALLBACK_SINK'))()
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._run, args=(self._stop,), name='twilio-status-events',
+                                            daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def stop(self):
+        """
+        Stop flushing in the background, after writing the buffered events.
+        """
+        with self._lock:
+            self._stop.set()
+            self._wake.set()
+            self._thread = None
+            self._pid = None
+        self.flush()
+        self._sink = None
+
+    def _run(self, stop):
+        while not stop.is_set():
+            self._wake.wait(get_setting('TWILIO_STATUS_CALLBACK_FLUSH_INTERVAL'))
+            self._wake.clear()
+            self.flush()
+
+    def stats(self):
+        """
+        Return the buffered, received, written, failed and dropped events, and the batches written.
+
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                'buffered': len(self._events),
+                'received': self.received,
+                'written': self.written,
+                'batches': self.batches,
+                'failed': self.failed,
+                'dropped': self.dropped,
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self.received = 0
+            self.written = 0
+            self.batches = 0
+            self.failed = 0
+            self.dropped = 0
+
+
+event_buffer = EventBuffer()
+
+# Events buffered when the process exits are written rather than lost.
+atexit.register(event_buffer.flush)
+
+
+@receiver(setting_changed)
+def _reset_status_callbacks(setting, **kwargs):
+    global _validator
+    if setting in ('TWILIO_AUTH_TOKEN', 'TWILIO_ACCOUNT_SID'):
+        _validator = None
+    if setting.startswith('TWILIO_TENANT') or setting.startswith('TWILIO_CREDENTIALS_'):
+        _tenant_validators.clear()
+    if setting in ('TWILIO_STATUS_CALLBACK_SINK', 'TWILIO_STATUS_CALLBACK_MODEL'):
+        event_buffer.stop()
@@ -0,0 +1,165 @@
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit, urlunsplit
+
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from requests.adapters import HTTPAdapter
+from twilio.http.http_client import TwilioHttpClient
+from twilio.rest import Client
+from urllib3.util.retry import Retry
+
+from django_twilio_access_token.conf import get_setting
+
+
+class PooledTwilioHttpClient(TwilioHttpClient):
+    """
+    Twilio HTTP client backed by a keep-alive connection pool.
+
+    Only connection errors are retried, so a room creation request is never sent twice.
+    When `base_url` is set, every request is sent to that scheme and host instead of the
+    Twilio API, e.g. to a local stand-in server during load tests.
+
+    The client is shared between threads, hence `last_response` is kept per thread.
+    """
+
+    def __init__(self, pool_connections=10, pool_maxsize=10, timeout=None, max_retries=0, backoff_factor=0,
+                 base_url=None):
+        self._local = threading.local()
+        super().__init__(pool_connections=True, timeout=timeout)
+        self.base_url = urlsplit(base_url) if base_url else None
+        retry = Retry(total=max_retries, backoff_factor=backoff_factor, raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    @classmethod
+    def from_settings(cls):
+        """
+        Build an HTTP client configured from the `TWILIO_HTTP_*` settings.
+        """
+        return cls(
+            pool_connections=get_setting('TWILIO_HTTP_POOL_CONNECTIONS'),
+            pool_maxsize=get_setting('TWILIO_HTTP_POOL_MAXSIZE'),
+            timeout=get_setting('TWILIO_HTTP_TIMEOUT'),
+            max_retries=get_setting('TWILIO_HTTP_MAX_RETRIES'),
+            backoff_factor=get_setting('TWILIO_HTTP_BACKOFF_FACTOR'),
+            base_url=get_setting('TWILIO_HTTP_BASE_URL'))
+
+    @property
+    def last_response(self):
+        return getattr(self._local, 'last_response', None)
+
+    @last_response.setter
+    def last_response(self, response):
+        self._local.last_response = response
+
+    def request(self, method, url, *args, **kwargs):
+        if self.base_url is not None:
+            url = urlunsplit(urlsplit(url)._replace(scheme=self.base_url.scheme, netloc=self.base_url.netloc))
+        return super().request(method, url, *args, **kwargs)
+
+    def close(self):
+        """Close every pooled connection."""
+        self.session.close()
+
+
+def last_retry_after(client):
+    """
+    Return the `Retry-After` of the last response received by the current thread, in seconds.
+
+    :param twilio.rest.Client client: Twilio REST client.
+    :returns: Seconds to wait, or None when the last response has no `Retry-After` header.
+    :rtype: float
+    """
+    response = client.http_client.last_response
+    value = response.headers.get('Retry-After') if response is not None and response.headers else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class ClientRegistry(object):
+    """
+    Process-wide, thread-safe registry of Twilio REST clients keyed by account credentials.
+
+    Connection pools must not be shared between a parent process and its forked workers,
+    hence the registry is emptied whenever it is accessed from a different process id.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients = {}
+        self._pid = os.getpid()
+
+    def get_client(self, account_sid, username, password):
+        """
+        Return the pooled client for the given credentials, creating it on first use.
+
+        :param str account_sid: Twilio account SID.
+        :param str username: Username to authenticate with, usually the account SID.
+        :param str password: Password to authenticate with, usually the auth token.
+        :rtype: twilio.rest.Client
+        :raises twilio.base.exceptions.TwilioException: when credentials are missing.
+        """
+        if self._pid != os.getpid():
+            self.reset_after_fork()
+
+        key = (account_sid, username, password)
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = Client(username=username, password=password, account_sid=account_sid,
+                                http_client=PooledTwilioHttpClient.from_settings())
+                self._clients[key] = client
+        return client
+
+    def reset(self):
+        """
+        Close and forget every pooled client, e.g. after the `TWILIO_HTTP_*` settings changed.
+        """
+        with self._lock:
+            clients, self._clients = self._clients, {}
+        for client in clients.values():
+            client.http_client.close()
+
+    def reset_after_fork(self):
+        """
+        Forget the clients inherited from the parent process without closing their sockets,
+        which are still in use by the parent.
+        """
+        self._lock = threading.Lock()
+        self._clients = {}
+        self._pid = os.getpid()
+
+
+client_registry = ClientRegistry()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=client_registry.reset_after_fork)
+
+
+@receiver(setting_changed)
+def _reset_client_registry(setting, **kwargs):
+    if setting.startswith('TWILIO_HTTP_') or setting in ('TWILIO_ACCOUNT_SID', 'TWILIO_AUTH_TOKEN'):
+        client_registry.reset()
+
+
+def get_client(account_sid, username, password):
+    """
+    Shortcut for :meth:`ClientRegistry.get_client` on the process-wide registry.
+    """
+    return client_registry.get_client(account_sid, username, password)
@@ -0,0 +1,127 @@
+from django.conf import settings
+
+DEFAULTS = {
+    # Connection pooling for the Twilio REST client.
+    'TWILIO_HTTP_POOL_CONNECTIONS': 10,
+    'TWILIO_HTTP_POOL_MAXSIZE': 10,
+    'TWILIO_HTTP_TIMEOUT': 10.0,
+    'TWILIO_HTTP_MAX_RETRIES': 2,
+    'TWILIO_HTTP_BACKOFF_FACTOR': 0.1,
+    # Send Twilio API requests to another host, e.g. a local stand-in server.
+    'TWILIO_HTTP_BASE_URL': None,
+
+    # Chat, Voice and Sync grants. Chat tokens require a service, Sync uses the default service when None.
+    'TWILIO_CHAT_SERVICE_SID': None,
+    'TWILIO_CHAT_PUSH_CREDENTIAL_SID': None,
+    'TWILIO_VOICE_OUTGOING_APPLICATION_SID': None,
+    'TWILIO_VOICE_PUSH_CREDENTIAL_SID': None,
+    'TWILIO_SYNC_SERVICE_SID': None,
+
+    # Maximum number of entries accepted by the batch token endpoint.
+    'TWILIO_TOKEN_BATCH_MAX_SIZE': 1000,
+
+    # Streaming token endpoint: threads per request signing while the response is written, and lines signed
+    # ahead of the response. Signing holds the GIL, so more threads overlap I/O but do not sign faster.
+    'TWILIO_TOKEN_STREAM_WORKERS': 4,
+    'TWILIO_TOKEN_STREAM_WINDOW': 256,
+
+    # Process pool of `django_twilio_access_token.engine.SigningEngine`, one process per core when None.
+    'TWILIO_SIGNING_ENGINE_WORKERS': None,
+    'TWILIO_SIGNING_ENGINE_CHUNK_SIZE': 1000,
+
+    # Reuse of signed tokens for identical token requests.
+    'TWILIO_TOKEN_CACHE_ENABLED': False,
+    'TWILIO_TOKEN_CACHE_MAX_SIZE': 10000,
+    'TWILIO_TOKEN_CACHE_MIN_REMAINING': 600,
+    'TWILIO_TOKEN_CACHE_BACKEND': None,
+    # Concurrent identical token requests wait on a single signing.
+    'TWILIO_TOKEN_SINGLE_FLIGHT': False,
+
+    # Token issuance limits per scope, 'identity', 'room_name' or 'ip', e.g. {'identity': '10/min'}; disabled when empty.
+    'TWILIO_TOKEN_RATE_LIMITS': {},
+    'TWILIO_TOKEN_RATE_LIMIT_SHARDS': 16,
+    'TWILIO_TOKEN_RATE_LIMIT_MAX_KEYS': 100000,
+    # Django cache alias sharing the counters between processes, and seconds between syncs.
+    'TWILIO_TOKEN_RATE_LIMIT_CACHE': None,
+    'TWILIO_TOKEN_RATE_LIMIT_SYNC_INTERVAL': 1.0,
+
+    # Idempotent room creation keyed by room name.
+    'TWILIO_ROOM_CACHE_ENABLED': False,
+    'TWILIO_ROOM_CACHE_MAX_SIZE': 10000,
+    'TWILIO_ROOM_CACHE_TTL': 300,
+
+    # Index of the rooms created by this service, answering room lookups and listings; disabled with 0.
+    'TWILIO_ROOM_INDEX_MAX_SIZE': 10000,
+    'TWILIO_ROOM_INDEX_PAGE_SIZE': 50,
+    'TWILIO_ROOM_INDEX_MAX_PAGE_SIZE': 500,
+
+    # Status callback receiver: signature check, and batched writes of the events to a sink class.
+    'TWILIO_STATUS_CALLBACK_VALIDATE': True,
+    'TWILIO_STATUS_CALLBACK_SINK': None,
+    'TWILIO_STATUS_CALLBACK_MODEL': None,
+    'TWILIO_STATUS_CALLBACK_BATCH_SIZE': 500,
+    'TWILIO_STATUS_CALLBACK_FLUSH_INTERVAL': 1.0,
+    'TWILIO_STATUS_CALLBACK_MAX_BUFFER': 100000,
+
+    # Bulkhead around the Twilio room API calls, disabled when None.
+    'TWILIO_ROOM_MAX_CONCURRENCY': None,
+    'TWILIO_ROOM_MAX_QUEUE': 0,
+    'TWILIO_ROOM_QUEUE_TIMEOUT': 1.0,
+    # Circuit breaker opening after that many consecutive Twilio failures, disabled when None.
+    'TWILIO_ROOM_BREAKER_THRESHOLD': None,
+    'TWILIO_ROOM_BREAKER_RESET_TIMEOUT': 30.0,
+    # Retries of transient Twilio errors in room calls, disabled with a single attempt.
+    'TWILIO_ROOM_RETRY_MAX_ATTEMPTS': 1,
+    'TWILIO_ROOM_RETRY_BASE_DELAY': 0.1,
+    'TWILIO_ROOM_RETRY_MAX_DELAY': 2.0,
+    'TWILIO_ROOM_RETRY_DEADLINE': 5.0,
+    'TWILIO_ROOM_RETRY_STATUSES': (429, 503),
+
+    # Rotation of the signing keys of the settings account, see `django_twilio_access_token.keyring`.
+    'TWILIO_SIGNING_KEYS_FILE': None,
+    'TWILIO_SIGNING_KEYS_CACHE': None,
+    'TWILIO_SIGNING_KEYS_POLL_INTERVAL': 30,
+
+    # Room payloads validated by a plan compiled once per deserializer class, DRF handling the invalid ones.
+    'TWILIO_ROOM_COMPILED_VALIDATION': False,
+
+    # Bulk room endpoint: maximum number of entries, and concurrent Twilio calls per request.
+    'TWILIO_ROOM_BULK_MAX_SIZE': 500,
+    'TWILIO_ROOM_BULK_CONCURRENCY': 8,
+
+    # Room creations answered with 202 and run in the background: None, 'prefer' or 'always'.
+    'TWILIO_ROOM_JOBS_MODE': None,
+    'TWILIO_ROOM_JOBS_BACKEND': 'django_twilio_access_token.jobs.ThreadPoolBackend',
+    'TWILIO_ROOM_JOBS_WORKERS': 4,
+    'TWILIO_ROOM_JOBS_MAX_SIZE': 10000,
+    'TWILIO_ROOM_JOBS_TTL': 3600,
+
+    # Ready rooms kept per room type, e.g. {'group': 5}, and their creation parameters per room type.
+    'TWILIO_ROOM_POOL_SIZES': {},
+    'TWILIO_ROOM_POOL_PARAMS': {},
+    'TWILIO_ROOM_POOL_REFILL_INTERVAL': 5.0,
+    # Twilio closes rooms nobody joined after 5 minutes by default.
+    'TWILIO_ROOM_POOL_MAX_AGE': 240,
+
+    # Per-tenant Twilio accounts, see `django_twilio_access_token.credentials`.
+    'TWILIO_TENANT_RESOLVER': None,
+    'TWILIO_CREDENTIALS_BACKEND': None,
+    'TWILIO_CREDENTIALS_CACHE_MAX_SIZE': 10000,
+    'TWILIO_CREDENTIALS_CACHE_TTL': 300,
+    'TWILIO_CREDENTIALS_FILE': None,
+    'TWILIO_TENANTS': None,
+
+    # Dotted paths of instrumentation hook classes, see `django_twilio_access_token.instrumentation`.
+    'TWILIO_INSTRUMENTATION_HOOKS': (),
+}
+
+
+def get_setting(name):
+    """
+    Look up a package setting, falling back to its default value.
+
+    Settings are read on every call so `override_settings` keeps working in tests.
+
+    :param str name: Setting name, e.g. `TWILIO_HTTP_TIMEOUT`.
+    """
+    return getattr(settings, name, DEFAULTS[name])
@@ -0,0 +1,285 @@
+import json
+import os
+import threading
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from rest_framework.exceptions import NotFound
+
+from django_twilio_access_token.cache import LRUCache
+from django_twilio_access_token.clients import get_client
+from django_twilio_access_token.conf import get_setting
+from django_twilio_access_token.keyring import key_rotation
+from django_twilio_access_token.signing import SigningContext
+from django_twilio_access_token.singleflight import SingleFlight
+
+TwilioCredentials = namedtuple('TwilioCredentials', ['account_sid', 'auth_token', 'api_key_sid', 'api_key_secret'])
+TwilioCredentials.__new__.__defaults__ = (None, None, None)
+TwilioCredentials.__doc__ = """
+Credentials of a Twilio account or subaccount.
+Without auth token, the Twilio REST client authenticates with the API key.
+"""
+
+TenantCredentials = namedtuple('TenantCredentials', ['credentials', 'signing_context'])
+TenantCredentials.__doc__ = 'Credentials of a tenant with the signing context built from them.'
+
+
+def credentials_from_dict(data):
+    """
+    :param dict data: Credentials with the fields of `TwilioCredentials`, extra keys are ignored.
+    :rtype: TwilioCredentials
+    """
+    return TwilioCredentials(**{field: data.get(field) for field in TwilioCredentials._fields})
+
+
+def find_tenant_of_account(tenants, account_sid):
+    """
+    :param dict tenants: Credential dicts keyed by tenant.
+    :param str account_sid: Twilio account SID.
+    :returns: The first tenant with the credentials of the account, or None.
+    :rtype: str
+    """
+    return next((tenant for tenant, data in tenants.items() if data.get('account_sid') == account_sid), None)
+
+
+class SettingsBackend(object):
+    """
+    Credentials backend reading the `TWILIO_TENANTS` setting, a dict of credential dicts keyed by tenant.
+    """
+
+    def load(self, tenant):
+        """
+        :param str tenant: Tenant key.
+        :returns: Credentials of the tenant, or None when unknown.
+        :rtype: TwilioCredentials
+        """
+        data = (get_setting('TWILIO_TENANTS') or {}).get(tenant)
+        return credentials_from_dict(data) if data is not None else None
+
+    def find_tenant(self, account_sid):
+        """
+        :param str account_sid: Twilio account SID.
+        :returns: Tenant whose credentials are those of the account, or None when unknown.
+        :rtype: str
+        """
+        return find_tenant_of_account(get_setting('TWILIO_TENANTS') or {}, account_sid)
+
+
+class JSONFileBackend(object):
+    """
+    Credentials backend reading the JSON file at `TWILIO_CREDENTIALS_FILE`, an object of
+    credential objects keyed by tenant. The file is read again once modified.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or get_setting('TWILIO_CREDENTIALS_FILE')
+        if not self.path:
+            raise ImproperlyConfigured('JSONFileBackend requires the TWILIO_CREDENTIALS_FILE setting.')
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._tenants = {}
+
+    def load(self, tenant):
+        """
+        :param str tenant: Tenant key.
+        :returns: Credentials of the tenant, or None when unknown.
+        :rtype: TwilioCredentials
+        """
+        data = self.read().get(tenant)
+        return credentials_from_dict(data) if data is not None else None
+
+    def find_tenant(self, account_sid):
+        """
+        :param str account_sid: Twilio account SID.
+        :returns: Tenant whose credentials are those of the account, or None when unknown.
+        :rtype: str
+        """
+        return find_tenant_of_account(self.read(), account_sid)
+
+    def read(self):
+        """
+        :returns: Credential dicts keyed by tenant, read again once the file is modified.
+        :rtype: dict
+        """
+        mtime = os.stat(self.path).st_mtime
+        with self._lock:
+            if mtime != self._mtime:
+                with open(self.path) as f:
+                    self._tenants = json.load(f)
+                self._mtime = mtime
+            return self._tenants
+
+
+class CredentialRegistry(object):
+    """
+    Per-tenant Twilio credentials and signing contexts.
+
+    The tenant of a request is given by the `TWILIO_TENANT_RESOLVER` callable. Credentials are
+    loaded lazily from the `TWILIO_CREDENTIALS_BACKEND` and kept in an in-process LRU for
+    `TWILIO_CREDENTIALS_CACHE_TTL` seconds, so the hot path is a dictionary lookup. Requests
+    without tenant use the account of the project settings.
+
+    Requests made by Twilio, such as status callbacks, only tell their account: its tenant is
+    found among the tenants loaded, or by the `find_tenant(account_sid)` method of the backend
+    when it has one.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self.reset()
+
+    def reset(self):
+        """
+        Drop every cached credential and reload the resolver and backend from the settings.
+        """
+        with self._lock:
+            self._local = None
+            self._resolver = None
+            self._backend = None
+            self._accounts = {}
+
+    @property
+    def local(self):
+        if self._local is None:
+            with self._lock:
+                if self._local is None:
+                    self._local = LRUCache(max_size=get_setting('TWILIO_CREDENTIALS_CACHE_MAX_SIZE'))
+        return self._local
+
+    @property
+    def resolver(self):
+        if self._resolver is None:
+            path = get_setting('TWILIO_TENANT_RESOLVER')
+            self._resolver = import_string(path) if path else (lambda request: None)
+        return self._resolver
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            path = get_setting('TWILIO_CREDENTIALS_BACKEND')
+            if not path:
+                raise ImproperlyConfigured('Resolving tenants requires the TWILIO_CREDENTIALS_BACKEND setting.')
+            self._backend = import_string(path)()
+        return self._backend
+
+    def resolve(self, request):
+        """
+        Return the tenant of `request`, or None for the account of the project settings.
+
+        :param request: Incoming request, or None.
+        """
+        return self.resolver(request) if request is not None else None
+
+    def get(self, tenant):
+        """
+        Return the credentials of `tenant`, loading them from the backend on a cache miss.
+
+        :param str tenant: Tenant key.
+        :rtype: TenantCredentials
+        :raises rest_framework.exceptions.NotFound: when the tenant is unknown.
+        """
+        entry = self.local.get(tenant)
+        if entry is None:
+            entry = self._flight.do(tenant, lambda: self._load(tenant))
+        if entry is False:
+            raise NotFound('Unknown tenant.')
+        return entry
+
+    def _load(self, tenant):
+        credentials = self.backend.load(tenant)
+        # Unknown tenants are remembered too, so they do not reach the backend on every request.
+        entry = False
+        if credentials is not None:
+            self._accounts[credentials.account_sid] = tenant
+            entry = TenantCredentials(credentials, SigningContext(
+                account_sid=credentials.account_sid, signing_key_sid=credentials.api_key_sid,
+                secret=credentials.api_key_secret))
+        self.local.set(tenant, entry, get_setting('TWILIO_CREDENTIALS_CACHE_TTL'))
+        return entry
+
+    def tenant_of_account(self, account_sid):
+        """
+        Return the tenant whose credentials are those of the Twilio account `account_sid`.
+
+        :param str account_sid: Twilio account SID.
+        :returns: The tenant, or None when unknown.
+        :rtype: str
+        """
+        tenant = self._accounts.get(account_sid)
+        if tenant is None and get_setting('TWILIO_CREDENTIALS_BACKEND'):
+            find_tenant = getattr(self.backend, 'find_tenant', None)
+            if find_tenant is not None:
+                tenant = find_tenant(account_sid)
+        return tenant
+
+    def forget(self, tenant):
+        """
+        Drop the cached credentials of a tenant, e.g. once they have been rotated.
+        """
+        self.local.delete(tenant)
+
+
+credential_registry = CredentialRegistry()
+
+
+def get_signing_context_for(request):
+    """
+    Return the signing context of the tenant of `request`.
+
+    :param request: Incoming request, or None for the account of the project settings.
+    :rtype: django_twilio_access_token.signing.SigningContext
+    """
+    tenant = credential_registry.resolve(request)
+    if tenant is None:
+        return key_rotation.get_signing_context()
+    return credential_registry.get(tenant).signing_context
+
+
+def get_auth_token_for_account(account_sid):
+    """
+    Return the auth token of the tenant whose Twilio account is `account_sid`.
+
+    :param str account_sid: Twilio account SID.
+    :returns: The auth token, or None when no tenant has this account or its auth token.
+    :rtype: str
+    """
+    tenant = credential_registry.tenant_of_account(account_sid)
+    if tenant is None:
+        return None
+    try:
+        credentials = credential_registry.get(tenant).credentials
+    except NotFound:
+        return None
+    # The account of a tenant may have changed since it was indexed.
+    return credentials.auth_token if credentials.account_sid == account_sid else None
+
+
+def get_client_for(request):
+    """
+    Return the Twilio REST client of the tenant of `request`.
+
+    :param request: Incoming request, or None for the account of the project settings.
+    :rtype: twilio.rest.Client
+    :raises twilio.base.exceptions.TwilioException: when credentials are missing.
+    """
+    tenant = credential_registry.resolve(request)
+    if tenant is None:
+        return get_client(account_sid=settings.TWILIO_ACCOUNT_SID,
+                          username=settings.TWILIO_ACCOUNT_SID,
+                          password=settings.TWILIO_AUTH_TOKEN)
+
+    credentials = credential_registry.get(tenant).credentials
+    if credentials.auth_token:
+        return get_client(credentials.account_sid, credentials.account_sid, credentials.auth_token)
+    return get_client(credentials.account_sid, credentials.api_key_sid, credentials.api_key_secret)
+
+
+@receiver(setting_changed)
+def _reset_credential_registry(setting, **kwargs):
+    if setting.startswith('TWILIO_TENANT') or setting.startswith('TWILIO_CREDENTIALS_'):
+        credential_registry.reset()
@@ -0,0 +1,154 @@
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from twilio.jwt.access_token.grants import VideoGrant
+
+from django_twilio_access_token.conf import get_setting
+from django_twilio_access_token.keyring import key_rotation
+from django_twilio_access_token.signing import SigningContext, to_timestamp
+
+TokenSpec = namedtuple('TokenSpec', ['identity', 'room_name', 'valid_until', 'grants'])
+TokenSpec.__new__.__defaults__ = (None, None, None, None)
+TokenSpec.__doc__ = """
+Access token to sign: a video grant for `room_name`, plus the payloads of `grants` keyed by
+grant key, e.g. `{'chat': {'service_sid': 'IS...'}}`.
+"""
+
+# Signing context of a worker process, built once by `_init_worker`.
+_worker_context = None
+
+
+def _init_worker(context):
+    global _worker_context
+    _worker_context = context
+
+
+def _sign_chunk(chunk, now):
+    return sign_chunk(_worker_context, chunk, now)
+
+
+def sign_chunk(context, chunk, now):
+    """
+    :param SigningContext context: Signing context.
+    :param list chunk: Pairs of claims as given by `prepare`, ordered.
+    :param int now: Issue time of the tokens as unix timestamp.
+    :returns: Signed JWTs, in chunk order.
+    :rtype: list
+    """
+    return [context.sign(grants, identity=identity, valid_until=valid_until, now=now)
+            for identity, grants, valid_until in chunk]
+
+
+def prepare(spec):
+    """
+    Return the claims of a token spec, as signed by `SigningContext.sign` and sent to the workers.
+
+    :param TokenSpec spec: Token to sign.
+    :rtype: tuple
+    """
+    grants = dict(spec.grants or {})
+    if spec.room_name is not None:
+        video_grant = VideoGrant(room=spec.room_name)
+        grants[video_grant.key] = video_grant.to_payload()
+    return spec.identity, grants, to_timestamp(spec.valid_until)
+
+
+class SigningEngine(object):
+    """
+    Sign large batches of access tokens on every core, for bulk workloads run outside of requests.
+
+    Batches are split into chunks of `chunk_size` tokens signed by a pool of `workers` processes,
+    each holding its own signing context built once. Tokens are the same as those of the token
+    endpoints. Batches of a single chunk are signed in the current process.
+
+    With a `context_source`, the signing context is looked up again for each batch, and the
+    worker processes are replaced once it changed, e.g. after a signing key rotation.
+    """
+
+    def __init__(self, account_sid=None, signing_key_sid=None, secret=None, ttl=3600, workers=None, chunk_size=None,
+                 context_source=None):
+        """
+        :param str account_sid: Twilio account SID, the subject of the tokens.
+        :param str signing_key_sid: Twilio API key SID, the issuer of the tokens.
+        :param str secret: Twilio API key secret.
+        :param int ttl: Lifetime of tokens without `valid_until`, in seconds.
+        :param int workers: Worker processes, defaults to `TWILIO_SIGNING_ENGINE_WORKERS` or the number of cores.
+        :param int chunk_size: Tokens per chunk, defaults to `TWILIO_SIGNING_ENGINE_CHUNK_SIZE`.
+        :param callable context_source: Function returning the signing context to sign with, used
+                                        instead of the credentials above.
+        """
+        self.context_source = context_source
+        if context_source is not None:
+            self.context = context_source()
+        else:
+            self.context = SigningContext(account_sid=account_sid, signing_key_sid=signing_key_sid, secret=secret,
+                                          ttl=ttl)
+        self.workers = workers or get_setting('TWILIO_SIGNING_ENGINE_WORKERS') or os.cpu_count() or 1
+        self.chunk_size = chunk_size or get_setting('TWILIO_SIGNING_ENGINE_CHUNK_SIZE')
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+
+    @classmethod
+    def from_settings(cls, **kwargs):
+        """
+        Build a signing engine for the account of the project settings, signing with its active
+        key like the token endpoints, see `django_twilio_access_token.keyring.KeyRotation`.
+        """
+        return cls(context_source=key_rotation.get_signing_context, **kwargs)
+
+    def executor(self):
+        # A pool inherited through a fork cannot be used, every process starts its own.
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                                         initargs=(self.context,))
+                    self._pid = os.getpid()
+        return self._executor
+
+    def sign(self, specs, now=None):
+        """
+        Sign a batch of tokens.
+
+        :param list specs: `TokenSpec` instances.
+        :param int now: Issue time of the tokens as unix timestamp, defaults to the current time.
+        :returns: Signed JWTs, in input order.
+        :rtype: list
+        """
+        now = int(time.time()) if now is None else now
+        if self.context_source is not None:
+            context = self.context_source()
+            if context is not self.context:
+                # Workers hold the previous context.
+                self.close()
+                self.context = context
+        claims = [prepare(spec) for spec in specs]
+        if self.workers == 1 or len(claims) <= self.chunk_size:
+            return sign_chunk(self.context, claims, now)
+
+        chunks = [claims[i:i + self.chunk_size] for i in range(0, len(claims), self.chunk_size)]
+        tokens = []
+        for chunk_tokens in self.executor().map(_sign_chunk, chunks, [now] * len(chunks)):
+            tokens.extend(chunk_tokens)
+        return tokens
+
+    def close(self):
+        """
+        Stop the worker processes.
+        """
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown()
+            self._executor = None
+            self._pid = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
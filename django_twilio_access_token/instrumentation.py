@@ -0,0 +1,185 @@
+import threading
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from django_twilio_access_token.conf import get_setting
+
+# Phases timed on the hot paths of token minting and room creation.
+TOKEN_VALIDATE = 'token.validate'
+TOKEN_CREATE = 'token.create'
+TOKEN_SIGN = 'token.sign'
+ROOM_VALIDATE = 'room.validate'
+ROOM_CLIENT = 'room.client'
+ROOM_CREATE = 'room.create'
+ROOM_FETCH = 'room.fetch'
+
+
+class Hook(object):
+    """
+    Base class of instrumentation hooks, notified around each instrumented phase.
+    """
+
+    def enter(self, phase, tags):
+        """
+        Called when a phase starts.
+
+        :param str phase: Name of the phase, e.g. `token.sign`.
+        :param dict tags: Extra details of the phase.
+        :returns: State passed back to `exit`.
+        """
+        return None
+
+    def exit(self, phase, tags, state, duration, error):
+        """
+        Called when a phase ends.
+
+        :param str phase: Name of the phase, e.g. `token.sign`.
+        :param dict tags: Extra details of the phase.
+        :param state: Value returned by `enter`.
+        :param float duration: Duration of the phase in seconds.
+        :param BaseException error: Exception raised by the phase, or None.
+        """
+
+
+class PrometheusHook(Hook):
+    """
+    Record the duration of each phase in a Prometheus histogram labelled by phase and outcome.
+    Requires `prometheus_client` unless a histogram is given.
+    """
+
+    def __init__(self, histogram=None):
+        if histogram is None:
+            try:
+                from prometheus_client import Histogram
+            except ImportError:
+                raise ImproperlyConfigured('PrometheusHook requires the prometheus_client package.')
+            histogram = Histogram('django_twilio_access_token_phase_seconds',
+                                  'Duration of token minting and room creation phases.',
+                                  ['phase', 'outcome'])
+        self.histogram = histogram
+
+    def exit(self, phase, tags, state, duration, error):
+        outcome = 'success' if error is None else 'error'
+        self.histogram.labels(phase=phase, outcome=outcome).observe(duration)
+
+
+class OpenTelemetryHook(Hook):
+    """
+    Trace each phase as an OpenTelemetry span, nested under the current span.
+    Requires `opentelemetry-api` unless a tracer is given.
+    """
+
+    def __init__(self, tracer=None):
+        if tracer is None:
+            try:
+                from opentelemetry import trace
+            except ImportError:
+                raise ImproperlyConfigured('OpenTelemetryHook requires the opentelemetry-api package.')
+            tracer = trace.get_tracer('django_twilio_access_token')
+        self.tracer = tracer
+
+    def enter(self, phase, tags):
+        span = self.tracer.start_as_current_span('twilio.{}'.format(phase), attributes=tags)
+        span.__enter__()
+        return span
+
+    def exit(self, phase, tags, state, duration, error):
+        # The span records the exception and sets its error status itself.
+        if error is None:
+            state.__exit__(None, None, None)
+        else:
+            state.__exit__(type(error), error, error.__traceback__)
+
+
+class _Noop(object):
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _Noop()
+
+
+class _Measure(object):
+    __slots__ = ('phase', 'tags', 'hooks', 'states', 'start')
+
+    def __init__(self, phase, tags, hooks):
+        self.phase = phase
+        self.tags = tags
+        self.hooks = hooks
+
+    def __enter__(self):
+        self.states = [hook.enter(self.phase, self.tags) for hook in self.hooks]
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.start
+        for hook, state in zip(reversed(self.hooks), reversed(self.states)):
+            hook.exit(self.phase, self.tags, state, duration, exc)
+        return False
+
+
+class Instrumentation(object):
+    """
+    Registry of instrumentation hooks.
+
+    Hooks are kept in a tuple replaced on change, so timing a phase takes no lock, and
+    costs a single attribute check when no hook is registered.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hooks = ()
+        self._loaded = ()
+
+    def measure(self, phase, **tags):
+        """
+        Return a context manager notifying the registered hooks around `phase`.
+
+        :param str phase: Name of the phase, e.g. `token.sign`.
+        """
+        hooks = self.hooks
+        if not hooks:
+            return _NOOP
+        return _Measure(phase, tags, hooks)
+
+    def add_hook(self, hook):
+        """
+        :param Hook hook: Hook notified around every phase.
+        """
+        with self._lock:
+            self.hooks = self.hooks + (hook,)
+
+    def remove_hook(self, hook):
+        with self._lock:
+            self.hooks = tuple(registered for registered in self.hooks if registered is not hook)
+
+    def load_settings(self):
+        """
+        Replace the hooks previously loaded from `TWILIO_INSTRUMENTATION_HOOKS`, a list of dotted
+        paths to hook classes instantiated without arguments.
+        """
+        loaded = tuple(import_string(path)() for path in get_setting('TWILIO_INSTRUMENTATION_HOOKS'))
+        with self._lock:
+            kept = tuple(hook for hook in self.hooks if hook not in self._loaded)
+            self.hooks = kept + loaded
+            self._loaded = loaded
+
+
+instrumentation = Instrumentation()
+instrument = instrumentation.measure
+
+
+@receiver(setting_changed)
+def _reload_hooks(setting, **kwargs):
+    if setting == 'TWILIO_INSTRUMENTATION_HOOKS':
+        instrumentation.load_settings()
@@ -0,0 +1,176 @@
+import logging
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from django_twilio_access_token.cache import LRUCache
+from django_twilio_access_token.conf import get_setting
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+
+
+class Job(object):
+    """
+    Background room creation, polled by its id.
+    """
+    __slots__ = ('id', 'status', 'result', 'status_code', 'wait')
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.status = PENDING
+        # Response payload and status code of the creation, once done.
+        self.result = None
+        self.status_code = None
+        # Seconds to wait before retrying a failed creation, answered as `Retry-After`.
+        self.wait = None
+
+    def run(self, fn):
+        """
+        Run `fn` and keep its result, or the error it raised in the shape DRF answers it.
+
+        :param callable fn: Function returning the response payload.
+        """
+        try:
+            self.result = fn()
+            self.status_code = status.HTTP_201_CREATED
+            self.status = SUCCEEDED
+        except APIException as e:
+            # Same payload as `rest_framework.views.exception_handler`.
+            self.result = e.detail if isinstance(e.detail, (list, dict)) else {'detail': e.detail}
+            self.status_code = e.status_code
+            self.wait = getattr(e, 'wait', None)
+            self.status = FAILED
+        except Exception:
+            logger.exception('Room creation job %s failed.', self.id)
+            self.result = {'detail': 'Room creation failed.'}
+            self.status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+            self.status = FAILED
+
+
+class ThreadPoolBackend(object):
+    """
+    Run jobs in a pool of `TWILIO_ROOM_JOBS_WORKERS` threads of the current process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+
+    def submit(self, job, fn):
+        """
+        :param Job job: Job to run.
+        :param callable fn: Function returning the response payload.
+        """
+        self.executor().submit(job.run, fn)
+
+    def executor(self):
+        # Threads do not survive a fork, every worker process starts its own pool.
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._executor = ThreadPoolExecutor(max_workers=get_setting('TWILIO_ROOM_JOBS_WORKERS'),
+                                                        thread_name_prefix='twilio-room-jobs')
+                    self._pid = os.getpid()
+        return self._executor
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=False)
+            self._executor = None
+            self._pid = None
+
+
+class JobQueue(object):
+    """
+    Room creations answered before they are done.
+
+    Jobs are run by the backend named by `TWILIO_ROOM_JOBS_BACKEND`, a class with a
+    `submit(job, fn)` method, and kept in memory for `TWILIO_ROOM_JOBS_TTL` seconds.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._jobs = None
+        self._backend = None
+
+    @property
+    def jobs(self):
+        if self._jobs is None:
+            with self._lock:
+                if self._jobs is None:
+                    self._jobs = LRUCache(max_size=get_setting('TWILIO_ROOM_JOBS_MAX_SIZE'))
+        return self._jobs
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    self._backend = import_string(get_setting('TWILIO_ROOM_JOBS_BACKEND'))()
+        return self._backend
+
+    def submit(self, fn):
+        """
+        Run `fn` in the background.
+
+        :param callable fn: Function returning the response payload of the room creation.
+        :rtype: Job
+        """
+        job = Job()
+        self.jobs.set(job.id, job, get_setting('TWILIO_ROOM_JOBS_TTL'))
+        self.backend.submit(job, fn)
+        return job
+
+    def get(self, job_id):
+        """
+        :param str job_id: Id of the job.
+        :returns: The job, or None when unknown or expired.
+        :rtype: Job
+        """
+        return self.jobs.get(job_id)
+
+    def reset(self):
+        with self._lock:
+            backend, self._backend = self._backend, None
+            self._jobs = None
+        if backend is not None and hasattr(backend, 'shutdown'):
+            backend.shutdown()
+
+
+room_jobs = JobQueue()
+
+
+def respond_async(request):
+    """
+    Tell whether the room creation of `request` should be answered before it is done, according
+    to `TWILIO_ROOM_JOBS_MODE`: never with None, on `Prefer: respond-async` with 'prefer', or 'always'.
+
+    :param rest_framework.request.Request request: Incoming request.
+    :rtype: bool
+    """
+    mode = get_setting('TWILIO_ROOM_JOBS_MODE')
+    if mode == 'always':
+        return True
+    if mode == 'prefer':
+        preferences = request.META.get('HTTP_PREFER', '')
+        return 'respond-async' in (preference.strip().lower() for preference in preferences.split(','))
+    return False
+
+
+@receiver(setting_changed)
+def _reset_room_jobs(setting, **kwargs):
+    if setting in ('TWILIO_ROOM_JOBS_BACKEND', 'TWILIO_ROOM_JOBS_WORKERS', 'TWILIO_ROOM_JOBS_MAX_SIZE'):
+        room_jobs.reset()
@@ -0,0 +1,254 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.dateparse import parse_datetime
+
+from django_twilio_access_token.conf import get_setting
+from django_twilio_access_token.signing import SigningContext, get_signing_context, to_timestamp
+
+logger = logging.getLogger(__name__)
+
+# Cache key of the signing keys published for `TWILIO_SIGNING_KEYS_CACHE`.
+SIGNING_KEYS_CACHE_KEY = 'django-twilio-access-token:signing-keys'
+
+SigningKey = namedtuple('SigningKey', ['sid', 'secret', 'not_before', 'not_after'])
+SigningKey.__new__.__defaults__ = (None, None)
+SigningKey.__doc__ = 'Twilio API key signing tokens from `not_before` until `not_after`, as unix timestamps.'
+
+
+def _timestamp(value):
+    if isinstance(value, str):
+        parsed = parse_datetime(value)
+        if parsed is None:
+            raise ValueError('Invalid datetime {!r}.'.format(value))
+        return to_timestamp(parsed)
+    return value
+
+
+def signing_key_from_dict(data):
+    """
+    :param dict data: Key with `sid` and `secret`, and optional `not_before` and `not_after`
+                      as ISO 8601 datetimes or unix timestamps.
+    :rtype: SigningKey
+    """
+    return SigningKey(sid=data['sid'], secret=data['secret'],
+                      not_before=_timestamp(data.get('not_before')), not_after=_timestamp(data.get('not_after')))
+
+
+class KeyRing(object):
+    """
+    Immutable set of signing keys of an account, each with its prebuilt signing context.
+
+    Among the keys active at a given time, the most recently activated one signs.
+    """
+
+    def __init__(self, account_sid, keys):
+        """
+        :param str account_sid: Twilio account SID, the subject of the tokens.
+        :param list keys: `SigningKey` instances.
+        """
+        self.keys = sorted(keys, key=lambda key: key.not_before or 0, reverse=True)
+        self._contexts = [
+            (key, SigningContext(account_sid=account_sid, signing_key_sid=key.sid, secret=key.secret))
+            for key in self.keys
+        ]
+
+    def get_signing_context(self, now=None):
+        """
+        Return the signing context of the key to sign with at `now`, or None when no key is active.
+
+        :param float now: Unix timestamp, defaults to the current time.
+        :rtype: django_twilio_access_token.signing.SigningContext
+        """
+        if now is None:
+            now = time.time()
+        for key, context in self._contexts:
+            if (key.not_before is None or key.not_before <= now) and (key.not_after is None or now < key.not_after):
+                return context
+        return None
+
+
+class FileKeySource(object):
+    """
+    Read signing keys from a JSON file holding a list of keys.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def read(self):
+        with open(self.path) as f:
+            return json.load(f)
+
+
+class CacheKeySource(object):
+    """
+    Read signing keys from a Django cache, where they are published with `publish_signing_keys`.
+    """
+
+    def __init__(self, alias):
+        self.alias = alias
+
+    def read(self):
+        return caches[self.alias].get(SIGNING_KEYS_CACHE_KEY)
+
+
+def publish_signing_keys(keys, alias):
+    """
+    Publish signing keys to every worker polling the Django cache `alias`.
+
+    :param list keys: Keys as dicts, see `signing_key_from_dict`.
+    :param str alias: Django cache alias.
+    """
+    caches[alias].set(SIGNING_KEYS_CACHE_KEY, keys, timeout=None)
+
+
+class KeyRotation(object):
+    """
+    Signing keys of the account of the project settings, reloaded in the background.
+
+    Keys are read from the JSON file `TWILIO_SIGNING_KEYS_FILE` or from the Django cache
+    `TWILIO_SIGNING_KEYS_CACHE`, every `TWILIO_SIGNING_KEYS_POLL_INTERVAL` seconds, by a daemon
+    thread. Requests only read the current key ring, which the thread replaces as a whole, and never
+    wait on the source: until the thread first loads the keys, the previous key ring or else the keys
+    of the project settings are used.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._loaded = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._data = None
+        self.ring = None
+
+    def source(self):
+        path = get_setting('TWILIO_SIGNING_KEYS_FILE')
+        if path:
+            return FileKeySource(path)
+        alias = get_setting('TWILIO_SIGNING_KEYS_CACHE')
+        if alias:
+            return CacheKeySource(alias)
+        return None
+
+    def get_signing_context(self):
+        """
+        Return the signing context of the active key, falling back to the keys of the project settings.
+
+        :rtype: django_twilio_access_token.signing.SigningContext
+        """
+        if self._pid != os.getpid():
+            self.start()
+        ring = self.ring
+        context = ring.get_signing_context() if ring is not None else None
+        return context or get_signing_context()
+
+    def start(self):
+        """
+        Start loading and polling the keys in the background, once per process. Called at app startup.
+        """
+        if self._pid == os.getpid():
+            return
+        source = self.source()
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            if source is None:
+                self._loaded.set()
+                self._pid = os.getpid()
+                return
+            # Threads do not survive a fork, the key ring inherited from the parent is kept.
+            self._stop = threading.Event()
+            self._loaded = threading.Event()
+            self._thread = threading.Thread(target=self._poll, args=(source, self._stop, self._loaded),
+                                            name='twilio-signing-keys', daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def wait(self, timeout=None):
+        """
+        Wait for the first load of the keys started by `start`, successful or not.
+
+        :param float timeout: Seconds to wait at most, or None to wait as long as needed.
+        :returns: Whether the keys were loaded in time.
+        :rtype: bool
+        """
+        return self._loaded.wait(timeout)
+
+    def stop(self):
+        """
+        Stop polling and forget the keys.
+        """
+        with self._lock:
+            self._stop.set()
+            self._thread = None
+            self._pid = None
+            self._data = None
+            self.ring = None
+
+    def refresh(self, source, stop=None):
+        """
+        Read the keys from `source` and swap the key ring when they changed.
+        Errors are logged and the current key ring is kept.
+
+        :param threading.Event stop: Once set, the keys read are discarded.
+        """
+        # Only the swap holds the lock, so a fork during a slow read leaves it released in the child.
+        loaded = self.load(source)
+        with self._lock:
+            if stop is None or not stop.is_set():
+                self._swap(loaded)
+
+    def load(self, source):
+        """
+        Read the keys from `source`.
+
+        :returns: The keys read and their key ring, or None when they did not change or cannot be loaded.
+        :rtype: tuple
+        """
+        try:
+            data = source.read()
+            if data is None or data == self._data:
+                return None
+            return data, KeyRing(getattr(settings, 'TWILIO_ACCOUNT_SID', None), [signing_key_from_dict(key) for key in data])
+        except Exception:
+            logger.exception('Unable to load Twilio signing keys, keeping the current ones.')
+            return None
+
+    def _swap(self, loaded):
+        if loaded is not None:
+            self._data, self.ring = loaded
+
+    def reset_after_fork(self):
+        """
+        Replace the lock, which another thread of the parent may have held while forking.
+        The key ring inherited from the parent is kept, polling starts again with the child.
+        """
+        self._lock = threading.Lock()
+
+    def _poll(self, source, stop, loaded):
+        self.refresh(source, stop)
+        loaded.set()
+        while not stop.wait(get_setting('TWILIO_SIGNING_KEYS_POLL_INTERVAL')):
+            self.refresh(source, stop)
+
+
+key_rotation = KeyRotation()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=key_rotation.reset_after_fork)
+
+
+@receiver(setting_changed)
+def _reset_key_rotation(setting, **kwargs):
+    if setting.startswith('TWILIO_SIGNING_KEYS_') or setting == 'TWILIO_ACCOUNT_SID':
+        key_rotation.stop()
@@ -0,0 +1,52 @@
+import json
+import sys
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+
+from django_twilio_access_token.engine import SigningEngine, TokenSpec
+from django_twilio_access_token.serializers.twilio_access_token_serializer import validate_video_token_line
+
+
+class Command(BaseCommand):
+    help = ('Sign video tokens for an NDJSON roster, one token/video/ payload per line, on every core. '
+            'Tokens are written as NDJSON in input order, {"token": ...} or {"errors": ...} per line.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', nargs='?', default='-', help='NDJSON roster, defaults to the standard input.')
+        parser.add_argument('--output', default='-', help='NDJSON tokens, defaults to the standard output.')
+        parser.add_argument('--workers', type=int, help='Signing processes, defaults to the number of cores.')
+        parser.add_argument('--chunk-size', type=int, help='Tokens signed per task of a signing process.')
+        parser.add_argument('--batch-size', type=int, default=50000,
+                            help='Lines read at once, bounding the memory used.')
+
+    def handle(self, *args, **options):
+        source = sys.stdin.buffer if options['input'] == '-' else open(options['input'], 'rb')
+        output = self.stdout if options['output'] == '-' else open(options['output'], 'w')
+        try:
+            with SigningEngine.from_settings(workers=options['workers'], chunk_size=options['chunk_size']) as engine:
+                lines = (line for line in source if line.strip())
+                for batch in iter(lambda: list(islice(lines, options['batch_size'])), []):
+                    self.write_batch(engine, batch, output)
+        finally:
+            if source is not sys.stdin.buffer:
+                source.close()
+            if output is not self.stdout:
+                output.close()
+
+    def write_batch(self, engine, batch, output):
+        """
+        Validate and sign a batch of roster lines, then write the results in input order.
+
+        :param SigningEngine engine: Signing engine.
+        :param list batch: Lines of the roster.
+        :param output: Text file the NDJSON lines are written to.
+        """
+        entries = [validate_video_token_line(line) for line in batch]
+        tokens = iter(engine.sign([
+            TokenSpec(identity=data['identity'], room_name=data['room_name'], valid_until=data['valid_until'])
+            for data, errors in entries if errors is None
+        ]))
+        for data, errors in entries:
+            result = {'errors': errors} if errors is not None else {'token': next(tokens)}
+            output.write(json.dumps(result, separators=(',', ':')) + '\n')
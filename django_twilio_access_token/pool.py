@@ -0,0 +1,245 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+
+from django.core.signals import request_started, setting_changed
+from django.dispatch import receiver
+
+from django_twilio_access_token.clients import last_retry_after
+from django_twilio_access_token.conf import get_setting
+from django_twilio_access_token.credentials import get_client_for
+from django_twilio_access_token.instrumentation import ROOM_CREATE, instrument
+from django_twilio_access_token.resilience import room_guard
+from django_twilio_access_token.rooms import RoomRecord
+
+logger = logging.getLogger(__name__)
+
+ROOM_TYPES = ('group', 'group-small', 'peer-to-peer')
+
+
+def new_room_name():
+    """
+    Return a unique room name, as long as the names accepted by the room endpoints.
+
+    :rtype: str
+    """
+    return 'rp' + uuid.uuid4().hex
+
+
+class RoomPool(object):
+    """
+    Rooms created ahead of time for the account of the project settings, handed out at once.
+
+    `TWILIO_ROOM_POOL_SIZES` gives the number of ready rooms to keep per room type, created with
+    the parameters of `TWILIO_ROOM_POOL_PARAMS` by a daemon thread every
+    `TWILIO_ROOM_POOL_REFILL_INTERVAL` seconds, or as soon as a room is allocated. Rooms still
+    unused after `TWILIO_ROOM_POOL_MAX_AGE` seconds are completed, before Twilio closes them.
+
+    The pool starts with the first request a process serves, so management commands, the
+    autoreloader and a preforking master never create rooms. Forked workers forget the rooms
+    of their parent, which may be handed out by the parent or its other workers.
+    """
+
+    def __init__(self, timer=time.monotonic):
+        self._timer = timer
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        self.rooms = {}
+        self._expired = []
+        self.reset_stats()
+
+    def enabled(self):
+        return any(get_setting('TWILIO_ROOM_POOL_SIZES').values())
+
+    def allocate(self, room_type):
+        """
+        Take a ready room of `room_type` out of the pool.
+
+        :param str room_type: Room type, one of `ROOM_TYPES`.
+        :returns: The room, or None when none is ready.
+        :rtype: django_twilio_access_token.rooms.RoomRecord
+        """
+        if self._pid != os.getpid():
+            self.start()
+
+        max_age = get_setting('TWILIO_ROOM_POOL_MAX_AGE')
+        room = None
+        with self._lock:
+            rooms = self.rooms.get(room_type)
+            while rooms:
+                candidate, created_at = rooms.popleft()
+                if self._timer() - created_at < max_age:
+                    room = candidate
+                    break
+                # Completed by the next refill.
+                self._expired.append(candidate)
+
+        with self._stats_lock:
+            if room is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        self._wake.set()
+        return room
+
+    def refill(self, stop=None):
+        """
+        Complete the expired rooms, then create rooms until every pool is full.
+        Errors are logged and retried at the next refill.
+
+        :param threading.Event stop: Interrupts the refill once set.
+        """
+        sizes = get_setting('TWILIO_ROOM_POOL_SIZES')
+        params = get_setting('TWILIO_ROOM_POOL_PARAMS')
+        client = get_client_for(None)
+
+        for room in self._pop_expired():
+            try:
+                room_guard.call(lambda: client.video.rooms(room.sid).update(status='completed'),
+                                retry_after=lambda: last_retry_after(client))
+            except Exception:
+                logger.warning('Unable to complete expired pooled room %s.', room.sid, exc_info=True)
+
+        for room_type, size in sizes.items():
+            while len(self.rooms.get(room_type, ())) < size and not (stop and stop.is_set()):
+                room_params = dict(params.get(room_type, {}), type=room_type)
+                started = self._timer()
+                try:
+                    with instrument(ROOM_CREATE, room_type=room_type):
+                        instance = room_guard.call(
+                            lambda: client.video.rooms.create(**room_params, unique_name=new_room_name()),
+                            retry_after=lambda: last_retry_after(client))
+                except Exception:
+                    logger.warning('Unable to create a pooled %s room.', room_type, exc_info=True)
+                    with self._stats_lock:
+                        self.refill_failures += 1
+                    break
+
+                now = self._timer()
+                with self._stats_lock:
+                    self.refills += 1
+                    self.refill_seconds += now - started
+                with self._lock:
+                    self.rooms.setdefault(room_type, deque()).append(
+                        (RoomRecord(sid=instance.sid, unique_name=instance.unique_name), now))
+
+    def _pop_expired(self):
+        deadline = self._timer() - get_setting('TWILIO_ROOM_POOL_MAX_AGE')
+        with self._lock:
+            for rooms in self.rooms.values():
+                while rooms and rooms[0][1] <= deadline:
+                    self._expired.append(rooms.popleft()[0])
+            expired, self._expired = self._expired, []
+        with self._stats_lock:
+            self.expired += len(expired)
+        return expired
+
+    def start(self):
+        """
+        Start refilling the pool, once per process. Called on the first request served.
+        """
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            if self._pid is not None:
+                # Forked without `os.register_at_fork`.
+                self._forget_rooms()
+            self._pid = os.getpid()
+            if not self.enabled():
+                return
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._run, args=(self._stop,), name='twilio-room-pool', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """
+        Stop refilling and forget the ready rooms.
+        """
+        with self._lock:
+            self._stop.set()
+            self._wake.set()
+            self._thread = None
+            self._pid = None
+            self._forget_rooms()
+
+    def reset_after_fork(self):
+        """
+        Forget the rooms and the refill thread inherited from the parent process, the pool
+        starts again with the first request served by the child.
+        """
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._forget_rooms()
+        self.reset_stats()
+
+    def _forget_rooms(self):
+        self.rooms = {}
+        self._expired = []
+
+    def _run(self, stop):
+        while not stop.is_set():
+            try:
+                self.refill(stop)
+            except Exception:
+                logger.exception('Unable to refill the Twilio room pool.')
+            self._wake.wait(get_setting('TWILIO_ROOM_POOL_REFILL_INTERVAL'))
+            self._wake.clear()
+
+    def stats(self):
+        """
+        Return the ready rooms per type, hit rate, expirations and refill latency.
+
+        :rtype: dict
+        """
+        with self._lock:
+            sizes = {room_type: len(rooms) for room_type, rooms in self.rooms.items()}
+        with self._stats_lock:
+            allocations = self.hits + self.misses
+            return {
+                'sizes': sizes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / allocations if allocations else 0.0,
+                'expired': self.expired,
+                'refills': self.refills,
+                'refill_failures': self.refill_failures,
+                'refill_latency': self.refill_seconds / self.refills if self.refills else 0.0,
+            }
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self.hits = 0
+            self.misses = 0
+            self.expired = 0
+            self.refills = 0
+            self.refill_failures = 0
+            self.refill_seconds = 0.0
+
+
+room_pool = RoomPool()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=room_pool.reset_after_fork)
+
+
+@receiver(request_started)
+def _start_room_pool(**kwargs):
+    if room_pool._pid != os.getpid():
+        room_pool.start()
+
+
+@receiver(setting_changed)
+def _reset_room_pool(setting, **kwargs):
+    if setting.startswith('TWILIO_ROOM_POOL_') or setting in ('TWILIO_ACCOUNT_SID', 'TWILIO_AUTH_TOKEN'):
+        room_pool.stop()
@@ -0,0 +1,324 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from rest_framework.exceptions import Throttled
+
+from django_twilio_access_token.conf import get_setting
+
+logger = logging.getLogger(__name__)
+
+# Scopes of `TWILIO_TOKEN_RATE_LIMITS`.
+IDENTITY = 'identity'
+ROOM_NAME = 'room_name'
+IP = 'ip'
+SCOPES = (IDENTITY, ROOM_NAME, IP)
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+# Prefix of the shared counters of `TWILIO_TOKEN_RATE_LIMIT_CACHE`.
+CACHE_KEY_PREFIX = 'django-twilio-access-token:rate:'
+
+
+def parse_rate(rate):
+    """
+    :param str rate: Requests allowed per period, like DRF throttle rates, e.g. `'10/min'` or `'1000/hour'`.
+    :returns: Number of requests and period in seconds.
+    :rtype: tuple
+    """
+    count, period = rate.split('/')
+    return int(count), PERIODS[period[0]]
+
+
+def request_keys(request, validated_data):
+    """
+    Return the rate limit key of each scope of a token request.
+
+    :param request: Incoming request, or None.
+    :param dict validated_data: Data validated by a token deserializer.
+    :returns: `(scope, value)` pairs, scopes without value being left out.
+    :rtype: list
+    """
+    room_name = validated_data.get('room_name') or (validated_data.get('video') or {}).get('room_name')
+    ip = request.META.get('REMOTE_ADDR') if request is not None else None
+    return [(scope, value) for scope, value in ((IDENTITY, validated_data.get('identity')), (ROOM_NAME, room_name),
+                                                (IP, ip)) if value]
+
+
+class RateLimitShard(object):
+    """
+    Sliding window counters of a part of the keys, behind a single lock.
+
+    Each key holds its request count in the current fixed window and in the previous one. A
+    request is allowed while the previous count, weighted by the part of the previous window
+    still covered by the sliding window, plus the current count stays below the limit.
+
+    Keys are kept in least recently used order, so past `max_keys` the key idle for the longest
+    time is evicted in constant time.
+    """
+
+    def __init__(self, max_keys):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        # Key: [window, count, previous count, hits not synced yet]
+        self.counters = OrderedDict()
+
+    def hit(self, key, limit, period, now):
+        """
+        Count a request for `key` unless it goes over `limit` requests per `period` seconds.
+
+        :returns: Seconds to wait when the request is over the limit, otherwise None.
+        :rtype: float
+        """
+        window = int(now // period)
+        elapsed = now - window * period
+        with self._lock:
+            counter = self.counters.get(key)
+            if counter is None:
+                if len(self.counters) >= self.max_keys:
+                    self.counters.popitem(last=False)
+                counter = self.counters[key] = [window, 0, 0, 0]
+            else:
+                self.counters.move_to_end(key)
+                if counter[0] != window:
+                    counter[2] = counter[1] if counter[0] == window - 1 else 0
+                    counter[0], counter[1], counter[3] = window, 0, 0
+
+            previous_weight = 1 - elapsed / period
+            if counter[2] * previous_weight + counter[1] + 1 > limit:
+                if counter[1] + 1 > limit or not counter[2]:
+                    return period - elapsed
+                # Time until the previous window weighs little enough for one more request.
+                return max(period * (1 - (limit - counter[1] - 1) / counter[2]) - elapsed, 0.001)
+            counter[1] += 1
+            counter[3] += 1
+            return None
+
+    def undo(self, key):
+        """
+        Uncount the last request counted for `key`.
+        """
+        with self._lock:
+            counter = self.counters.get(key)
+            if counter is not None and counter[3]:
+                counter[1] -= 1
+                counter[3] -= 1
+
+    def pending(self):
+        """
+        Return the counters of the keys and their hits not synced yet, which are reset.
+
+        :returns: `(key, window, hits)` triples.
+        :rtype: list
+        """
+        with self._lock:
+            pending = [(key, counter[0], counter[3]) for key, counter in self.counters.items()]
+            for counter in self.counters.values():
+                counter[3] = 0
+        return pending
+
+    def merge(self, key, window, total):
+        """
+        Take the count of `key` of all processes into account.
+
+        :param int total: Requests counted by all processes in `window`, synced hits included.
+        """
+        with self._lock:
+            counter = self.counters.get(key)
+            if counter is not None and counter[0] == window:
+                counter[1] = max(counter[1], total + counter[3])
+
+
+class TokenRateLimiter(object):
+    """
+    Rate limits of token issuance per identity, room name and client IP, see `TWILIO_TOKEN_RATE_LIMITS`.
+
+    Counters live in the memory of the process, split in `TWILIO_TOKEN_RATE_LIMIT_SHARDS` shards
+    so concurrent requests seldom wait on the same lock. With `TWILIO_TOKEN_RATE_LIMIT_CACHE`,
+    a daemon thread adds the local counts to shared counters in that Django cache every
+    `TWILIO_TOKEN_RATE_LIMIT_SYNC_INTERVAL` seconds and reads back the counts of the other
+    processes, so limits hold across a cluster within one sync interval. Requests never wait
+    on the cache.
+    """
+
+    def __init__(self, timer=time.time):
+        # Windows are aligned on wall clock time, the same for every process sharing counters.
+        self._timer = timer
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        self.rates = None
+        self.shards = None
+        self.reset_stats()
+
+    def build(self):
+        with self._lock:
+            if self.rates is not None:
+                return
+            rates = {scope: parse_rate(rate) for scope, rate in get_setting('TWILIO_TOKEN_RATE_LIMITS').items()}
+            unknown = set(rates) - set(SCOPES)
+            if unknown:
+                raise ValueError('Unknown rate limit scopes {}.'.format(', '.join(sorted(unknown))))
+            count = get_setting('TWILIO_TOKEN_RATE_LIMIT_SHARDS')
+            max_keys = max(1, get_setting('TWILIO_TOKEN_RATE_LIMIT_MAX_KEYS') // count)
+            self.shards = [RateLimitShard(max_keys) for _ in range(count)]
+            self.rates = rates
+
+    def check(self, request, validated_data):
+        """
+        Count a token request, before anything is signed.
+
+        :param request: Incoming request, or None.
+        :param dict validated_data: Data validated by a token deserializer.
+        :raises rest_framework.exceptions.Throttled: when the request is over a limit.
+        """
+        if self.rates is None:
+            self.build()
+        if not self.rates:
+            return
+        if self._pid != os.getpid() and get_setting('TWILIO_TOKEN_RATE_LIMIT_CACHE'):
+            self.start()
+
+        wait = self.hit([(scope, value) for scope, value in request_keys(request, validated_data)
+                         if scope in self.rates])
+        if wait is not None:
+            raise Throttled(wait=wait)
+
+    def hit(self, keys):
+        """
+        Count a request for each key, or for none of them when one is over its limit.
+
+        :param list keys: `(scope, value)` pairs.
+        :returns: Seconds to wait when the request is over a limit, otherwise None.
+        :rtype: float
+        """
+        now = self._timer()
+        counted = []
+        for key in keys:
+            limit, period = self.rates[key[0]]
+            shard = self.shard(key)
+            wait = shard.hit(key, limit, period, now)
+            if wait is not None:
+                for previous_shard, previous_key in counted:
+                    previous_shard.undo(previous_key)
+                with self._lock:
+                    self.rejected[key[0]] = self.rejected.get(key[0], 0) + 1
+                return wait
+            counted.append((shard, key))
+        return None
+
+    def shard(self, key):
+        return self.shards[hash(key) % len(self.shards)]
+
+    def sync(self, cache):
+        """
+        Add the local counts to the shared counters of `cache` and read back the counts of all processes.
+        Cache errors are logged and the local counters are kept.
+
+        :param django.core.cache.backends.base.BaseCache cache: Django cache holding the shared counters.
+        """
+        now = self._timer()
+        for shard in self.shards:
+            pending = [(key, window, hits) for key, window, hits in shard.pending()
+                       if window == int(now // self.rates[key[0]][1])]
+            if not pending:
+                continue
+            cache_keys = {(key, window): cache_key(key, window) for key, window, _ in pending}
+            try:
+                totals = {}
+                for key, window, hits in pending:
+                    if hits:
+                        # The counter expires once its window and the next one are over.
+                        cache.add(cache_keys[key, window], 0, timeout=int(self.rates[key[0]][1] * 2) + 1)
+                        totals[key, window] = cache.incr(cache_keys[key, window], hits)
+                unknown = [item for item in cache_keys if item not in totals]
+                if unknown:
+                    values = cache.get_many([cache_keys[item] for item in unknown])
+                    totals.update({item: values[cache_keys[item]] for item in unknown if cache_keys[item] in values})
+            except Exception:
+                logger.exception('Unable to sync token rate limit counters.')
+                with self._lock:
+                    self.sync_errors += 1
+                continue
+            for (key, window), total in totals.items():
+                shard.merge(key, window, total)
+        with self._lock:
+            self.syncs += 1
+
+    def start(self):
+        """
+        Start syncing the counters with `TWILIO_TOKEN_RATE_LIMIT_CACHE` in the background, once per process.
+        """
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # Threads do not survive a fork, the counters inherited from the parent are kept.
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._run, args=(caches[get_setting('TWILIO_TOKEN_RATE_LIMIT_CACHE')],
+                                                                    self._stop),
+                                            name='twilio-token-rate-limit', daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def stop(self):
+        """
+        Stop syncing and forget the counters and the limits.
+        """
+        with self._lock:
+            self._stop.set()
+            self._thread = None
+            self._pid = None
+            self.rates = None
+            self.shards = None
+
+    def _run(self, cache, stop):
+        while not stop.wait(get_setting('TWILIO_TOKEN_RATE_LIMIT_SYNC_INTERVAL')):
+            self.sync(cache)
+
+    def stats(self):
+        """
+        Return the keys counted, the rejected requests per scope, and the syncs done and failed.
+
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                'keys': sum(len(shard.counters) for shard in self.shards or ()),
+                'rejected': dict(self.rejected),
+                'syncs': self.syncs,
+                'sync_errors': self.sync_errors,
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self.rejected = {}
+            self.syncs = 0
+            self.sync_errors = 0
+
+
+def cache_key(key, window):
+    """
+    Return the shared counter name of `key` in `window`, valid for any cache backend.
+
+    :param tuple key: `(scope, value)` pair.
+    :param int window: Window index.
+    :rtype: str
+    """
+    digest = hashlib.sha1(key[1].encode('utf-8')).hexdigest()
+    return '{}{}:{}:{:d}'.format(CACHE_KEY_PREFIX, key[0], digest, window)
+
+
+token_rate_limiter = TokenRateLimiter()
+
+
+@receiver(setting_changed)
+def _reset_token_rate_limiter(setting, **kwargs):
+    if setting.startswith('TWILIO_TOKEN_RATE_LIMIT'):
+        token_rate_limiter.stop()
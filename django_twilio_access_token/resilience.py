@@ -0,0 +1,335 @@
+import math
+import random
+import threading
+import time
+
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from requests.exceptions import RequestException
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from twilio.base.exceptions import TwilioRestException
+
+from django_twilio_access_token.conf import get_setting
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+
+class UpstreamUnavailable(APIException):
+    """
+    Raised instead of calling Twilio while it is overloaded or failing.
+    """
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Twilio is unavailable, try again later.'
+    default_code = 'twilio_unavailable'
+
+    def __init__(self, detail=None, code=None, wait=None):
+        super().__init__(detail, code)
+        # Sent as `Retry-After` header by DRF.
+        self.wait = wait
+
+
+class Bulkhead(object):
+    """
+    Limit the number of concurrent calls, with a bounded queue of callers waiting for a slot.
+    """
+
+    def __init__(self, max_concurrent, max_queue=0, queue_timeout=1.0):
+        """
+        :param int max_concurrent: Calls allowed at once.
+        :param int max_queue: Callers allowed to wait for a slot, others are rejected at once.
+        :param float queue_timeout: Seconds a caller waits for a slot before being rejected.
+        """
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._condition = threading.Condition()
+        self.active = 0
+        self.queued = 0
+        self.rejected = 0
+
+    def __enter__(self):
+        with self._condition:
+            if self.active >= self.max_concurrent:
+                if self.queued >= self.max_queue:
+                    self.rejected += 1
+                    raise UpstreamUnavailable('Too many concurrent Twilio requests, try again later.', wait=1)
+                self.queued += 1
+                try:
+                    acquired = self._condition.wait_for(lambda: self.active < self.max_concurrent, self.queue_timeout)
+                finally:
+                    self.queued -= 1
+                if not acquired:
+                    self.rejected += 1
+                    raise UpstreamUnavailable('Too many concurrent Twilio requests, try again later.', wait=1)
+            self.active += 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        with self._condition:
+            self.active -= 1
+            self._condition.notify()
+        return False
+
+
+class CircuitBreaker(object):
+    """
+    Stop calling upstream after `failure_threshold` consecutive failures, for `reset_timeout` seconds.
+
+    Afterwards a single trial call is let through: its success closes the circuit again,
+    its failure opens it for another `reset_timeout` seconds.
+    """
+
+    def __init__(self, failure_threshold, reset_timeout=30.0, timer=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._timer = timer
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.rejected = 0
+        self.opened = 0
+
+    def before_call(self):
+        """
+        :raises UpstreamUnavailable: while the circuit is open, or a trial call is in flight.
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            remaining = self.opened_at + self.reset_timeout - self._timer()
+            if self.state == OPEN and remaining <= 0:
+                self.state = HALF_OPEN
+                return
+            self.rejected += 1
+        raise UpstreamUnavailable(wait=max(1, math.ceil(remaining)))
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+
+    def abort_trial(self):
+        """
+        Let the next caller make the trial call, when the current one did not reach upstream.
+        """
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self.state = OPEN
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.opened += 1
+                self.state = OPEN
+                self.opened_at = self._timer()
+
+
+def is_upstream_failure(error):
+    """
+    Tell whether an error means Twilio is failing, rather than the request being refused.
+
+    :param Exception error: Error raised by the Twilio client.
+    :rtype: bool
+    """
+    if isinstance(error, TwilioRestException):
+        return error.status >= 500 or error.status == status.HTTP_429_TOO_MANY_REQUESTS
+    # Timeouts and connection errors.
+    return isinstance(error, RequestException)
+
+
+class RetryPolicy(object):
+    """
+    Retry calls failing with a transient Twilio error, with exponential backoff and full jitter.
+
+    A `Retry-After` given by Twilio is waited for instead, plus some jitter. No retry starts
+    once it would end past `deadline` seconds after the first attempt.
+    """
+
+    def __init__(self, max_attempts=3, base_delay=0.1, max_delay=2.0, deadline=5.0, statuses=(429, 503),
+                 timer=time.monotonic, sleep=time.sleep, random=random.random):
+        """
+        :param int max_attempts: Attempts made at most, including the first one.
+        :param float base_delay: Upper bound of the first backoff, doubled on each retry, in seconds.
+        :param float max_delay: Upper bound of any backoff, in seconds.
+        :param float deadline: Time budget of all attempts, in seconds.
+        :param tuple statuses: HTTP statuses of the Twilio errors to retry.
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.statuses = frozenset(statuses)
+        self._timer = timer
+        self._sleep = sleep
+        self._random = random
+        self._lock = threading.Lock()
+        self.retries = {}
+        self.exhausted = {}
+        self.recovered = 0
+
+    def delay(self, attempt, retry_after=None):
+        """
+        Return the seconds to wait before the retry following `attempt`.
+
+        :param int attempt: Number of attempts made so far.
+        :param float retry_after: Delay requested by Twilio, if any.
+        :rtype: float
+        """
+        if retry_after is not None:
+            return retry_after + self._random() * self.base_delay
+        return self._random() * min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+
+    def call(self, fn, retry_after=None):
+        """
+        Call `fn`, retrying it on retryable Twilio errors.
+
+        :param callable fn: Function calling the Twilio API.
+        :param callable retry_after: Function returning the `Retry-After` of the last response, or None.
+        :returns: Result of `fn`.
+        """
+        started = self._timer()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                result = fn()
+            except TwilioRestException as e:
+                if e.status not in self.statuses:
+                    raise
+                code = e.code or e.status
+                delay = self.delay(attempt, retry_after() if retry_after is not None else None)
+                if attempt >= self.max_attempts or self._timer() - started + delay > self.deadline:
+                    self._count(self.exhausted, code)
+                    raise
+                self._count(self.retries, code)
+                self._sleep(delay)
+                continue
+
+            if attempt > 1:
+                with self._lock:
+                    self.recovered += 1
+            return result
+
+    def _count(self, counters, code):
+        with self._lock:
+            counters[code] = counters.get(code, 0) + 1
+
+
+class UpstreamGuard(object):
+    """
+    Retries, bulkhead and circuit breaker around the Twilio room API calls.
+
+    Retries are enabled through `TWILIO_ROOM_RETRY_MAX_ATTEMPTS`, the bulkhead through
+    `TWILIO_ROOM_MAX_CONCURRENCY`, and the circuit breaker through `TWILIO_ROOM_BREAKER_THRESHOLD`.
+    Every attempt goes through the bulkhead and the breaker, waiting for a retry does not
+    hold a bulkhead slot.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._built = False
+        self.bulkhead = None
+        self.breaker = None
+        self.retry = None
+
+    def build(self):
+        if self._built:
+            return
+        with self._lock:
+            if self._built:
+                return
+            max_concurrent = get_setting('TWILIO_ROOM_MAX_CONCURRENCY')
+            if max_concurrent:
+                self.bulkhead = Bulkhead(max_concurrent, max_queue=get_setting('TWILIO_ROOM_MAX_QUEUE'),
+                                         queue_timeout=get_setting('TWILIO_ROOM_QUEUE_TIMEOUT'))
+            threshold = get_setting('TWILIO_ROOM_BREAKER_THRESHOLD')
+            if threshold:
+                self.breaker = CircuitBreaker(threshold, reset_timeout=get_setting('TWILIO_ROOM_BREAKER_RESET_TIMEOUT'))
+            max_attempts = get_setting('TWILIO_ROOM_RETRY_MAX_ATTEMPTS')
+            if max_attempts > 1:
+                self.retry = RetryPolicy(max_attempts, base_delay=get_setting('TWILIO_ROOM_RETRY_BASE_DELAY'),
+                                         max_delay=get_setting('TWILIO_ROOM_RETRY_MAX_DELAY'),
+                                         deadline=get_setting('TWILIO_ROOM_RETRY_DEADLINE'),
+                                         statuses=get_setting('TWILIO_ROOM_RETRY_STATUSES'))
+            self._built = True
+
+    def call(self, fn, retry_after=None):
+        """
+        Call `fn` unless Twilio is overloaded or failing, retrying transient errors.
+
+        :param callable fn: Function calling the Twilio API.
+        :param callable retry_after: Function returning the `Retry-After` of the last response, or None.
+        :returns: Result of `fn`.
+        :raises UpstreamUnavailable: when the call is rejected.
+        """
+        self.build()
+        retry = self.retry
+        if retry is not None:
+            return retry.call(lambda: self._call_once(fn), retry_after)
+        return self._call_once(fn)
+
+    def _call_once(self, fn):
+        breaker, bulkhead = self.breaker, self.bulkhead
+        if breaker is not None:
+            breaker.before_call()
+
+        try:
+            if bulkhead is not None:
+                with bulkhead:
+                    result = fn()
+            else:
+                result = fn()
+        except Exception as e:
+            if breaker is not None:
+                if is_upstream_failure(e):
+                    breaker.record_failure()
+                elif isinstance(e, UpstreamUnavailable):
+                    breaker.abort_trial()
+                else:
+                    breaker.record_success()
+            raise
+        if breaker is not None:
+            breaker.record_success()
+        return result
+
+    def stats(self):
+        """
+        Return the queue depth, rejections and breaker state.
+
+        :rtype: dict
+        """
+        self.build()
+        stats = {}
+        if self.bulkhead is not None:
+            stats.update(active=self.bulkhead.active, queued=self.bulkhead.queued,
+                         bulkhead_rejected=self.bulkhead.rejected)
+        if self.breaker is not None:
+            stats.update(breaker_state=self.breaker.state, breaker_failures=self.breaker.failures,
+                         breaker_opened=self.breaker.opened, breaker_rejected=self.breaker.rejected)
+        if self.retry is not None:
+            stats.update(retries=dict(self.retry.retries), retries_exhausted=dict(self.retry.exhausted),
+                         retries_recovered=self.retry.recovered)
+        return stats
+
+    def reset(self):
+        with self._lock:
+            self._built = False
+            self.bulkhead = None
+            self.breaker = None
+            self.retry = None
+
+
+room_guard = UpstreamGuard()
+
+
+@receiver(setting_changed)
+def _reset_room_guard(setting, **kwargs):
+    if setting.startswith(('TWILIO_ROOM_MAX_', 'TWILIO_ROOM_BREAKER_', 'TWILIO_ROOM_RETRY_')) \
+            or setting == 'TWILIO_ROOM_QUEUE_TIMEOUT':
+        room_guard.reset()
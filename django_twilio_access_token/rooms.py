@@ -0,0 +1,230 @@
+import bisect
+import threading
+from collections import namedtuple
+
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from django_twilio_access_token.cache import LRUCache
+from django_twilio_access_token.conf import get_setting
+from django_twilio_access_token.singleflight import SingleFlight
+
+RoomRecord = namedtuple('RoomRecord', ['sid', 'unique_name'])
+RoomRecord.__doc__ = 'Locally known Twilio room, serializable by `RoomSerializer`.'
+
+IndexedRoom = namedtuple('IndexedRoom', ['sid', 'unique_name', 'status', 'type', 'account_sid', 'seq'])
+IndexedRoom.__doc__ = 'Room of the room index, `seq` orders rooms by the time they were indexed.'
+
+
+class RoomCache(object):
+    """
+    Idempotency layer of room creation keyed by room name, enabled through `TWILIO_ROOM_CACHE_ENABLED`.
+
+    Concurrent creations of the same room share a single upstream call, and the created room
+    is answered locally for `TWILIO_ROOM_CACHE_TTL` seconds afterwards.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = None
+        self.flight = SingleFlight()
+
+    @property
+    def local(self):
+        if self._local is None:
+            with self._lock:
+                if self._local is None:
+                    self._local = LRUCache(max_size=get_setting('TWILIO_ROOM_CACHE_MAX_SIZE'))
+        return self._local
+
+    def get_or_create(self, room_name, create, account_sid=None):
+        """
+        Return the room named `room_name`, calling `create` only if it is neither cached nor being created.
+
+        :param str room_name: Unique name of the room.
+        :param callable create: Function creating the room upstream, returning a Twilio room instance.
+        :param str account_sid: Twilio account owning the room, room names are unique per account.
+        :rtype: RoomRecord
+        """
+        if not get_setting('TWILIO_ROOM_CACHE_ENABLED'):
+            return create()
+
+        key = (account_sid, room_name)
+        room = self.local.get(key)
+        if room is not None:
+            return room
+
+        return self.flight.do(key, lambda: self._create(key, create))
+
+    def _create(self, key, create):
+        # A concurrent creation may have completed since the lookup of the caller.
+        room = self.local.get(key)
+        if room is not None:
+            return room
+
+        instance = create()
+        room = RoomRecord(sid=instance.sid, unique_name=instance.unique_name)
+        self.local.set(key, room, get_setting('TWILIO_ROOM_CACHE_TTL'))
+        return room
+
+    def forget(self, room_name, account_sid=None):
+        """
+        Drop a room from the cache, e.g. once it has ended.
+        """
+        self.local.delete((account_sid, room_name))
+
+    def clear(self):
+        with self._lock:
+            self._local = None
+
+
+room_cache = RoomCache()
+
+
+class RoomIndex(object):
+    """
+    Rooms created by this service, looked up by sid or unique name without calling Twilio.
+
+    Rooms are indexed once created, their status is kept current from the Twilio status callbacks,
+    and the `TWILIO_ROOM_INDEX_MAX_SIZE` most recently indexed rooms are kept.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._seq = 0
+            # Sequence numbers in increasing order, the listing order. Evicted ones are those before
+            # `_head`, and are dropped in batches rather than shifting the list for every eviction.
+            self._order = []
+            self._head = 0
+            self._by_seq = {}
+            self._by_sid = {}
+            self._by_name = {}
+
+    def add(self, account_sid, sid, unique_name, status=None, room_type=None):
+        """
+        Index a room, or update it when already indexed.
+
+        :param str account_sid: Twilio account owning the room.
+        :param str sid: Room sid.
+        :param str unique_name: Room unique name.
+        :param str status: Room status, e.g. `in-progress` or `completed`.
+        :param str room_type: Room type, e.g. `group`.
+        :rtype: IndexedRoom
+        """
+        max_size = get_setting('TWILIO_ROOM_INDEX_MAX_SIZE')
+        with self._lock:
+            room = self._by_sid.get((account_sid, sid))
+            if room is not None:
+                room = room._replace(unique_name=unique_name or room.unique_name, status=status or room.status,
+                                     type=room_type or room.type)
+            else:
+                if not max_size:
+                    return None
+                self._seq += 1
+                room = IndexedRoom(sid, unique_name, status, room_type, account_sid, self._seq)
+                self._order.append(room.seq)
+            self._store(room)
+
+            while len(self._order) - self._head > max_size:
+                self._evict(self._order[self._head])
+                self._head += 1
+            if self._head > len(self._order) // 2:
+                del self._order[:self._head]
+                self._head = 0
+        return room
+
+    def add_instance(self, account_sid, instance, room_type=None):
+        """
+        Index a Twilio room instance.
+
+        :param str account_sid: Twilio account owning the room.
+        :param twilio.rest.video.v1.room.RoomInstance instance: Twilio room instance, or a `RoomRecord`.
+        :param str room_type: Room type, when the instance does not tell.
+        :rtype: IndexedRoom
+        """
+        return self.add(account_sid, instance.sid, instance.unique_name, status=getattr(instance, 'status', None),
+                        room_type=getattr(instance, 'type', None) or room_type)
+
+    def update_status(self, account_sid, sid, status):
+        """
+        Update the status of an indexed room, e.g. from a status callback. Unknown rooms are ignored.
+
+        :rtype: IndexedRoom
+        """
+        with self._lock:
+            room = self._by_sid.get((account_sid, sid))
+            if room is None:
+                return None
+            room = room._replace(status=status)
+            self._store(room)
+        return room
+
+    def get(self, account_sid, sid_or_name):
+        """
+        :param str account_sid: Twilio account owning the room.
+        :param str sid_or_name: Room sid, or unique name of its most recently indexed room.
+        :returns: The room, or None when not indexed.
+        :rtype: IndexedRoom
+        """
+        with self._lock:
+            return self._by_sid.get((account_sid, sid_or_name)) or self._by_name.get((account_sid, sid_or_name))
+
+    def page(self, account_sid, limit, before=None, status=None, room_type=None):
+        """
+        Return a page of indexed rooms, most recently indexed first. Rooms are read one
+        page at a time, the index is never copied.
+
+        :param str account_sid: Twilio account owning the rooms.
+        :param int limit: Maximum number of rooms.
+        :param int before: Cursor, only rooms indexed before the room of that `seq` are returned.
+        :param str status: Only return rooms with that status.
+        :param str room_type: Only return rooms of that type.
+        :returns: The rooms, and the cursor of the next page or None on the last page.
+        :rtype: tuple
+        """
+        rooms = []
+        with self._lock:
+            position = len(self._order) if before is None else bisect.bisect_left(self._order, before, lo=self._head)
+            while position > self._head:
+                position -= 1
+                room = self._by_seq[self._order[position]]
+                if room.account_sid != account_sid or (status and room.status != status) \
+                        or (room_type and room.type != room_type):
+                    continue
+                if len(rooms) == limit:
+                    return rooms, rooms[-1].seq
+                rooms.append(room)
+        return rooms, None
+
+    def _store(self, room):
+        self._by_seq[room.seq] = room
+        self._by_sid[(room.account_sid, room.sid)] = room
+        name_key = (room.account_sid, room.unique_name)
+        current = self._by_name.get(name_key)
+        if current is None or current.seq <= room.seq:
+            self._by_name[name_key] = room
+
+    def _evict(self, seq):
+        room = self._by_seq.pop(seq)
+        self._by_sid.pop((room.account_sid, room.sid), None)
+        name_key = (room.account_sid, room.unique_name)
+        if self._by_name.get(name_key) is not None and self._by_name[name_key].seq == seq:
+            del self._by_name[name_key]
+
+    def __len__(self):
+        return len(self._order) - self._head
+
+
+room_index = RoomIndex()
+
+
+@receiver(setting_changed)
+def _reset_room_cache(setting, **kwargs):
+    if setting.startswith('TWILIO_ROOM_CACHE_'):
+        room_cache.clear()
+    if setting.startswith('TWILIO_ROOM_INDEX_'):
+        room_index.clear()
@@ -1,10 +1,27 @@
-from .twilio_access_token_serializer import VideoTokenDeserializer, TokenSerializer
-from .twilio_room_serializer import GroupRoomDeserializer, PeerToPeerRoomDeserializer, RoomSerializer
+from .twilio_access_token_serializer import (
+    AccessTokenDeserializer, BatchTokenSerializer, BatchVideoTokenDeserializer, ChatTokenDeserializer,
+    SyncTokenDeserializer, VideoTokenDeserializer, VoiceTokenDeserializer, TokenSerializer
+)
+from .twilio_room_serializer import (
+    AllocateRoomDeserializer, BulkRoomDeserializer, BulkRoomSerializer, GroupRoomDeserializer, PeerToPeerRoomDeserializer,
+    RoomDetailSerializer, RoomListDeserializer, RoomSerializer
+)
 
 __all__ = [
     'TokenSerializer',
+    'BatchTokenSerializer',
+    'BatchVideoTokenDeserializer',
     'VideoTokenDeserializer',
+    'ChatTokenDeserializer',
+    'VoiceTokenDeserializer',
+    'SyncTokenDeserializer',
+    'AccessTokenDeserializer',
     'GroupRoomDeserializer',
     'PeerToPeerRoomDeserializer',
-    'RoomSerializer'
+    'RoomSerializer',
+    'BulkRoomSerializer',
+    'BulkRoomDeserializer',
+    'AllocateRoomDeserializer',
+    'RoomDetailSerializer',
+    'RoomListDeserializer'
 ]
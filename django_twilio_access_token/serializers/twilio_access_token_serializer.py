@@ -1,7 +1,16 @@
-from django.conf import settings
+import json
+
+from django.core.exceptions import ImproperlyConfigured
 from rest_framework import serializers
-from twilio.jwt.access_token import AccessToken
-from twilio.jwt.access_token.grants import VideoGrant
+from rest_framework.exceptions import Throttled, ValidationError
+from twilio.jwt.access_token.grants import ChatGrant, SyncGrant, VideoGrant, VoiceGrant
+
+from django_twilio_access_token.cache import token_cache
+from django_twilio_access_token.conf import get_setting
+from django_twilio_access_token.instrumentation import TOKEN_CREATE, TOKEN_SIGN, TOKEN_VALIDATE, instrument
+from django_twilio_access_token.credentials import get_signing_context_for
+from django_twilio_access_token.ratelimit import token_rate_limiter
+from django_twilio_access_token.signing import PreparedAccessToken
 
 
 class TokenSerializer(serializers.Serializer):
@@ -9,9 +18,24 @@ class TokenSerializer(serializers.Serializer):
         """
         Convert access token instance into expected response.
 
-        :param twilio.jwt.access_token.AccessToken instance: Twilio access token instance.
+        :param django_twilio_access_token.signing.PreparedAccessToken instance: Twilio access token instance.
+        """
+        with instrument(TOKEN_SIGN):
+            return {'token': token_cache.get_jwt(instance)}
+
+
+class BatchTokenSerializer(serializers.Serializer):
+    def to_representation(self, instance):
+        """
+        Convert a batch of access token instances into expected response.
+
+        :param list instance: Pairs of Twilio access token instance and error details, in input order.
+                              Only one of both is set for a given entry.
         """
-        return {'token': instance.to_jwt()}
+        with instrument(TOKEN_SIGN, batch_size=len(instance)):
+            return {
+                'tokens': [{'errors': errors} if errors else {'token': token_cache.get_jwt(token)} for token, errors in instance]
+            }
 
 
 class BaseTokenDeserializer(serializers.Serializer):
@@ -22,6 +46,32 @@ class BaseTokenDeserializer(serializers.Serializer):
     identity = serializers.CharField(default=None)
     valid_until = serializers.DateTimeField(default=None)
 
+    def run_validation(self, data=serializers.empty):
+        with instrument(TOKEN_VALIDATE):
+            return super().run_validation(data)
+
+    def get_grants(self, validated_data):
+        """
+        :param dict validated_data: Validated data.
+        :returns: Grants of the access token.
+        :rtype: list
+        """
+        raise NotImplementedError('`get_grants()` must be implemented.')
+
+    def create(self, validated_data):
+        """
+        Create access token instance.
+
+        :param dict validated_data: Validated data.
+        :returns: Twilio access token instance
+        :rtype: django_twilio_access_token.signing.PreparedAccessToken
+        :raises rest_framework.exceptions.Throttled: when the request is over a `TWILIO_TOKEN_RATE_LIMITS` limit.
+        """
+        token_rate_limiter.check(self.context.get('request'), validated_data)
+        with instrument(TOKEN_CREATE):
+            return create_token(self.get_grants(validated_data), validated_data,
+                                get_signing_context_for(self.context.get('request')))
+
 
 class VideoTokenDeserializer(BaseTokenDeserializer):
     """
@@ -29,21 +79,277 @@ class VideoTokenDeserializer(BaseTokenDeserializer):
     """
     room_name = serializers.CharField()
 
+    def get_grants(self, validated_data):
+        return [video_grant(validated_data)]
+
+
+class ChatTokenDeserializer(BaseTokenDeserializer):
+    """
+    Deserializer that can validate incoming data from twilio chat token api.
+    """
+    identity = serializers.CharField()
+
+    def get_grants(self, validated_data):
+        return [chat_grant(validated_data)]
+
+
+class VoiceTokenDeserializer(BaseTokenDeserializer):
+    """
+    Deserializer that can validate incoming data from twilio voice token api.
+    """
+    identity = serializers.CharField()
+    incoming_allow = serializers.BooleanField(default=False)
+
+    def get_grants(self, validated_data):
+        return [voice_grant(validated_data)]
+
+
+class SyncTokenDeserializer(BaseTokenDeserializer):
+    """
+    Deserializer that can validate incoming data from twilio sync token api.
+    """
+    identity = serializers.CharField()
+
+    def get_grants(self, validated_data):
+        return [sync_grant(validated_data)]
+
+
+class VideoGrantDeserializer(serializers.Serializer):
+    room_name = serializers.CharField()
+
+
+class VoiceGrantDeserializer(serializers.Serializer):
+    incoming_allow = serializers.BooleanField(default=False)
+
+
+class EmptyGrantDeserializer(serializers.Serializer):
+    """
+    Grant configured by the project settings only, requested with an empty object.
+    """
+
+
+class AccessTokenDeserializer(BaseTokenDeserializer):
+    """
+    Deserializer that can validate a request of one access token holding several grants, e.g.
+    `{"identity": "alice", "video": {"room_name": "my-room"}, "chat": {}}`.
+    """
+    GRANTS = ('video', 'chat', 'voice', 'sync')
+    video = VideoGrantDeserializer(required=False)
+    chat = EmptyGrantDeserializer(required=False)
+    voice = VoiceGrantDeserializer(required=False)
+    sync = EmptyGrantDeserializer(required=False)
+
+    def validate(self, attrs):
+        if not any(grant in attrs for grant in self.GRANTS):
+            raise serializers.ValidationError(
+                'At least one of the {} grants is required.'.format(', '.join(self.GRANTS)), code='required')
+        if not attrs['identity'] and any(grant in attrs for grant in ('chat', 'voice', 'sync')):
+            raise serializers.ValidationError(
+                {'identity': 'This field is required for chat, voice and sync grants.'}, code='required')
+        return attrs
+
+    def get_grants(self, validated_data):
+        return [GRANT_BUILDERS[grant](validated_data[grant]) for grant in self.GRANTS if grant in validated_data]
+
+
+class BatchVideoTokenDeserializer(serializers.Serializer):
+    """
+    Deserializer that can validate a batch of video token requests at once.
+
+    Each entry is validated as a `VideoTokenDeserializer` payload. Invalid entries are reported
+    individually instead of failing the whole batch.
+    """
+    tokens = serializers.ListField(allow_empty=False)
+
+    def validate_tokens(self, value):
+        max_size = get_setting('TWILIO_TOKEN_BATCH_MAX_SIZE')
+        if len(value) > max_size:
+            raise serializers.ValidationError(
+                'Ensure this field has no more than {} elements.'.format(max_size), code='max_length')
+
+        entries = []
+        for item in value:
+            deserializer = VideoTokenDeserializer(data=item)
+            if deserializer.is_valid():
+                entries.append((deserializer.validated_data, None))
+            else:
+                entries.append((None, deserializer.errors))
+        return entries
+
     def create(self, validated_data):
         """
-        Create access token instance for Twilio Video.
+        Create access token instances for every valid entry, sharing the signing setup.
+        Each valid entry counts against `TWILIO_TOKEN_RATE_LIMITS`, entries over a limit are
+        reported as errors.
 
         :param dict validated_data: Validated data.
-        :returns: Twilio access token instance
-        :rtype: twilio.jwt.access_token.AccessToken
+        :returns: Pairs of Twilio access token instance and error details, in input order.
+        :rtype: list
         """
-        twilio_token = AccessToken(
-            account_sid=settings.TWILIO_ACCOUNT_SID, signing_key_sid=settings.TWILIO_VIDEO_API_KEY_SID,
-            secret=settings.TWILIO_VIDEO_API_KEY_SECRET, valid_until=validated_data['valid_until'])
-        twilio_token.identity = validated_data['identity']
+        request = self.context.get('request')
+        context = get_signing_context_for(request)
+
+        entries = []
+        for data, errors in validated_data['tokens']:
+            errors = errors or rate_limit_errors(request, data)
+            entries.append((None, errors) if errors else (create_video_token(data, context), None))
+        return entries
+
+
+def create_token(grants, validated_data, context):
+    """
+    Create access token instance holding `grants`, the minting core of every token deserializer.
+
+    :param list grants: `twilio.jwt.access_token.AccessTokenGrant` instances.
+    :param dict validated_data: Data validated by a `BaseTokenDeserializer`.
+    :param django_twilio_access_token.signing.SigningContext context: Signing context of the account.
+    :rtype: django_twilio_access_token.signing.PreparedAccessToken
+    """
+    return PreparedAccessToken(
+        context, grants, identity=validated_data['identity'], valid_until=validated_data['valid_until'])
+
+
+def rate_limit_errors(request, validated_data):
+    """
+    Count one entry of a batch or a stream of token requests against `TWILIO_TOKEN_RATE_LIMITS`.
+
+    :param request: Incoming request, or None.
+    :param dict validated_data: Data validated by `VideoTokenDeserializer`.
+    :returns: Error details of the entry when it is over a limit, otherwise None.
+    :rtype: dict
+    """
+    try:
+        token_rate_limiter.check(request, validated_data)
+    except Throttled as e:
+        return {'non_field_errors': [e.detail]}
+    return None
+
+
+def create_video_token(validated_data, context):
+    """
+    Create access token instance for Twilio Video.
+
+    :param dict validated_data: Data validated by `VideoTokenDeserializer`.
+    :param django_twilio_access_token.signing.SigningContext context: Signing context of the account.
+    :rtype: django_twilio_access_token.signing.PreparedAccessToken
+    """
+    return create_token([video_grant(validated_data)], validated_data, context)
+
+
+def video_grant(data):
+    """
+    :param dict data: Validated data with the `room_name` to grant access to.
+    :rtype: twilio.jwt.access_token.grants.VideoGrant
+    """
+    return VideoGrant(room=data['room_name'])
+
+
+def chat_grant(data):
+    """
+    :param dict data: Validated data, the grant is configured by the project settings.
+    :rtype: twilio.jwt.access_token.grants.ChatGrant
+    """
+    service_sid = get_setting('TWILIO_CHAT_SERVICE_SID')
+    if not service_sid:
+        raise ImproperlyConfigured('Chat tokens require the TWILIO_CHAT_SERVICE_SID setting.')
+    return ChatGrant(service_sid=service_sid, push_credential_sid=get_setting('TWILIO_CHAT_PUSH_CREDENTIAL_SID'))
+
+
+def voice_grant(data):
+    """
+    :param dict data: Validated data with `incoming_allow`, whether the identity can receive calls.
+    :rtype: twilio.jwt.access_token.grants.VoiceGrant
+    """
+    return VoiceGrant(incoming_allow=data['incoming_allow'] or None,
+                      outgoing_application_sid=get_setting('TWILIO_VOICE_OUTGOING_APPLICATION_SID'),
+                      push_credential_sid=get_setting('TWILIO_VOICE_PUSH_CREDENTIAL_SID'))
+
+
+def sync_grant(data):
+    """
+    :param dict data: Validated data, the grant is configured by the project settings.
+    :rtype: twilio.jwt.access_token.grants.SyncGrant
+    """
+    # Without service, Sync uses the default service of the account.
+    return SyncGrant(service_sid=get_setting('TWILIO_SYNC_SERVICE_SID'))
+
+
+GRANT_BUILDERS = {'video': video_grant, 'chat': chat_grant, 'voice': voice_grant, 'sync': sync_grant}
+
+
+# Parses `valid_until` exactly like `BaseTokenDeserializer.valid_until`, built once.
+_VALID_UNTIL_FIELD = serializers.DateTimeField()
+
+
+def _clean_string(value):
+    """
+    Return `value` cleaned like a required, non-blank DRF `CharField`, or None when it
+    is anything but a plain string DRF would accept unchanged.
+    """
+    if type(value) is not str or '\x00' in value:
+        return None
+    value = value.strip()
+    return value or None
+
+
+def fast_validate_video_token(data):
+    """
+    Precompiled validation of a video token payload, equivalent to `VideoTokenDeserializer`
+    on the common, valid input without the serializer machinery.
+
+    It returns None whenever the payload is not plainly valid, including inputs DRF would
+    coerce, such as numbers used as room name; `VideoTokenDeserializer` then has the
+    final say and builds the exact error details.
+
+    :param data: Parsed request payload.
+    :returns: Validated data, or None.
+    :rtype: dict
+    """
+    if type(data) is not dict:
+        return None
+
+    room_name = _clean_string(data.get('room_name'))
+    if room_name is None:
+        return None
+
+    identity = data.get('identity')
+    if 'identity' in data:
+        identity = _clean_string(identity)
+        if identity is None:
+            return None
+
+    valid_until = data.get('valid_until')
+    if 'valid_until' in data:
+        if type(valid_until) is not str:
+            return None
+        try:
+            valid_until = _VALID_UNTIL_FIELD.to_internal_value(valid_until)
+        except ValidationError:
+            return None
+
+    return {'room_name': room_name, 'identity': identity, 'valid_until': valid_until}
+
+
+def validate_video_token_line(line):
+    """
+    Validate one line of an NDJSON roster of video token requests, each line being a
+    `VideoTokenDeserializer` payload.
+
+    :param bytes line: JSON payload.
+    :returns: Pair of validated data and error details, only one of both being set.
+    :rtype: tuple
+    """
+    try:
+        data = json.loads(line)
+    except ValueError:
+        return None, {'non_field_errors': ['Invalid JSON.']}
 
-        # grant access to the room
-        video_grant = VideoGrant(room=validated_data['room_name'])
-        twilio_token.add_grant(video_grant)
+    validated_data = fast_validate_video_token(data)
+    if validated_data is not None:
+        return validated_data, None
 
-        return twilio_token
+    # DRF has the final say and builds the error details.
+    deserializer = VideoTokenDeserializer(data=data)
+    if not deserializer.is_valid():
+        return None, deserializer.errors
+    return deserializer.validated_data, None
@@ -1,9 +1,78 @@
-from django.conf import settings
+from concurrent.futures import ThreadPoolExecutor
+
 from django.core.exceptions import ImproperlyConfigured
 from rest_framework import serializers
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import APIException, NotFound, ValidationError
 from twilio.base.exceptions import TwilioException, TwilioRestException
-from twilio.rest import Client
+
+from django_twilio_access_token.clients import last_retry_after
+from django_twilio_access_token.conf import get_setting
+from django_twilio_access_token.credentials import credential_registry, get_client_for
+from django_twilio_access_token.instrumentation import ROOM_CLIENT, ROOM_CREATE, ROOM_FETCH, ROOM_VALIDATE, instrument
+from django_twilio_access_token.pool import ROOM_TYPES, new_room_name, room_pool
+from django_twilio_access_token.resilience import room_guard
+from django_twilio_access_token.rooms import room_cache, room_index
+from django_twilio_access_token.validation import CompiledValidation
+
+# Twilio error returned when an in-progress room with the same unique name already exists.
+ROOM_EXISTS_ERROR_CODE = 53113
+
+
+def twilio_validation_error(e):
+    """
+    TwilioRestException arise when the Twilio Client attempt to create a Room
+    apart from that a Twilio-specific error code is not available for all errors
+    @see https://github.com/twilio/twilio-python/blob/709b772c187043c4120bb5c2be3d629d549e792b/twilio/base/exceptions.py#L11-L19
+
+    :param twilio.base.exceptions.TwilioRestException e: Error raised by the Twilio client.
+    :rtype: rest_framework.exceptions.ValidationError
+    """
+    detail = {'twilio_err_code': 'unknown' if e.code is None else e.code, 'twilio_err_msg': e.msg}
+    return ValidationError(detail=detail, code='invalid')
+
+
+def get_room_client(request):
+    """
+    Return the Twilio REST client of the account of `request`.
+
+    :param request: Incoming request, or None for the account of the project settings.
+    :rtype: twilio.rest.Client
+    """
+    try:
+        with instrument(ROOM_CLIENT):
+            return get_client_for(request)
+    except TwilioException as e:
+        """TwilioException arise when username and password is not provided"""
+        raise ImproperlyConfigured(str(e))
+
+
+def retrieve_room(request, sid_or_name):
+    """
+    Return a room from the room index, fetching it from Twilio when not indexed.
+
+    Rooms fetched from Twilio are only indexed once completed, the status of other rooms
+    is only kept current for the rooms created by this service.
+
+    :param request: Incoming request.
+    :param str sid_or_name: Room sid or unique name.
+    :rtype: django_twilio_access_token.rooms.IndexedRoom or twilio.rest.video.v1.room.RoomInstance
+    :raises rest_framework.exceptions.NotFound: when the room does not exist.
+    """
+    client = get_room_client(request)
+    room = room_index.get(client.account_sid, sid_or_name)
+    if room is not None:
+        return room
+
+    try:
+        with instrument(ROOM_FETCH):
+            instance = room_guard.call(client.video.rooms(sid_or_name).fetch, retry_after=lambda: last_retry_after(client))
+    except TwilioRestException as e:
+        if e.status == 404:
+            raise NotFound('Unknown room.')
+        raise twilio_validation_error(e)
+    if instance.status == 'completed':
+        room_index.add_instance(client.account_sid, instance)
+    return instance
 
 
 class RoomSerializer(serializers.Serializer):
@@ -11,47 +80,126 @@ class RoomSerializer(serializers.Serializer):
         """
         Convert room instance into expected response.
 
-        :param twilio.rest.video.v1.room.RoomInstance instance: Twilio Room instance.
+        :param twilio.rest.video.v1.room.RoomInstance instance: Twilio Room instance
+                                                                 or `django_twilio_access_token.rooms.RoomRecord`.
         """
         return {'room_name': instance.unique_name, 'sid': instance.sid}
 
 
+class RoomDetailSerializer(serializers.Serializer):
+    def to_representation(self, instance):
+        """
+        Convert room instance into expected response, with its status and type.
+
+        :param django_twilio_access_token.rooms.IndexedRoom instance: Indexed room,
+                                                                       or Twilio room instance.
+        """
+        return {'room_name': instance.unique_name, 'sid': instance.sid, 'status': instance.status, 'type': instance.type}
+
+
+class BulkRoomSerializer(serializers.Serializer):
+    def to_representation(self, instance):
+        """
+        Convert a bulk of room instances into expected response.
+
+        :param list instance: Pairs of Twilio room instance and error details, in input order.
+                              Only one of both is set for a given entry.
+        """
+        room_serializer = RoomSerializer()
+        return {
+            'rooms': [{'errors': errors} if errors else room_serializer.to_representation(room) for room, errors in instance]
+        }
+
+
 class BaseRoomDeserializer(serializers.Serializer):
     """
     Base room deserializer must be applied on each derivative class
     of the particular Twilio room serializer.
+
+    With `TWILIO_ROOM_COMPILED_VALIDATION` set, payloads are first validated by the validation
+    plan compiled for the class on its first use, see `django_twilio_access_token.validation`.
     """
     status_callback = serializers.URLField(default=None)
     room_name = serializers.CharField(min_length=34, max_length=34)
 
+    @classmethod
+    def get_compiled_validation(cls):
+        """
+        :returns: The validation plan of the class, compiled once, or None when it is not compilable.
+        :rtype: django_twilio_access_token.validation.CompiledValidation
+        """
+        # Looked up on the class itself, subclasses have plans of their own.
+        if '_compiled_validation' not in cls.__dict__:
+            cls._compiled_validation = CompiledValidation.compile(cls)
+        return cls._compiled_validation
+
+    def run_validation(self, data=serializers.empty):
+        with instrument(ROOM_VALIDATE):
+            if not self.partial and get_setting('TWILIO_ROOM_COMPILED_VALIDATION'):
+                compiled_validation = self.get_compiled_validation()
+                validated_data = compiled_validation.validate(data) if compiled_validation is not None else None
+                if validated_data is not None:
+                    return validated_data
+            return super().run_validation(data)
+
     def create(self, validated_data):
         """
         Create Twilio room instance.
 
         :param dict validated_data: Validated data.
-        :returns: Twilio room instance
+        :returns: Twilio room instance, or the locally known room when `TWILIO_ROOM_CACHE_ENABLED` is set
+        :rtype: twilio.rest.video.v1.room.RoomInstance
+        """
+        client = self.get_client()
+        room_name = validated_data.pop('room_name')
+        return room_cache.get_or_create(room_name, lambda: self.create_room(client, room_name, validated_data),
+                                        account_sid=client.account_sid)
+
+    def get_client(self):
+        """
+        Return the Twilio REST client of the account of the request.
+
+        :rtype: twilio.rest.Client
+        """
+        return get_room_client(self.context.get('request'))
+
+    def create_room(self, client, room_name, params):
+        """
+        Create Twilio room instance upstream.
+
+        :param twilio.rest.Client client: Twilio REST client.
+        :param str room_name: Unique name of the room.
+        :param dict params: Other room parameters.
         :rtype: twilio.rest.video.v1.room.RoomInstance
         """
         try:
-            client = Client(account_sid=settings.TWILIO_ACCOUNT_SID,
-                            username=settings.TWILIO_ACCOUNT_SID,
-                            password=settings.TWILIO_AUTH_TOKEN)
-        except TwilioException as e:
-            """TwilioException arise when username and password is not provided"""
-            raise ImproperlyConfigured(str(e))
+            with instrument(ROOM_CREATE, room_type=params.get('type')):
+                room = room_guard.call(lambda: client.video.rooms.create(**params, unique_name=room_name),
+                                       retry_after=lambda: last_retry_after(client))
+        except TwilioRestException as e:
+            if e.code == ROOM_EXISTS_ERROR_CODE and get_setting('TWILIO_ROOM_CACHE_ENABLED'):
+                # Another worker created the room first, answer with that room.
+                return self.fetch_room(client, room_name)
+            raise twilio_validation_error(e)
+
+        room_index.add_instance(client.account_sid, room, room_type=params.get('type'))
+        return room
+
+    def fetch_room(self, client, room_name):
+        """
+        Fetch an existing Twilio room instance by its unique name.
 
+        :param twilio.rest.Client client: Twilio REST client.
+        :param str room_name: Unique name of the room.
+        :rtype: twilio.rest.video.v1.room.RoomInstance
+        """
         try:
-            room_name = validated_data.pop('room_name')
-            room = client.video.rooms.create(**validated_data, unique_name=room_name)
+            with instrument(ROOM_FETCH):
+                room = room_guard.call(client.video.rooms(room_name).fetch, retry_after=lambda: last_retry_after(client))
         except TwilioRestException as e:
-            """
-            TwilioRestException arise when the Twilio Client attempt to create a Room
-            apart from that a Twilio-specific error code is not available for all errors
-            @see https://github.com/twilio/twilio-python/blob/709b772c187043c4120bb5c2be3d629d549e792b/twilio/base/exceptions.py#L11-L19
-            """
-            detail = {'twilio_err_code': 'unknown' if e.code is None else e.code, 'twilio_err_msg': e.msg}
-            raise ValidationError(detail=detail, code='invalid')
+            raise twilio_validation_error(e)
 
+        room_index.add_instance(client.account_sid, room)
         return room
 
 
@@ -81,3 +229,112 @@ class PeerToPeerRoomDeserializer(BaseRoomDeserializer):
     )
     enable_turn = serializers.BooleanField(default=True)
     type = serializers.ChoiceField(choices=PEER_TO_PEER_ROOM_CHOICES)
+
+
+class AllocateRoomDeserializer(BaseRoomDeserializer):
+    """
+    Deserializer that hands out a ready room of the pool, see `django_twilio_access_token.pool`.
+
+    The room is created on the spot with the pool parameters when none is ready, or when
+    the request belongs to another account than the one of the project settings.
+    """
+    room_name = None
+    status_callback = None
+    type = serializers.ChoiceField(choices=ROOM_TYPES)
+
+    def create(self, validated_data):
+        """
+        Allocate a room of the pool.
+
+        :param dict validated_data: Validated data.
+        :rtype: django_twilio_access_token.rooms.RoomRecord
+        """
+        room_type = validated_data['type']
+        if room_pool.enabled() and credential_registry.resolve(self.context.get('request')) is None:
+            room = room_pool.allocate(room_type)
+            if room is not None:
+                room_index.add(self.get_client().account_sid, room.sid, room.unique_name, status='in-progress',
+                               room_type=room_type)
+                return room
+
+        params = dict(get_setting('TWILIO_ROOM_POOL_PARAMS').get(room_type, {}), type=room_type)
+        return self.create_room(self.get_client(), new_room_name(), params)
+
+
+class RoomListDeserializer(serializers.Serializer):
+    """
+    Deserializer of the query parameters of the room listing.
+    """
+    STATUS_CHOICES = ('in-progress', 'completed', 'failed')
+    status = serializers.ChoiceField(choices=STATUS_CHOICES, required=False)
+    type = serializers.ChoiceField(choices=ROOM_TYPES, required=False)
+    limit = serializers.IntegerField(min_value=1, required=False)
+    cursor = serializers.IntegerField(min_value=1, required=False)
+
+    def validate_limit(self, value):
+        max_size = get_setting('TWILIO_ROOM_INDEX_MAX_PAGE_SIZE')
+        if value > max_size:
+            raise serializers.ValidationError(
+                'Ensure this value is less than or equal to {}.'.format(max_size), code='max_value')
+        return value
+
+
+class BulkRoomDeserializer(serializers.Serializer):
+    """
+    Deserializer that can validate and create many rooms at once.
+
+    Each entry is validated as a `PeerToPeerRoomDeserializer` payload when its type is
+    `peer-to-peer`, as a `GroupRoomDeserializer` payload otherwise. Invalid entries and failed
+    creations are reported individually instead of failing the whole bulk.
+    """
+    rooms = serializers.ListField(allow_empty=False)
+
+    def validate_rooms(self, value):
+        max_size = get_setting('TWILIO_ROOM_BULK_MAX_SIZE')
+        if len(value) > max_size:
+            raise serializers.ValidationError(
+                'Ensure this field has no more than {} elements.'.format(max_size), code='max_length')
+
+        entries = []
+        for item in value:
+            is_peer_to_peer = isinstance(item, dict) and item.get('type') == PeerToPeerRoomDeserializer.PEER_TO_PEER
+            deserializer_class = PeerToPeerRoomDeserializer if is_peer_to_peer else GroupRoomDeserializer
+            deserializer = deserializer_class(data=item, context=self.context)
+            if deserializer.is_valid():
+                entries.append((deserializer, None))
+            else:
+                entries.append((None, deserializer.errors))
+        return entries
+
+    def create(self, validated_data):
+        """
+        Create every valid room, `TWILIO_ROOM_BULK_CONCURRENCY` at a time over the shared Twilio client.
+
+        :param dict validated_data: Validated data.
+        :returns: Pairs of Twilio room instance and error details, in input order.
+        :rtype: list
+        """
+        entries = validated_data['rooms']
+        valid = [deserializer for deserializer, errors in entries if deserializer is not None]
+        if not valid:
+            return entries
+
+        with ThreadPoolExecutor(max_workers=min(len(valid), get_setting('TWILIO_ROOM_BULK_CONCURRENCY'))) as executor:
+            results = iter(list(executor.map(create_room_entry, valid)))
+        return [next(results) if deserializer is not None else (None, errors) for deserializer, errors in entries]
+
+
+def create_room_entry(deserializer):
+    """
+    Create the room of a validated room deserializer.
+
+    :param BaseRoomDeserializer deserializer: Validated room deserializer.
+    :returns: Pair of Twilio room instance and error details, only one of both being set.
+    :rtype: tuple
+    """
+    try:
+        return deserializer.save(), None
+    except ValidationError as e:
+        return None, e.detail
+    except APIException as e:
+        return None, {'detail': e.detail}
@@ -0,0 +1,176 @@
+import base64
+import calendar
+import hashlib
+import hmac
+import json
+import time
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+JWT_HEADER = {'alg': 'HS256', 'cty': 'twilio-fpa;v=1', 'typ': 'JWT'}
+JWT_SEPARATORS = (',', ':')
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=')
+
+
+def to_timestamp(value):
+    """
+    Convert a datetime into a unix timestamp the way PyJWT does, passing numbers through.
+    """
+    if hasattr(value, 'utctimetuple'):
+        return calendar.timegm(value.utctimetuple())
+    return value
+
+
+class SigningContext(object):
+    """
+    Immutable signing material of Twilio access tokens for one account and API key.
+
+    The JWT header segment, the HMAC key state and the static claims are computed once,
+    so signing a token only encodes the variable claims and runs a single HMAC.
+    Tokens are equivalent to those of `twilio.jwt.access_token.AccessToken.to_jwt`.
+    """
+    __slots__ = ('account_sid', 'signing_key_sid', 'ttl', '_secret', '_hmac', '_header_segment', '_jti_prefix')
+
+    def __init__(self, account_sid, signing_key_sid, secret, ttl=3600):
+        """
+        :param str account_sid: Twilio account SID, the subject of the tokens.
+        :param str signing_key_sid: Twilio API key SID, the issuer of the tokens.
+        :param str secret: Twilio API key secret.
+        :param int ttl: Lifetime of tokens requested without `valid_until`, in seconds.
+        """
+        header = json.dumps(JWT_HEADER, separators=JWT_SEPARATORS, sort_keys=True).encode('utf-8')
+        key = hmac.new(secret.encode('utf-8'), digestmod=hashlib.sha256) if secret else None
+
+        object.__setattr__(self, 'account_sid', account_sid)
+        object.__setattr__(self, 'signing_key_sid', signing_key_sid)
+        object.__setattr__(self, 'ttl', ttl)
+        object.__setattr__(self, '_secret', secret)
+        object.__setattr__(self, '_hmac', key)
+        object.__setattr__(self, '_header_segment', _b64encode(header) + b'.')
+        object.__setattr__(self, '_jti_prefix', '{}-'.format(signing_key_sid))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('{} is immutable.'.format(self.__class__.__name__))
+
+    def __reduce__(self):
+        # Rebuilt from its key when sent to another process, the HMAC state cannot be pickled.
+        return self.__class__, (self.account_sid, self.signing_key_sid, self._secret, self.ttl)
+
+    @classmethod
+    def from_settings(cls):
+        """
+        Build the signing context of the account configured in the project settings.
+        """
+        return cls(account_sid=getattr(settings, 'TWILIO_ACCOUNT_SID', None),
+                   signing_key_sid=getattr(settings, 'TWILIO_VIDEO_API_KEY_SID', None),
+                   secret=getattr(settings, 'TWILIO_VIDEO_API_KEY_SECRET', None))
+
+    def sign(self, grants, identity=None, valid_until=None, now=None):
+        """
+        Sign an access token.
+
+        :param dict grants: Grant payloads keyed by grant key, e.g. `{'video': {'room': 'my-room'}}`.
+        :param str identity: Identity of the token holder.
+        :param datetime.datetime valid_until: Expiry of the token, defaults to `ttl` seconds from now.
+        :param int now: Issue time as unix timestamp, defaults to the current time.
+        :returns: Signed JWT.
+        :rtype: str
+        """
+        if self._hmac is None:
+            raise ValueError('JWT does not have a signing key configured.')
+
+        now = int(time.time()) if now is None else now
+        grants = dict(grants)
+        if identity:
+            grants['identity'] = identity
+
+        payload = {
+            'jti': self._jti_prefix + str(now),
+            'grants': grants,
+            'iss': self.signing_key_sid,
+            'exp': to_timestamp(valid_until) if valid_until else now + self.ttl,
+            'nbf': now,
+            'sub': self.account_sid,
+        }
+        signing_input = self._header_segment + _b64encode(
+            json.dumps(payload, separators=JWT_SEPARATORS).encode('utf-8'))
+
+        mac = self._hmac.copy()
+        mac.update(signing_input)
+        return (signing_input + b'.' + _b64encode(mac.digest())).decode('ascii')
+
+
+class PreparedAccessToken(object):
+    """
+    Access token claims bound to a signing context, signed when `to_jwt` is called.
+
+    Exposes the same attributes as `twilio.jwt.access_token.AccessToken` for the serializers.
+    """
+    __slots__ = ('context', 'grants', 'identity', 'valid_until')
+
+    def __init__(self, context, grants, identity=None, valid_until=None):
+        """
+        :param SigningContext context: Signing context of the token.
+        :param list grants: `twilio.jwt.access_token.AccessTokenGrant` instances.
+        :param str identity: Identity of the token holder.
+        :param datetime.datetime valid_until: Expiry of the token.
+        """
+        self.context = context
+        self.grants = grants
+        self.identity = identity
+        self.valid_until = valid_until
+
+    @property
+    def account_sid(self):
+        return self.context.account_sid
+
+    @property
+    def signing_key_sid(self):
+        return self.context.signing_key_sid
+
+    @property
+    def ttl(self):
+        return self.context.ttl
+
+    def to_jwt(self):
+        """
+        :returns: Signed JWT.
+        :rtype: str
+        """
+        grants = {grant.key: grant.to_payload() for grant in self.grants}
+        return self.context.sign(grants, identity=self.identity, valid_until=self.valid_until)
+
+
+_signing_context = None
+
+
+def get_signing_context():
+    """
+    Return the signing context of the configured account, built once per process.
+
+    :rtype: SigningContext
+    """
+    global _signing_context
+    context = _signing_context
+    if context is None:
+        context = _signing_context = SigningContext.from_settings()
+    return context
+
+
+def reset_signing_context():
+    """
+    Forget the signing context so it is rebuilt from the settings on next use.
+    """
+    global _signing_context
+    _signing_context = None
+
+
+@receiver(setting_changed)
+def _reset_signing_context(setting, **kwargs):
+    if setting in ('TWILIO_ACCOUNT_SID', 'TWILIO_VIDEO_API_KEY_SID', 'TWILIO_VIDEO_API_KEY_SECRET'):
+        reset_signing_context()
@@ -0,0 +1,132 @@
+import asyncio
+import threading
+
+
+class _Call(object):
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class CallInterrupted(RuntimeError):
+    """
+    Raised to the callers waiting on a call in flight whose caller was interrupted, e.g. by
+    task cancellation or `KeyboardInterrupt`, rather than failing with an error.
+    """
+
+
+def _shared_error(error):
+    """
+    Return the error raised to the callers waiting on a call that raised `error`.
+    """
+    if isinstance(error, Exception):
+        return error
+    interrupted = CallInterrupted('Call in flight was interrupted by {}.'.format(type(error).__name__))
+    interrupted.__cause__ = error
+    return interrupted
+
+
+class SingleFlight(object):
+    """
+    Coalesce concurrent calls sharing a key into a single execution.
+
+    While a call for a key is in flight, other callers with the same key wait for it and
+    receive its result, or its exception. Threads use `do`, asyncio tasks use `do_async`. When
+    the caller executing the call is interrupted, e.g. its task is cancelled, the other callers
+    get `CallInterrupted`.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._futures = {}
+        self.reset_stats()
+
+    def do(self, key, fn):
+        """
+        Call `fn` unless a call with the same key is already in flight, then wait for that one.
+
+        :param key: Hashable key identifying identical calls.
+        :param callable fn: Function called without arguments.
+        :returns: Result of `fn`.
+        """
+        with self._lock:
+            self._stats['calls'] += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                self._stats['executions'] += 1
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = _shared_error(e)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result
+
+    async def do_async(self, key, fn):
+        """
+        Await `fn()` unless a call with the same key is already in flight on this event loop,
+        then await that one.
+
+        :param key: Hashable key identifying identical calls.
+        :param callable fn: Function called without arguments, returning an awaitable.
+        :returns: Result of the awaitable.
+        """
+        loop = asyncio.get_event_loop()
+        loop_key = (id(loop), key)
+        with self._lock:
+            self._stats['calls'] += 1
+            future = self._futures.get(loop_key)
+            leader = future is None
+            if leader:
+                self._stats['executions'] += 1
+                future = self._futures[loop_key] = loop.create_future()
+
+        if not leader:
+            return await asyncio.shield(future)
+
+        try:
+            result = await fn()
+        except BaseException as e:
+            # A future cannot hold a `CancelledError`.
+            future.set_exception(_shared_error(e))
+            # Followers are optional, avoid warnings about an exception never retrieved.
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._futures[loop_key]
+
+    def stats(self):
+        """
+        Return how many calls were made, executed, and shared an execution in flight.
+
+        :rtype: dict
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats['shared'] = stats['calls'] - stats['executions']
+        stats['coalescing_ratio'] = stats['shared'] / stats['calls'] if stats['calls'] else 0.0
+        return stats
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {'calls': 0, 'executions': 0}
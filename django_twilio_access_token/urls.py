@@ -1,8 +1,31 @@
+import django
 from django.urls import path
 from django_twilio_access_token import views
 
 urlpatterns = [
     path('token/video/', views.TwilioVideoAccessTokenView.as_view(), name='twilio-token-video'),
+    path('fast/token/video/', views.fast_video_token_view, name='fast-twilio-token-video'),
+    path('token/video/batch/', views.TwilioVideoAccessTokenBatchView.as_view(), name='twilio-token-video-batch'),
+    path('token/video/stream/', views.stream_video_tokens_view, name='twilio-token-video-stream'),
+    path('token/chat/', views.TwilioChatAccessTokenView.as_view(), name='twilio-token-chat'),
+    path('token/voice/', views.TwilioVoiceAccessTokenView.as_view(), name='twilio-token-voice'),
+    path('token/sync/', views.TwilioSyncAccessTokenView.as_view(), name='twilio-token-sync'),
+    path('token/', views.TwilioAccessTokenView.as_view(), name='twilio-token'),
     path('rooms/peer2peer/', views.TwilioPeerToPeerRoomView.as_view(), name='peer-to-peer-room'),
     path('rooms/group/', views.TwilioGroupRoomView.as_view(), name='group-room'),
+    path('rooms/bulk/', views.TwilioBulkRoomView.as_view(), name='bulk-room'),
+    path('rooms/allocate/', views.TwilioAllocateRoomView.as_view(), name='allocate-room'),
+    path('rooms/jobs/<str:job_id>/', views.TwilioRoomJobView.as_view(), name='room-job'),
+    path('callbacks/status/', views.status_callback_view, name='status-callback'),
+    path('rooms/', views.TwilioRoomListView.as_view(), name='room-list'),
+    path('rooms/<str:room>/', views.TwilioRoomDetailView.as_view(), name='room-detail'),
 ]
+
+# Async views are only supported from Django 3.1 onwards.
+if django.VERSION >= (3, 1):
+    urlpatterns += [
+        path('async/token/video/', views.AsyncTwilioVideoAccessTokenView.as_view(), name='async-twilio-token-video'),
+        path('async/fast/token/video/', views.async_fast_video_token_view, name='async-fast-twilio-token-video'),
+        path('async/rooms/peer2peer/', views.AsyncTwilioPeerToPeerRoomView.as_view(), name='async-peer-to-peer-room'),
+        path('async/rooms/group/', views.AsyncTwilioGroupRoomView.as_view(), name='async-group-room'),
+    ]
@@ -0,0 +1,202 @@
+"""
+Compiled validation of DRF serializers, see `CompiledValidation`.
+"""
+from django.core import validators as django_validators
+from rest_framework import fields, serializers
+
+# Values DRF would reject or coerce send the payload back to DRF.
+_FALLBACK = object()
+
+
+class NotCompilable(Exception):
+    """
+    Raised when a serializer uses a field or a hook `CompiledValidation` does not know.
+    """
+
+
+class CompiledValidation(object):
+    """
+    Validation plan of a serializer class, equivalent to the `run_validation` of its instances
+    on plainly valid payloads.
+
+    The plan is built once from the declared fields: length limits become integers, URL regexes
+    are compiled and choices are looked up in a frozenset, so validating a payload runs a few
+    checks per field without building DRF fields, validators or error details. Whenever a value
+    is not plainly valid, including inputs DRF would coerce, such as `"true"` for a boolean,
+    `validate` returns None and the serializer runs its regular validation, which builds the
+    exact DRF error details.
+
+    Supported fields are `CharField`, `URLField`, `BooleanField` and `ChoiceField`, with their
+    default validators; serializers with any other field, validators or `validate` hooks are
+    not compilable.
+    """
+
+    def __init__(self, plan):
+        """
+        :param tuple plan: `(name, clean, required, default)` of each field, `clean` returning
+                           the validated value or `_FALLBACK`.
+        """
+        self.plan = plan
+
+    @classmethod
+    def compile(cls, serializer_class):
+        """
+        :param type serializer_class: Serializer class.
+        :returns: The validation plan of the class, or None when it is not compilable.
+        :rtype: CompiledValidation
+        """
+        try:
+            check_hooks(serializer_class)
+            return cls(tuple(compile_field(name, field) for name, field in serializer_class._declared_fields.items()))
+        except NotCompilable:
+            return None
+
+    def validate(self, data):
+        """
+        :param data: Parsed request payload.
+        :returns: Validated data, or None when the serializer has to validate it.
+        :rtype: dict
+        """
+        if type(data) is not dict:
+            return None
+
+        validated_data = {}
+        for name, clean, required, default in self.plan:
+            if name in data:
+                value = clean(data[name])
+                if value is _FALLBACK:
+                    return None
+                validated_data[name] = value
+            elif required:
+                return None
+            elif default is not fields.empty:
+                validated_data[name] = default
+        return validated_data
+
+
+def check_hooks(serializer_class):
+    """
+    Raise `NotCompilable` when `serializer_class` validates more than its fields.
+    """
+    meta = getattr(serializer_class, 'Meta', None)
+    if getattr(meta, 'validators', None) or serializer_class.validate is not serializers.Serializer.validate:
+        raise NotCompilable('{} has validators.'.format(serializer_class.__name__))
+    for name in serializer_class._declared_fields:
+        if hasattr(serializer_class, 'validate_' + name):
+            raise NotCompilable('{} has validate_{}.'.format(serializer_class.__name__, name))
+
+
+def compile_field(name, field):
+    """
+    :param str name: Field name.
+    :param rest_framework.fields.Field field: Declared field.
+    :returns: `(name, clean, required, default)` of the field.
+    :rtype: tuple
+    """
+    if field.read_only or field.source not in (None, name) or \
+            (field.default is not fields.empty and callable(field.default)):
+        raise NotCompilable('{} is not a plain writable field.'.format(name))
+
+    # Subclasses first, `URLField` is a `CharField`.
+    if isinstance(field, fields.URLField):
+        clean = compile_char_field(field, compile_url_validator(field))
+    elif isinstance(field, fields.CharField):
+        clean = compile_char_field(field, None)
+    elif type(field) is fields.BooleanField:
+        clean = compile_boolean_field(field)
+    elif type(field) is fields.ChoiceField:
+        clean = compile_choice_field(field)
+    else:
+        raise NotCompilable('{} is a {}.'.format(name, type(field).__name__))
+    if field.allow_null:
+        clean = allow_null(clean)
+    return name, clean, field.required, field.default
+
+
+def allow_null(clean):
+    def clean_nullable(value):
+        return None if value is None else clean(value)
+    return clean_nullable
+
+
+def compile_char_field(field, check_url):
+    """
+    Clean like `CharField`: non-blank strings, stripped, within their length limits.
+    """
+    if field.allow_blank:
+        raise NotCompilable('Blank strings are not supported.')
+    min_length = max_length = None
+    for validator in field.validators:
+        if isinstance(validator, django_validators.MinLengthValidator):
+            min_length = limit_of(validator)
+        elif isinstance(validator, django_validators.MaxLengthValidator):
+            max_length = limit_of(validator)
+        elif not isinstance(validator, (django_validators.ProhibitNullCharactersValidator,
+                                        django_validators.URLValidator)):
+            raise NotCompilable('{} is not supported.'.format(type(validator).__name__))
+    trim_whitespace = field.trim_whitespace
+
+    def clean_char(value):
+        if type(value) is not str or '\x00' in value:
+            return _FALLBACK
+        if trim_whitespace:
+            value = value.strip()
+        if not value or (min_length is not None and len(value) < min_length) or \
+                (max_length is not None and len(value) > max_length):
+            return _FALLBACK
+        if check_url is not None and not check_url(value):
+            return _FALLBACK
+        return value
+    return clean_char
+
+
+def limit_of(validator):
+    if callable(validator.limit_value):
+        raise NotCompilable('Callable length limits are not supported.')
+    return validator.limit_value
+
+
+def compile_url_validator(field):
+    """
+    Return a check equivalent to the `URLValidator` of `field` on common URLs.
+
+    URLs with an IPv6 host or longer than 253 characters, and URLs the regex rejects, are left
+    to `URLValidator`.
+    """
+    validator = next(v for v in field.validators if isinstance(v, django_validators.URLValidator))
+    schemes = frozenset(validator.schemes)
+    # Django < 3.0.14 has no `unsafe_chars`, its regex alone rejects whitespace.
+    unsafe_chars = frozenset(getattr(validator, 'unsafe_chars', ()))
+    # Evaluates the lazily compiled regex once.
+    search = validator.regex.search
+    if validator.inverse_match:
+        raise NotCompilable('Inverse URL regex is not supported.')
+
+    def check_url(value):
+        if len(value) > 253 or '[' in value or not unsafe_chars.isdisjoint(value):
+            return False
+        return value.split('://')[0].lower() in schemes and search(value) is not None
+    return check_url
+
+
+def compile_boolean_field(field):
+    """
+    Clean like `BooleanField`, for JSON booleans.
+    """
+    def clean_boolean(value):
+        return value if type(value) is bool else _FALLBACK
+    return clean_boolean
+
+
+def compile_choice_field(field):
+    """
+    Clean like `ChoiceField`, for string choices.
+    """
+    if field.allow_blank:
+        raise NotCompilable('Blank choices are not supported.')
+    # Choices whose value is their own string, other ones go through DRF.
+    choices = frozenset(key for key, value in field.choice_strings_to_values.items() if key == value)
+
+    def clean_choice(value):
+        return value if type(value) is str and value in choices else _FALLBACK
+    return clean_choice
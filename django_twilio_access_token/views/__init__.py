@@ -1,8 +1,35 @@
-from .twilio_video_access_token_view import TwilioVideoAccessTokenView
-from .twilio_room_view import TwilioGroupRoomView, TwilioPeerToPeerRoomView
+from .twilio_video_access_token_view import TwilioVideoAccessTokenView, TwilioVideoAccessTokenBatchView
+from .twilio_access_token_view import (
+    TwilioAccessTokenView, TwilioChatAccessTokenView, TwilioSyncAccessTokenView, TwilioVoiceAccessTokenView
+)
+from .twilio_room_view import (
+    TwilioAllocateRoomView, TwilioBulkRoomView, TwilioGroupRoomView, TwilioPeerToPeerRoomView, TwilioRoomDetailView,
+    TwilioRoomJobView, TwilioRoomListView
+)
+from .twilio_async_view import AsyncTwilioVideoAccessTokenView, AsyncTwilioGroupRoomView, AsyncTwilioPeerToPeerRoomView
+from .twilio_fast_token_view import fast_video_token_view, async_fast_video_token_view
+from .twilio_token_stream_view import stream_video_tokens_view
+from .twilio_status_callback_view import status_callback_view
 
 __all__ = [
     'TwilioVideoAccessTokenView',
+    'TwilioVideoAccessTokenBatchView',
+    'TwilioChatAccessTokenView',
+    'TwilioVoiceAccessTokenView',
+    'TwilioSyncAccessTokenView',
+    'TwilioAccessTokenView',
     'TwilioGroupRoomView',
-    'TwilioPeerToPeerRoomView'
+    'TwilioPeerToPeerRoomView',
+    'TwilioBulkRoomView',
+    'TwilioAllocateRoomView',
+    'TwilioRoomJobView',
+    'TwilioRoomListView',
+    'TwilioRoomDetailView',
+    'AsyncTwilioVideoAccessTokenView',
+    'AsyncTwilioGroupRoomView',
+    'AsyncTwilioPeerToPeerRoomView',
+    'fast_video_token_view',
+    'async_fast_video_token_view',
+    'stream_video_tokens_view',
+    'status_callback_view'
 ]
@@ -0,0 +1,50 @@
+from rest_framework.exceptions import APIException
+from rest_framework.permissions import AllowAny
+
+
+def check_drf_policies(request, view_class):
+    """
+    Apply the DRF authentication, permissions and throttling of `view_class` to a plain Django
+    request, the way its `initial` does before handling a request.
+
+    :param django.http.HttpRequest request: Incoming request.
+    :param type view_class: DRF `APIView` subclass whose policies apply.
+    :returns: The response `view_class` gives when the request is not allowed, otherwise None.
+    :rtype: rest_framework.response.Response
+    """
+    view = view_class()
+    view.args, view.kwargs = (), {}
+    view.format_kwarg = None
+    view.headers = view.default_response_headers
+    drf_request = view.request = view.initialize_request(request)
+    try:
+        view.perform_authentication(drf_request)
+        view.check_permissions(drf_request)
+        view.check_throttles(drf_request)
+    except APIException as e:
+        return view.finalize_response(drf_request, view.handle_exception(e))
+    return None
+
+
+def policies_need_io(view_class):
+    """
+    Tell whether checking the DRF policies of `view_class` may do I/O, such as loading the user of
+    a session or counting a throttled request in the Django cache.
+
+    :param type view_class: DRF `APIView` subclass whose policies apply.
+    :rtype: bool
+    """
+    return bool(view_class.authentication_classes or view_class.throttle_classes or
+                any(permission is not AllowAny for permission in view_class.permission_classes))
+
+
+def error_payload(e):
+    """
+    Return the response payload DRF's `exception_handler` gives for an API error.
+
+    :param rest_framework.exceptions.APIException e: API error.
+    :rtype: dict
+    """
+    if isinstance(e.detail, (list, dict)):
+        return e.detail
+    return {'detail': e.detail}
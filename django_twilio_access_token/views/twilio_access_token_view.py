@@ -0,0 +1,36 @@
+from django_twilio_access_token.serializers import (
+    AccessTokenDeserializer, ChatTokenDeserializer, SyncTokenDeserializer, TokenSerializer, VoiceTokenDeserializer
+)
+from drf_rw_serializers import generics
+
+
+class TwilioChatAccessTokenView(generics.CreateAPIView):
+    """
+    A view class to create an access token for chat
+    """
+    read_serializer_class = TokenSerializer
+    write_serializer_class = ChatTokenDeserializer
+
+
+class TwilioVoiceAccessTokenView(generics.CreateAPIView):
+    """
+    A view class to create an access token for voice calls
+    """
+    read_serializer_class = TokenSerializer
+    write_serializer_class = VoiceTokenDeserializer
+
+
+class TwilioSyncAccessTokenView(generics.CreateAPIView):
+    """
+    A view class to create an access token for sync
+    """
+    read_serializer_class = TokenSerializer
+    write_serializer_class = SyncTokenDeserializer
+
+
+class TwilioAccessTokenView(generics.CreateAPIView):
+    """
+    A view class to create one access token holding several grants, e.g. video and chat
+    """
+    read_serializer_class = TokenSerializer
+    write_serializer_class = AccessTokenDeserializer
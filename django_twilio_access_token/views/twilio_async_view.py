@@ -0,0 +1,203 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse
+from django.views import View
+from rest_framework import status
+from rest_framework.exceptions import APIException, UnsupportedMediaType
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.parsers import FormParser, JSONParser
+from rest_framework.views import APIView
+
+from django_twilio_access_token.cache import token_cache_key, token_flight
+from django_twilio_access_token.conf import get_setting
+from django_twilio_access_token.jobs import respond_async, room_jobs
+from django_twilio_access_token.serializers import (
+    GroupRoomDeserializer, PeerToPeerRoomDeserializer, RoomSerializer, TokenSerializer, VideoTokenDeserializer
+)
+
+from .policies import check_drf_policies, error_payload, policies_need_io
+from .twilio_room_view import TwilioGroupRoomView, TwilioPeerToPeerRoomView, job_location
+from .twilio_video_access_token_view import TwilioVideoAccessTokenView
+
+
+class AsyncCreateAPIView(View):
+    """
+    Native async counterpart of `drf_rw_serializers.generics.CreateAPIView`.
+
+    Validation happens on the event loop, whereas creating and serializing the instance,
+    which may sign a token or wait on the Twilio API, is done in a worker thread.
+    The DRF authentication, permissions and throttling of `policy_view_class`, its sync
+    counterpart, apply. Requires Django 3.1 or newer.
+    """
+    http_method_names = ['post']
+    parser_classes = (JSONParser, FormParser)
+    read_serializer_class = None
+    write_serializer_class = None
+    policy_view_class = APIView
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        """
+        Return an async view function, which is what Django 3.1 dispatches natively.
+        """
+        async def view(request, *args, **kwargs):
+            self = cls(**initkwargs)
+            self.setup(request, *args, **kwargs)
+            if request.method.lower() not in self.http_method_names:
+                return self.http_method_not_allowed(request, *args, **kwargs)
+            refused = await self.check_policies(request)
+            if refused is not None:
+                return refused
+            return await self.post(request, *args, **kwargs)
+
+        view.view_class = cls
+        view.view_initkwargs = initkwargs
+        # Same as DRF `APIView`, CSRF is checked by the session authentication.
+        view.csrf_exempt = True
+        return view
+
+    async def check_policies(self, request):
+        """
+        Apply the DRF authentication, permissions and throttling of `policy_view_class`.
+
+        :returns: The DRF response when the request is not allowed, otherwise None.
+        :rtype: rest_framework.response.Response
+        """
+        if policies_need_io(self.policy_view_class):
+            # Authentication may load the user of a session from the database, throttles may use the Django cache.
+            return await sync_to_async(check_drf_policies)(request, self.policy_view_class)
+        return check_drf_policies(request, self.policy_view_class)
+
+    async def post(self, request, *args, **kwargs):
+        try:
+            data = self.parse(request)
+        except APIException as e:
+            return JsonResponse({'detail': e.detail}, status=e.status_code)
+
+        serializer = self.write_serializer_class(data=data, context={'request': request, 'view': self})
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        return await self.create_response(request, serializer)
+
+    async def create_response(self, request, serializer):
+        """
+        Create the instance and answer it with 201, or answer the API error raised.
+
+        :param django.http.HttpRequest request: Incoming request.
+        :param rest_framework.serializers.Serializer serializer: Validated write serializer.
+        :rtype: django.http.JsonResponse
+        """
+        try:
+            response_data = await self.create(serializer)
+        except APIException as e:
+            response = JsonResponse(error_payload(e), status=e.status_code, safe=False)
+            if getattr(e, 'wait', None):
+                response['Retry-After'] = '{:d}'.format(e.wait)
+            return response
+        return JsonResponse(response_data, status=status.HTTP_201_CREATED)
+
+    def parse(self, request):
+        """
+        Parse the request body the same way DRF does for JSON and form payloads.
+
+        :raises rest_framework.exceptions.ParseError: on malformed body.
+        :raises rest_framework.exceptions.UnsupportedMediaType: on any other content type.
+        """
+        if not int(request.META.get('CONTENT_LENGTH') or 0):
+            return {}
+
+        parsers = [parser() for parser in self.parser_classes]
+        parser = DefaultContentNegotiation().select_parser(request, parsers)
+        if parser is None:
+            raise UnsupportedMediaType(request.content_type)
+        parser_context = {'request': request, 'encoding': request.encoding or settings.DEFAULT_CHARSET}
+        return parser.parse(request, parser.media_type, parser_context)
+
+    async def create(self, serializer):
+        """
+        Run `perform_create` in a worker thread.
+
+        :param rest_framework.serializers.Serializer serializer: Validated write serializer.
+        :rtype: dict
+        """
+        return await sync_to_async(self.perform_create, thread_sensitive=False)(serializer)
+
+    def perform_create(self, serializer):
+        """
+        Create the instance and return its read representation.
+
+        :param rest_framework.serializers.Serializer serializer: Validated write serializer.
+        :rtype: dict
+        """
+        serializer.save()
+        return self.represent(serializer)
+
+    def represent(self, serializer):
+        """
+        Return the read representation of the instance created by `serializer`.
+
+        :param rest_framework.serializers.Serializer serializer: Saved write serializer.
+        :rtype: dict
+        """
+        return self.read_serializer_class(serializer.instance, context=serializer.context).data
+
+
+class AsyncTwilioVideoAccessTokenView(AsyncCreateAPIView):
+    """
+    An async view class to create an access token for video call
+    """
+    read_serializer_class = TokenSerializer
+    write_serializer_class = VideoTokenDeserializer
+    policy_view_class = TwilioVideoAccessTokenView
+
+    async def create(self, serializer):
+        """
+        With `TWILIO_TOKEN_SINGLE_FLIGHT`, identical requests awaiting on the event loop share
+        a single signing instead of each occupying a worker thread.
+        """
+        if not get_setting('TWILIO_TOKEN_SINGLE_FLIGHT'):
+            return await super().create(serializer)
+
+        if get_setting('TWILIO_TENANT_RESOLVER'):
+            # Credentials of a tenant may have to be loaded from their backend, which needs I/O.
+            await sync_to_async(serializer.save, thread_sensitive=False)()
+        else:
+            # Building the token does no I/O, only its signing is deferred to a worker thread.
+            serializer.save()
+        represent = sync_to_async(self.represent, thread_sensitive=False)
+        return await token_flight.do_async(token_cache_key(serializer.instance), lambda: represent(serializer))
+
+
+class AsyncRoomJobMixin(object):
+    """
+    Answer room creations with 202 and a job to poll, as configured by `TWILIO_ROOM_JOBS_MODE`,
+    like `RoomJobMixin`.
+    """
+
+    async def create_response(self, request, serializer):
+        if not respond_async(request):
+            return await super().create_response(request, serializer)
+
+        # Custom job backends may reach a broker.
+        job = await sync_to_async(room_jobs.submit, thread_sensitive=False)(lambda: self.perform_create(serializer))
+        response = JsonResponse({'job_id': job.id, 'status': job.status}, status=status.HTTP_202_ACCEPTED)
+        response['Location'] = job_location(request, job)
+        return response
+
+
+class AsyncTwilioGroupRoomView(AsyncRoomJobMixin, AsyncCreateAPIView):
+    """
+    An async view class to create new Twilio small / group room.
+    """
+    read_serializer_class = RoomSerializer
+    write_serializer_class = GroupRoomDeserializer
+    policy_view_class = TwilioGroupRoomView
+
+
+class AsyncTwilioPeerToPeerRoomView(AsyncRoomJobMixin, AsyncCreateAPIView):
+    """
+    An async view class to create new Twilio peer-to-peer room.
+    """
+    read_serializer_class = RoomSerializer
+    write_serializer_class = PeerToPeerRoomDeserializer
+    policy_view_class = TwilioPeerToPeerRoomView
@@ -0,0 +1,160 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import APIException, Throttled
+
+from django_twilio_access_token.cache import token_cache
+from django_twilio_access_token.conf import get_setting
+from django_twilio_access_token.instrumentation import TOKEN_CREATE, TOKEN_SIGN, TOKEN_VALIDATE, instrument
+from django_twilio_access_token.serializers.twilio_access_token_serializer import (
+    create_video_token, fast_validate_video_token
+)
+from django_twilio_access_token.credentials import get_signing_context_for
+from django_twilio_access_token.ratelimit import token_rate_limiter
+
+from .policies import check_drf_policies, policies_need_io
+from .twilio_video_access_token_view import TwilioVideoAccessTokenView
+
+# Handles everything the fast path leaves aside: other methods and content types,
+# malformed or invalid payloads. Its responses are the reference of the fast path.
+drf_video_token_view = TwilioVideoAccessTokenView.as_view()
+
+
+def parse_fast(request):
+    """
+    Return the JSON payload of a POST request, or None when it is not a plain UTF-8 JSON request.
+
+    :param django.http.HttpRequest request: Incoming request.
+    """
+    if request.method != 'POST' or request.content_type != 'application/json':
+        return None
+    if request.encoding is not None and request.encoding.lower() not in ('utf-8', 'utf8'):
+        return None
+    try:
+        return json.loads(request.body)
+    except ValueError:
+        return None
+
+
+def validate_fast(request):
+    """
+    Return the validated data of a video token request, or None when DRF has to handle it.
+
+    :param django.http.HttpRequest request: Incoming request.
+    :rtype: dict
+    """
+    with instrument(TOKEN_VALIDATE):
+        return fast_validate_video_token(parse_fast(request))
+
+
+def signing_context_fast(request):
+    """
+    Return the signing context of the tenant of the request, or None when DRF has to report an error.
+
+    :param django.http.HttpRequest request: Incoming request.
+    :rtype: django_twilio_access_token.signing.SigningContext
+    """
+    try:
+        return get_signing_context_for(request)
+    except APIException:
+        return None
+
+
+def rate_limit_fast(request, validated_data):
+    """
+    Count a valid video token request against the rate limits.
+
+    :param django.http.HttpRequest request: Incoming request.
+    :param dict validated_data: Validated data.
+    :returns: The `429` response `TwilioVideoAccessTokenView` would give when the request is
+              over a limit, otherwise None.
+    :rtype: django.http.HttpResponse
+    """
+    try:
+        token_rate_limiter.check(request, validated_data)
+    except Throttled as e:
+        response = HttpResponse(json.dumps({'detail': e.detail}, separators=(',', ':')), status=e.status_code,
+                                content_type='application/json')
+        response['Retry-After'] = '{:d}'.format(e.wait)
+        response['Allow'] = 'POST, OPTIONS'
+        response['Vary'] = 'Accept'
+        return response
+    return None
+
+
+def create_token_response(validated_data, context):
+    """
+    Sign a video token and render it the way `TwilioVideoAccessTokenView` does.
+
+    :param dict validated_data: Validated data.
+    :param django_twilio_access_token.signing.SigningContext context: Signing context of the tenant.
+    :rtype: django.http.HttpResponse
+    """
+    with instrument(TOKEN_CREATE):
+        token = create_video_token(validated_data, context)
+    with instrument(TOKEN_SIGN):
+        body = json.dumps({'token': token_cache.get_jwt(token)}, separators=(',', ':'))
+
+    response = HttpResponse(body, status=201, content_type='application/json')
+    response['Allow'] = 'POST, OPTIONS'
+    response['Vary'] = 'Accept'
+    return response
+
+
+@csrf_exempt
+def fast_video_token_view(request):
+    """
+    Lightweight equivalent of `TwilioVideoAccessTokenView` for plain JSON requests.
+
+    Valid payloads are validated and signed without DRF, any other request is handed over to
+    `TwilioVideoAccessTokenView`, so both answer the same. The DRF authentication, permissions
+    and throttling of `TwilioVideoAccessTokenView` apply to the requests handled here too.
+    """
+    validated_data = validate_fast(request)
+    if validated_data is None:
+        return drf_video_token_view(request)
+    refused = check_drf_policies(request, TwilioVideoAccessTokenView)
+    if refused is not None:
+        return refused
+    context = signing_context_fast(request)
+    if context is None:
+        return drf_video_token_view(request)
+    return rate_limit_fast(request, validated_data) or create_token_response(validated_data, context)
+
+
+async def async_fast_video_token_view(request):
+    """
+    Async variant of `fast_video_token_view`, for projects served through ASGI.
+
+    Signing is CPU bound and short, so it runs on the event loop unless tokens are cached
+    in a shared Django cache, which needs I/O.
+    """
+    validated_data = validate_fast(request)
+    if validated_data is None:
+        return await sync_to_async(drf_video_token_view)(request)
+    if policies_need_io(TwilioVideoAccessTokenView):
+        # Authentication may load the user of a session from the database, throttles may use the Django cache.
+        refused = await sync_to_async(check_drf_policies)(request, TwilioVideoAccessTokenView)
+    else:
+        refused = check_drf_policies(request, TwilioVideoAccessTokenView)
+    if refused is not None:
+        return refused
+    if get_setting('TWILIO_TENANT_RESOLVER'):
+        # Credentials of a tenant may have to be loaded from their backend, which needs I/O.
+        context = await sync_to_async(signing_context_fast, thread_sensitive=False)(request)
+    else:
+        context = signing_context_fast(request)
+    if context is None:
+        return await sync_to_async(drf_video_token_view)(request)
+    throttled = rate_limit_fast(request, validated_data)
+    if throttled is not None:
+        return throttled
+    if get_setting('TWILIO_TOKEN_CACHE_ENABLED') and get_setting('TWILIO_TOKEN_CACHE_BACKEND'):
+        return await sync_to_async(create_token_response, thread_sensitive=False)(validated_data, context)
+    return create_token_response(validated_data, context)
+
+
+# `csrf_exempt` would hide the coroutine function from Django, hence the flag is set directly.
+async_fast_video_token_view.csrf_exempt = True
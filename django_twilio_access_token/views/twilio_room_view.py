@@ -1,8 +1,62 @@
-from django_twilio_access_token.serializers import GroupRoomDeserializer, PeerToPeerRoomDeserializer, RoomSerializer
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.views import APIView
+
+from django_twilio_access_token.conf import get_setting
+from django_twilio_access_token.jobs import PENDING, respond_async, room_jobs
+from django_twilio_access_token.rooms import room_index
+from django_twilio_access_token.serializers import (
+    AllocateRoomDeserializer, BulkRoomDeserializer, BulkRoomSerializer, GroupRoomDeserializer, PeerToPeerRoomDeserializer,
+    RoomDetailSerializer, RoomListDeserializer, RoomSerializer
+)
+from django_twilio_access_token.serializers.twilio_room_serializer import get_room_client, retrieve_room
 from drf_rw_serializers import generics
 
 
-class TwilioGroupRoomView(generics.CreateAPIView):
+def job_location(request, job):
+    """
+    Return the URL to poll `job` at.
+
+    :param request: Incoming request.
+    :param django_twilio_access_token.jobs.Job job: Room creation job.
+    :rtype: str
+    """
+    # The URLs of this app may be included with or without namespace.
+    namespace = request.resolver_match.namespace if request.resolver_match else ''
+    return reverse('{}:room-job'.format(namespace) if namespace else 'room-job', kwargs={'job_id': job.id})
+
+
+class RoomJobMixin(object):
+    """
+    Answer room creations with 202 and a job to poll, instead of waiting for Twilio,
+    as configured by `TWILIO_ROOM_JOBS_MODE`.
+    """
+
+    def create(self, request, *args, **kwargs):
+        if not respond_async(request):
+            return super().create(request, *args, **kwargs)
+
+        write_serializer = self.get_write_serializer(data=request.data)
+        write_serializer.is_valid(raise_exception=True)
+        job = room_jobs.submit(lambda: self.run_job(write_serializer))
+        return Response({'job_id': job.id, 'status': job.status}, status=status.HTTP_202_ACCEPTED,
+                        headers={'Location': job_location(request, job)})
+
+    def run_job(self, write_serializer):
+        """
+        Create the room and return its read representation.
+
+        :param rest_framework.serializers.Serializer write_serializer: Validated write serializer.
+        :rtype: dict
+        """
+        self.perform_create(write_serializer)
+        return self.get_read_serializer(write_serializer.instance).data
+
+
+class TwilioGroupRoomView(RoomJobMixin, generics.CreateAPIView):
     """
     A view class to create new Twilio small / group room.
     """
@@ -10,9 +64,74 @@ class TwilioGroupRoomView(generics.CreateAPIView):
     write_serializer_class = GroupRoomDeserializer
 
 
-class TwilioPeerToPeerRoomView(generics.CreateAPIView):
+class TwilioPeerToPeerRoomView(RoomJobMixin, generics.CreateAPIView):
     """
     A view class to create new Twilio peer-to-peer room.
     """
     read_serializer_class = RoomSerializer
     write_serializer_class = PeerToPeerRoomDeserializer
+
+
+class TwilioBulkRoomView(generics.CreateAPIView):
+    """
+    A view class to create many Twilio rooms at once
+    """
+    read_serializer_class = BulkRoomSerializer
+    write_serializer_class = BulkRoomDeserializer
+
+
+class TwilioAllocateRoomView(generics.CreateAPIView):
+    """
+    A view class to hand out a ready Twilio room of the pool.
+    """
+    read_serializer_class = RoomSerializer
+    write_serializer_class = AllocateRoomDeserializer
+
+
+class TwilioRoomJobView(APIView):
+    """
+    A view class to poll a background room creation.
+
+    While pending, it answers 202 with the job status. Once done, it answers the response
+    the room creation would have had, e.g. 201 with the room.
+    """
+
+    def get(self, request, job_id):
+        job = room_jobs.get(job_id)
+        if job is None:
+            raise NotFound('Unknown room creation job.')
+        if job.status == PENDING:
+            return Response({'job_id': job.id, 'status': job.status}, status=status.HTTP_202_ACCEPTED)
+        headers = {'Retry-After': '{:d}'.format(job.wait)} if job.wait else None
+        return Response(job.result, status=job.status_code, headers=headers)
+
+
+class TwilioRoomListView(APIView):
+    """
+    A view class to list the rooms created by this service, most recent first, from the room index.
+
+    Pages are chained through the `next` URL of each page.
+    """
+
+    def get(self, request):
+        query = RoomListDeserializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+
+        account_sid = get_room_client(request).account_sid
+        rooms, cursor = room_index.page(account_sid, limit=params.get('limit') or get_setting('TWILIO_ROOM_INDEX_PAGE_SIZE'),
+                                        before=params.get('cursor'), status=params.get('status'),
+                                        room_type=params.get('type'))
+
+        next_url = replace_query_param(request.build_absolute_uri(), 'cursor', cursor) if cursor else None
+        serializer = RoomDetailSerializer()
+        return Response({'next': next_url, 'results': [serializer.to_representation(room) for room in rooms]})
+
+
+class TwilioRoomDetailView(APIView):
+    """
+    A view class to retrieve a room by sid or unique name, from the room index or else from Twilio.
+    """
+
+    def get(self, request, room):
+        return Response(RoomDetailSerializer(retrieve_room(request, room)).data)
@@ -0,0 +1,33 @@
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from django_twilio_access_token.callbacks import event_buffer, get_signature_validator, status_event_from_params
+from django_twilio_access_token.conf import get_setting
+from django_twilio_access_token.rooms import room_cache, room_index
+
+
+@csrf_exempt
+@require_POST
+def status_callback_view(request):
+    """
+    Receive the room and participant events Twilio sends to the `status_callback` of a room.
+
+    The signature of the request is checked with the auth token of its account, the status of the
+    room is updated in the room index, an ended room is dropped from the room cache so its name
+    can be created again, and the event is buffered for the `TWILIO_STATUS_CALLBACK_SINK`, so
+    Twilio is answered at once.
+    """
+    if get_setting('TWILIO_STATUS_CALLBACK_VALIDATE'):
+        validator = get_signature_validator(request.POST.get('AccountSid'))
+        if validator is None or not validator.validate(request.build_absolute_uri(), request.POST,
+                                                       request.META.get('HTTP_X_TWILIO_SIGNATURE')):
+            return HttpResponse(status=403)
+
+    event = status_event_from_params(request.POST)
+    if event.room_sid and event.room_status:
+        room_index.update_status(event.account_sid, event.room_sid, event.room_status)
+    if event.room_name and (event.room_status == 'completed' or event.event == 'room-ended'):
+        room_cache.forget(event.room_name, account_sid=event.account_sid)
+    event_buffer.add(event)
+    return HttpResponse(status=204)
@@ -0,0 +1,104 @@
+import json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from rest_framework.exceptions import APIException
+
+from django_twilio_access_token.cache import token_cache
+from django_twilio_access_token.conf import get_setting
+from django_twilio_access_token.credentials import get_signing_context_for
+from django_twilio_access_token.serializers.twilio_access_token_serializer import (
+    create_video_token, rate_limit_errors, validate_video_token_line
+)
+
+from .policies import check_drf_policies
+from .twilio_video_access_token_view import TwilioVideoAccessTokenBatchView
+
+
+def request_lines(request):
+    """
+    Iterate over the lines of the request body without reading it at once.
+
+    :param django.http.HttpRequest request: Incoming request.
+    """
+    environ = getattr(request, 'environ', {})
+    if not environ.get('CONTENT_LENGTH') and environ.get('wsgi.input_terminated'):
+        # Chunked body: Django only reads up to the content length, the server tells where it ends.
+        return iter(environ['wsgi.input'].readline, b'')
+    return iter(request)
+
+
+def sign_line(line, context, request=None):
+    """
+    Validate one NDJSON video token request, count it against `TWILIO_TOKEN_RATE_LIMITS` and sign it.
+
+    :param bytes line: Line of the request body.
+    :param django_twilio_access_token.signing.SigningContext context: Signing context of the tenant.
+    :param request: Incoming request, or None.
+    :returns: NDJSON line with the token, or the error details.
+    :rtype: bytes
+    """
+    validated_data, errors = validate_video_token_line(line)
+    errors = errors or rate_limit_errors(request, validated_data)
+    if errors:
+        return json.dumps({'errors': errors}).encode() + b'\n'
+
+    token = create_video_token(validated_data, context)
+    return json.dumps({'token': token_cache.get_jwt(token)}, separators=(',', ':')).encode() + b'\n'
+
+
+def stream_tokens(lines, context, request=None):
+    """
+    Sign the video token requests of `lines` on `TWILIO_TOKEN_STREAM_WORKERS` threads and yield
+    the results in input order. At most `TWILIO_TOKEN_STREAM_WINDOW` lines are in flight, so
+    memory does not grow with the number of lines.
+
+    Signing holds the GIL: the threads only overlap signing with reading the request and writing
+    the response, they do not sign faster than a single thread.
+
+    :param iterable lines: Lines of the request body, one JSON video token request per line.
+    :param django_twilio_access_token.signing.SigningContext context: Signing context of the tenant.
+    :param request: Incoming request, or None.
+    """
+    window = get_setting('TWILIO_TOKEN_STREAM_WINDOW')
+    executor = ThreadPoolExecutor(max_workers=get_setting('TWILIO_TOKEN_STREAM_WORKERS'),
+                                  thread_name_prefix='twilio-token-stream')
+    pending = deque()
+    try:
+        for line in lines:
+            if not line.strip():
+                continue
+            pending.append(executor.submit(sign_line, line, context, request))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        # The client may disconnect before the end of the stream.
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+@csrf_exempt
+@require_POST
+def stream_video_tokens_view(request):
+    """
+    Sign video tokens for a roster sent as NDJSON, one `TwilioVideoAccessTokenView` payload per line,
+    and stream them back as NDJSON in input order, `{"token": ...}` or `{"errors": ...}` per line.
+
+    The DRF authentication, permissions and throttling of `TwilioVideoAccessTokenBatchView` apply.
+    """
+    refused = check_drf_policies(request, TwilioVideoAccessTokenBatchView)
+    if refused is not None:
+        return refused
+
+    try:
+        context = get_signing_context_for(request)
+    except APIException as e:
+        return JsonResponse({'detail': e.detail}, status=e.status_code)
+
+    return StreamingHttpResponse(stream_tokens(request_lines(request), context, request), content_type='application/x-ndjson')
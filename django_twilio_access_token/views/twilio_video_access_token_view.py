@@ -1,4 +1,6 @@
-from django_twilio_access_token.serializers import VideoTokenDeserializer, TokenSerializer
+from django_twilio_access_token.serializers import (
+    BatchTokenSerializer, BatchVideoTokenDeserializer, VideoTokenDeserializer, TokenSerializer
+)
 from drf_rw_serializers import generics
 
 
@@ -8,3 +10,11 @@ class TwilioVideoAccessTokenView(generics.CreateAPIView):
     """
     read_serializer_class = TokenSerializer
     write_serializer_class = VideoTokenDeserializer
+
+
+class TwilioVideoAccessTokenBatchView(generics.CreateAPIView):
+    """
+    A view class to create access tokens for many video call participants at once
+    """
+    read_serializer_class = BatchTokenSerializer
+    write_serializer_class = BatchVideoTokenDeserializer
@@ -13,7 +13,7 @@ setuptools.setup(
     long_description=long_description,
     long_description_content_type="text/markdown",
     url="https://github.com/senseobservationsystems/django-twilio-access-token/",
-    packages=setuptools.find_packages(),
+    packages=setuptools.find_packages(exclude=['benchmarks', 'benchmarks.*']),
     classifiers=[
         "Environment :: Web Environment",
         "Framework :: Django",
@@ -34,5 +34,9 @@ setuptools.setup(
         'drf-rw-serializers',
         'python-dateutil',
         'twilio'
-    ]
+    ],
+    extras_require={
+        'prometheus': ['prometheus-client'],
+        'opentelemetry': ['opentelemetry-api'],
+    }
 )
@@ -0,0 +1,24 @@
+import io
+from contextlib import redirect_stdout
+
+from django.test import TestCase
+from unittest.mock import patch
+
+from benchmarks import run
+from django_twilio_access_token.clients import client_registry
+
+
+class TestBenchmarkSuite(TestCase):
+
+    def setUp(self):
+        self.addCleanup(client_registry.reset)
+
+    def test_every_scenario_runs(self):
+        """Test every benchmark scenario runs and is reported, so renames in the package do not break the suite"""
+        output = io.StringIO()
+        # Django is already set up by the test runner.
+        with patch.object(run, 'setup_django'), redirect_stdout(output):
+            run.main(['--iterations', '1', '--warmup', '0'])
+
+        reported = [line.split()[0] for line in output.getvalue().splitlines()[1:len(run.SCENARIOS) + 1]]
+        self.assertEqual(reported, sorted(run.SCENARIOS))
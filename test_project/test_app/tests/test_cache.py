@@ -0,0 +1,103 @@
+from datetime import timedelta
+
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from unittest.mock import patch
+
+from django_twilio_access_token.cache import LRUCache, token_cache
+from django_twilio_access_token.serializers import TokenSerializer, VideoTokenDeserializer
+from django_twilio_access_token.signing import PreparedAccessToken
+
+
+def create_token(**payload):
+    payload.setdefault('room_name', 'some-random-room-name')
+    deserializer = VideoTokenDeserializer(data=payload)
+    deserializer.is_valid(raise_exception=True)
+    return deserializer.save()
+
+
+class TestLRUCache(TestCase):
+
+    def setUp(self):
+        self.now = 0
+        self.cache = LRUCache(max_size=2, timer=lambda: self.now)
+
+    def test_expired_entries_are_dropped(self):
+        """Test entries are not served after their TTL"""
+        self.cache.set('a', 1, ttl=10)
+        self.assertEqual(self.cache.get('a'), 1)
+
+        self.now = 10
+        self.assertIsNone(self.cache.get('a'))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        """Test cache never grows beyond its maximum size"""
+        self.cache.set('a', 1, ttl=10)
+        self.cache.set('b', 2, ttl=10)
+        self.cache.get('a')
+        self.cache.set('c', 3, ttl=10)
+
+        self.assertEqual(self.cache.get('a'), 1)
+        self.assertIsNone(self.cache.get('b'))
+        self.assertEqual(self.cache.get('c'), 3)
+
+
+@override_settings(TWILIO_TOKEN_CACHE_ENABLED=True)
+class TestTokenCache(TestCase):
+
+    def setUp(self):
+        token_cache.clear()
+        token_cache.reset_stats()
+        self.valid_until = (timezone.now() + timedelta(hours=2)).isoformat()
+
+    def test_identical_requests_share_token(self):
+        """Test identical token requests are served from the cache"""
+        first = TokenSerializer(create_token(identity='alice', valid_until=self.valid_until)).data['token']
+        second = TokenSerializer(create_token(identity='alice', valid_until=self.valid_until)).data['token']
+
+        self.assertEqual(first, second)
+        self.assertDictEqual(
+            token_cache.stats(),
+            {'local_hits': 1, 'shared_hits': 0, 'misses': 1, 'hits': 1, 'hit_ratio': 0.5}
+        )
+
+    def test_different_requests_do_not_share_token(self):
+        """Test identity, room and validity window are part of the cache key"""
+        TokenSerializer(create_token(identity='alice', valid_until=self.valid_until)).data
+        TokenSerializer(create_token(identity='bob', valid_until=self.valid_until)).data
+        TokenSerializer(create_token(identity='alice', room_name='other-room', valid_until=self.valid_until)).data
+        TokenSerializer(create_token(identity='alice')).data
+
+        self.assertEqual(token_cache.stats()['misses'], 4)
+
+    def test_token_close_to_expiry_is_not_cached(self):
+        """Test tokens with less than `TWILIO_TOKEN_CACHE_MIN_REMAINING` left are minted again"""
+        valid_until = (timezone.now() + timedelta(minutes=5)).isoformat()
+        TokenSerializer(create_token(identity='alice', valid_until=valid_until)).data
+        TokenSerializer(create_token(identity='alice', valid_until=valid_until)).data
+
+        self.assertEqual(token_cache.stats()['misses'], 2)
+
+    @override_settings(TWILIO_TOKEN_CACHE_BACKEND='default')
+    def test_shared_tier(self):
+        """Test tokens are shared through the Django cache backend"""
+        first = TokenSerializer(create_token(identity='alice', valid_until=self.valid_until)).data['token']
+        token_cache.clear()
+        second = TokenSerializer(create_token(identity='alice', valid_until=self.valid_until)).data['token']
+
+        self.assertEqual(first, second)
+        self.assertEqual(token_cache.stats()['shared_hits'], 1)
+        caches['default'].clear()
+
+    @override_settings(TWILIO_TOKEN_CACHE_ENABLED=False)
+    def test_disabled_cache(self):
+        """Test tokens are always minted when the cache is disabled"""
+        token = create_token(identity='alice', valid_until=self.valid_until)
+        with patch.object(PreparedAccessToken, 'to_jwt', return_value='jwt') as to_jwt:
+            TokenSerializer(token).data
+            TokenSerializer(token).data
+
+        self.assertEqual(to_jwt.call_count, 2)
+        self.assertEqual(token_cache.stats()['misses'], 0)
@@ -0,0 +1,233 @@
+import time
+
+from django.http import QueryDict
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from twilio.request_validator import RequestValidator
+from unittest.mock import Mock, patch
+
+from django_twilio_access_token.callbacks import (
+    BulkCreateSink, EventBuffer, SignatureValidator, StatusEvent, event_buffer, status_event_from_params
+)
+from django_twilio_access_token.rooms import room_index
+
+from .test_credentials import TENANTS
+
+AUTH_TOKEN = 'PUT_YOUR_TWILIO_AUTH_TOKEN_HERE'
+ACCOUNT_SID = 'PUT_YOUR_TWILIO_ACCOUNT_SID_HERE'
+PARAMS = {
+    'AccountSid': ACCOUNT_SID,
+    'RoomSid': 'RM123',
+    'RoomName': 'my-room',
+    'RoomStatus': 'completed',
+    'StatusCallbackEvent': 'room-ended',
+    'Timestamp': '2020-09-01T10:00:00.000Z',
+}
+
+
+class ListSink(object):
+    """Keep the batches written, for the tests."""
+    batches = []
+
+    def write(self, events):
+        self.batches.append(events)
+
+
+class FailingSink(object):
+
+    def write(self, events):
+        raise RuntimeError('Database is down.')
+
+
+def event(room_sid='RM123'):
+    return StatusEvent(ACCOUNT_SID, room_sid, 'my-room', 'in-progress', 'room-created', None, None, None, None, None, {})
+
+
+class TestSignatureValidator(TestCase):
+
+    def test_same_signature_as_twilio(self):
+        """Test signatures are computed like the Twilio request validator does"""
+        params = QueryDict(mutable=True)
+        params.update(PARAMS)
+        url = 'https://example.org/twilio/callbacks/status/?tenant=1'
+
+        self.assertEqual(SignatureValidator(AUTH_TOKEN).compute_signature(url, params),
+                         RequestValidator(AUTH_TOKEN).compute_signature(url, PARAMS))
+
+    def test_validate_with_or_without_port(self):
+        """Test signatures of the URL with or without its default port are accepted"""
+        validator = SignatureValidator(AUTH_TOKEN)
+        params = QueryDict('RoomSid=RM123')
+        signature = validator.compute_signature('https://example.org:443/callbacks/', params)
+
+        self.assertTrue(validator.validate('https://example.org/callbacks/', params, signature))
+        self.assertFalse(validator.validate('https://example.org/other/', params, signature))
+        self.assertFalse(validator.validate('https://example.org/callbacks/', params, None))
+
+
+class TestStatusCallbackView(TestCase):
+    url = 'twilio:status-callback'
+
+    def setUp(self):
+        room_index.clear()
+        self.addCleanup(room_index.clear)
+
+    def post(self, params, signature=None, auth_token=AUTH_TOKEN):
+        if signature is None:
+            signature = RequestValidator(auth_token).compute_signature('http://testserver' + reverse(self.url), params)
+        return self.client.post(reverse(self.url), data=params, HTTP_X_TWILIO_SIGNATURE=signature)
+
+    def test_room_status_is_updated(self):
+        """Test signed callbacks update the status of the indexed room"""
+        room_index.add(ACCOUNT_SID, 'RM123', 'my-room', status='in-progress')
+
+        response = self.post(PARAMS)
+
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(room_index.get(ACCOUNT_SID, 'RM123').status, 'completed')
+
+    def test_invalid_signature(self):
+        """Test callbacks with an invalid signature are refused"""
+        room_index.add(ACCOUNT_SID, 'RM123', 'my-room', status='in-progress')
+
+        response = self.post(PARAMS, signature='invalid')
+
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(room_index.get(ACCOUNT_SID, 'RM123').status, 'in-progress')
+
+    @override_settings(TWILIO_AUTH_TOKEN=None)
+    def test_without_auth_token(self):
+        """Test callbacks are refused without auth token, rather than checked with an empty key"""
+        room_index.add(ACCOUNT_SID, 'RM123', 'my-room', status='in-progress')
+
+        response = self.post(PARAMS, auth_token='')
+
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(room_index.get(ACCOUNT_SID, 'RM123').status, 'in-progress')
+
+    @override_settings(TWILIO_CREDENTIALS_BACKEND='django_twilio_access_token.credentials.SettingsBackend',
+                       TWILIO_TENANTS=TENANTS)
+    def test_tenant_account(self):
+        """Test callbacks of a tenant account are checked with the auth token of the tenant"""
+        params = dict(PARAMS, AccountSid='ACacme')
+        room_index.add('ACacme', 'RM123', 'my-room', status='in-progress')
+
+        self.assertEqual(self.post(params).status_code, 403)
+        self.assertEqual(self.post(params, auth_token='acme-auth-token').status_code, 204)
+        self.assertEqual(room_index.get('ACacme', 'RM123').status, 'completed')
+
+    @override_settings(TWILIO_CREDENTIALS_BACKEND='django_twilio_access_token.credentials.SettingsBackend',
+                       TWILIO_TENANTS=TENANTS)
+    def test_unknown_account(self):
+        """Test callbacks of an account without known auth token are refused"""
+        for account_sid in ('ACinitech', 'ACglobex'):
+            with self.subTest(account_sid=account_sid):
+                response = self.post(dict(PARAMS, AccountSid=account_sid), auth_token='')
+
+                self.assertEqual(response.status_code, 403)
+
+    @override_settings(TWILIO_STATUS_CALLBACK_VALIDATE=False)
+    def test_without_validation(self):
+        """Test signatures are not checked with `TWILIO_STATUS_CALLBACK_VALIDATE` off"""
+        self.assertEqual(self.post(PARAMS, signature='').status_code, 204)
+
+    @override_settings(TWILIO_STATUS_CALLBACK_SINK='test_app.tests.test_callbacks.ListSink')
+    def test_events_are_buffered(self):
+        """Test events are buffered for the sink, with every parameter"""
+        ListSink.batches = []
+
+        self.post(PARAMS)
+        event_buffer.flush()
+
+        self.assertEqual(len(ListSink.batches), 1)
+        event = ListSink.batches[0][0]
+        self.assertEqual((event.room_sid, event.room_status, event.event), ('RM123', 'completed', 'room-ended'))
+        self.assertEqual(event.params, PARAMS)
+
+    def test_get_is_not_allowed(self):
+        """Test only POST requests are accepted"""
+        self.assertEqual(self.client.get(reverse(self.url)).status_code, 405)
+
+
+class TestEventBuffer(TestCase):
+
+    def setUp(self):
+        ListSink.batches = []
+        self.buffer = EventBuffer()
+        self.addCleanup(self.buffer.stop)
+
+    @override_settings(TWILIO_STATUS_CALLBACK_SINK='test_app.tests.test_callbacks.ListSink',
+                       TWILIO_STATUS_CALLBACK_BATCH_SIZE=3, TWILIO_STATUS_CALLBACK_FLUSH_INTERVAL=60)
+    def test_flush_on_batch_size(self):
+        """Test a full batch is written in the background at once"""
+        for i in range(3):
+            self.buffer.add(event('RM{}'.format(i)))
+
+        deadline = time.monotonic() + 5
+        while not ListSink.batches and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual([[e.room_sid for e in batch] for batch in ListSink.batches], [['RM0', 'RM1', 'RM2']])
+        self.assertEqual(self.buffer.stats()['batches'], 1)
+
+    @override_settings(TWILIO_STATUS_CALLBACK_SINK='test_app.tests.test_callbacks.ListSink',
+                       TWILIO_STATUS_CALLBACK_FLUSH_INTERVAL=0.01)
+    def test_flush_on_interval(self):
+        """Test buffered events are written every `TWILIO_STATUS_CALLBACK_FLUSH_INTERVAL` seconds"""
+        self.buffer.add(event())
+
+        deadline = time.monotonic() + 5
+        while not ListSink.batches and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual(len(ListSink.batches), 1)
+
+    @override_settings(TWILIO_STATUS_CALLBACK_SINK='test_app.tests.test_callbacks.ListSink',
+                       TWILIO_STATUS_CALLBACK_MAX_BUFFER=2, TWILIO_STATUS_CALLBACK_FLUSH_INTERVAL=60)
+    def test_max_buffer(self):
+        """Test events beyond `TWILIO_STATUS_CALLBACK_MAX_BUFFER` are dropped"""
+        results = [self.buffer.add(event()) for _ in range(3)]
+
+        self.assertEqual(results, [True, True, False])
+        self.assertEqual(self.buffer.stats()['dropped'], 1)
+
+    @override_settings(TWILIO_STATUS_CALLBACK_SINK='test_app.tests.test_callbacks.FailingSink',
+                       TWILIO_STATUS_CALLBACK_FLUSH_INTERVAL=60)
+    def test_sink_failure(self):
+        """Test sink errors are logged and counted"""
+        self.buffer.add(event())
+
+        with self.assertLogs('django_twilio_access_token.callbacks', 'ERROR'):
+            self.assertEqual(self.buffer.flush(), 0)
+        self.assertEqual(self.buffer.stats()['failed'], 1)
+
+    def test_without_sink(self):
+        """Test events are not buffered without sink"""
+        self.assertFalse(self.buffer.add(event()))
+
+
+class TestBulkCreateSink(TestCase):
+
+    @override_settings(TWILIO_STATUS_CALLBACK_MODEL='test_app.RoomEvent')
+    def test_write(self):
+        """Test a batch is inserted at once, with the model fields named like the event fields"""
+        model = Mock()
+        model._meta.get_fields.return_value = [Mock(), Mock()]
+        model._meta.get_fields.return_value[0].name = 'room_sid'
+        model._meta.get_fields.return_value[1].name = 'id'
+
+        with patch('django_twilio_access_token.callbacks.apps.get_model', return_value=model):
+            sink = BulkCreateSink()
+            sink.write([event('RM1'), event('RM2')])
+
+        model.assert_any_call(room_sid='RM1')
+        model.assert_any_call(room_sid='RM2')
+        model.objects.bulk_create.assert_called_once()
+        self.assertEqual(len(model.objects.bulk_create.call_args[0][0]), 2)
+
+    def test_status_event_from_params(self):
+        """Test events are built from the callback parameters"""
+        event = status_event_from_params(QueryDict('RoomSid=RM1&ParticipantIdentity=alice&Extra=1'))
+
+        self.assertEqual((event.room_sid, event.participant_identity, event.room_status), ('RM1', 'alice', None))
+        self.assertEqual(event.params, {'RoomSid': 'RM1', 'ParticipantIdentity': 'alice', 'Extra': '1'})
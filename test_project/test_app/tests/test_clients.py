@@ -0,0 +1,88 @@
+import threading
+
+from django.test import TestCase, override_settings
+from twilio.base.exceptions import TwilioException
+from twilio.http.response import Response
+from unittest.mock import patch
+
+from django_twilio_access_token.clients import (
+    ClientRegistry, PooledTwilioHttpClient, client_registry, get_client, last_retry_after
+)
+
+
+class TestClientRegistry(TestCase):
+
+    def setUp(self):
+        self.registry = ClientRegistry()
+
+    def tearDown(self):
+        self.registry.reset()
+
+    def test_same_credentials_share_client(self):
+        """Test clients are reused for the same account credentials"""
+        client = self.registry.get_client('AC123', 'AC123', 'secret')
+
+        self.assertIs(self.registry.get_client('AC123', 'AC123', 'secret'), client)
+        self.assertIsInstance(client.http_client, PooledTwilioHttpClient)
+
+    def test_different_credentials_use_different_clients(self):
+        """Test each account gets its own client"""
+        client = self.registry.get_client('AC123', 'AC123', 'secret')
+
+        self.assertIsNot(self.registry.get_client('AC456', 'AC456', 'secret'), client)
+
+    def test_missing_credentials(self):
+        """Test client without credentials can not be created"""
+        with self.assertRaises(TwilioException):
+            self.registry.get_client(None, None, None)
+
+    def test_reset_after_fork(self):
+        """Test clients inherited from a parent process are dropped"""
+        client = self.registry.get_client('AC123', 'AC123', 'secret')
+        self.registry._pid = -1
+
+        self.assertIsNot(self.registry.get_client('AC123', 'AC123', 'secret'), client)
+
+    @override_settings(TWILIO_HTTP_POOL_MAXSIZE=32, TWILIO_HTTP_TIMEOUT=2.5, TWILIO_HTTP_MAX_RETRIES=5)
+    def test_pool_configuration(self):
+        """Test HTTP pool honours the `TWILIO_HTTP_*` settings"""
+        http_client = self.registry.get_client('AC123', 'AC123', 'secret').http_client
+        adapter = http_client.session.get_adapter('https://video.twilio.com')
+
+        self.assertEqual(http_client.timeout, 2.5)
+        self.assertEqual(adapter._pool_maxsize, 32)
+        self.assertEqual(adapter.max_retries.total, 5)
+
+    def test_settings_change_resets_registry(self):
+        """Test process-wide registry is rebuilt when HTTP settings change"""
+        client = get_client('AC123', 'AC123', 'secret')
+        with override_settings(TWILIO_HTTP_TIMEOUT=1):
+            self.assertIsNot(get_client('AC123', 'AC123', 'secret'), client)
+        client_registry.reset()
+
+    def test_base_url_override(self):
+        """Test requests are sent to `base_url` instead of the Twilio API when configured"""
+        http_client = PooledTwilioHttpClient(base_url='http://127.0.0.1:8080')
+        with patch('requests.Session.send') as mock_send:
+            mock_send.return_value.status_code = 201
+            mock_send.return_value.text = '{}'
+            http_client.request('POST', 'https://video.twilio.com/v1/Rooms?Page=1')
+
+        self.assertEqual(mock_send.call_args[0][0].url, 'http://127.0.0.1:8080/v1/Rooms?Page=1')
+
+    def test_last_retry_after(self):
+        """Test `Retry-After` of the last response is read per thread, as seconds or HTTP date"""
+        client = get_client('AC123', 'AC123', 'secret')
+        self.assertIsNone(last_retry_after(client))
+
+        client.http_client.last_response = Response(429, '{}', {'Retry-After': '3'})
+        self.assertEqual(last_retry_after(client), 3)
+        client.http_client.last_response = Response(503, '{}', {'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'})
+        self.assertEqual(last_retry_after(client), 0)
+
+        other_thread = []
+        thread = threading.Thread(target=lambda: other_thread.append(last_retry_after(client)))
+        thread.start()
+        thread.join()
+        self.assertEqual(other_thread, [None])
+        client_registry.reset()
@@ -0,0 +1,226 @@
+import json
+import os
+import tempfile
+
+import jwt
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.exceptions import NotFound
+from rest_framework.test import APITestCase
+from unittest.mock import patch
+
+from django_twilio_access_token.credentials import (
+    CredentialRegistry, JSONFileBackend, SettingsBackend, TwilioCredentials, get_client_for, get_signing_context_for
+)
+
+from .test_views.test_twilio_room_view import mock_create
+
+TENANTS = {
+    'acme': {
+        'account_sid': 'ACacme',
+        'auth_token': 'acme-auth-token',
+        'api_key_sid': 'SKacme',
+        'api_key_secret': 'acme-secret-of-at-least-32-bytes!!',
+    },
+    'globex': {
+        'account_sid': 'ACglobex',
+        'api_key_sid': 'SKglobex',
+        'api_key_secret': 'globex-secret-of-at-least-32-bytes',
+    },
+}
+
+TENANT_SETTINGS = {
+    'TWILIO_TENANT_RESOLVER': 'test_app.tests.test_credentials.header_tenant_resolver',
+    'TWILIO_CREDENTIALS_BACKEND': 'django_twilio_access_token.credentials.SettingsBackend',
+    'TWILIO_TENANTS': TENANTS,
+}
+
+
+def header_tenant_resolver(request):
+    """
+    Tenant of the test requests, from a header only the tests set.
+    """
+    return request.META.get('HTTP_X_TWILIO_TENANT') or None
+
+
+def user_tenant_resolver(request):
+    """
+    Tenant of the test requests, named after the authenticated user.
+    """
+    return request.user.username if request.user.is_authenticated else None
+
+
+class Request(object):
+    def __init__(self, tenant=None):
+        self.META = {'HTTP_X_TWILIO_TENANT': tenant} if tenant else {}
+
+
+@override_settings(**TENANT_SETTINGS)
+class TestCredentialRegistry(TestCase):
+
+    def setUp(self):
+        self.registry = CredentialRegistry()
+
+    def test_get(self):
+        """Test credentials and signing context of a tenant are loaded from the backend"""
+        entry = self.registry.get('acme')
+
+        self.assertEqual(entry.credentials, TwilioCredentials(**TENANTS['acme']))
+        self.assertEqual(entry.signing_context.account_sid, 'ACacme')
+        self.assertEqual(entry.signing_context.signing_key_sid, 'SKacme')
+
+    def test_credentials_are_cached(self):
+        """Test the backend is only consulted on a cache miss"""
+        with patch.object(SettingsBackend, 'load', autospec=True, side_effect=SettingsBackend.load) as load:
+            first = self.registry.get('acme')
+            second = self.registry.get('acme')
+
+        self.assertIs(first, second)
+        load.assert_called_once()
+
+    @override_settings(TWILIO_CREDENTIALS_CACHE_TTL=0)
+    def test_credentials_expire(self):
+        """Test credentials are loaded again once expired"""
+        self.assertIsNot(self.registry.get('acme'), self.registry.get('acme'))
+
+    def test_unknown_tenant(self):
+        """Test unknown tenants are not found, and remembered as such"""
+        with patch.object(SettingsBackend, 'load', autospec=True, return_value=None) as load:
+            for _ in range(2):
+                with self.assertRaises(NotFound):
+                    self.registry.get('initech')
+
+        load.assert_called_once()
+
+    def test_resolve(self):
+        """Test the tenant of a request is given by the configured resolver"""
+        self.assertEqual(self.registry.resolve(Request('acme')), 'acme')
+        self.assertIsNone(self.registry.resolve(Request()))
+        self.assertIsNone(self.registry.resolve(None))
+
+    def test_tenant_of_account(self):
+        """Test the tenant of an account is found among the loaded tenants, then by the backend"""
+        self.registry.get('globex')
+
+        with patch.object(SettingsBackend, 'find_tenant', autospec=True, return_value='acme') as find_tenant:
+            self.assertEqual(self.registry.tenant_of_account('ACglobex'), 'globex')
+            find_tenant.assert_not_called()
+            self.assertEqual(self.registry.tenant_of_account('ACacme'), 'acme')
+
+        self.assertIsNone(self.registry.tenant_of_account('ACinitech'))
+        with override_settings(TWILIO_CREDENTIALS_BACKEND=None):
+            self.assertIsNone(CredentialRegistry().tenant_of_account('ACacme'))
+
+    @override_settings(TWILIO_CREDENTIALS_BACKEND=None)
+    def test_missing_backend(self):
+        """Test resolving tenants without backend is a misconfiguration"""
+        with self.assertRaises(ImproperlyConfigured):
+            self.registry.get('acme')
+
+
+class TestJSONFileBackend(TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.json')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(TENANTS, f)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_load(self):
+        """Test credentials are read from the file"""
+        backend = JSONFileBackend(self.path)
+
+        self.assertEqual(backend.load('globex'), TwilioCredentials(**TENANTS['globex']))
+        self.assertIsNone(backend.load('initech'))
+
+    def test_find_tenant(self):
+        """Test the tenant of an account is found in the file"""
+        backend = JSONFileBackend(self.path)
+
+        self.assertEqual(backend.find_tenant('ACacme'), 'acme')
+        self.assertIsNone(backend.find_tenant('ACinitech'))
+
+    def test_reload(self):
+        """Test the file is read again once modified"""
+        backend = JSONFileBackend(self.path)
+        backend.load('acme')
+        with open(self.path, 'w') as f:
+            json.dump({'initech': TENANTS['acme']}, f)
+        os.utime(self.path, (0, 0))
+
+        self.assertIsNone(backend.load('acme'))
+        self.assertEqual(backend.load('initech').account_sid, 'ACacme')
+
+    def test_missing_path(self):
+        """Test the file path is required"""
+        with self.assertRaises(ImproperlyConfigured):
+            JSONFileBackend()
+
+
+@override_settings(**TENANT_SETTINGS)
+class TestTenantLookups(TestCase):
+
+    def test_signing_context(self):
+        """Test requests without tenant are signed for the account of the settings"""
+        self.assertEqual(get_signing_context_for(Request('globex')).signing_key_sid, 'SKglobex')
+        self.assertEqual(get_signing_context_for(Request()).signing_key_sid, 'PUT_YOUR_TWILIO_VIDEO_API_KEY_SID_HERE')
+
+    def test_client(self):
+        """Test tenants without auth token authenticate their client with the API key"""
+        acme = get_client_for(Request('acme'))
+        globex = get_client_for(Request('globex'))
+
+        self.assertEqual((acme.account_sid, acme.username, acme.password), ('ACacme', 'ACacme', 'acme-auth-token'))
+        self.assertEqual((globex.account_sid, globex.username), ('ACglobex', 'SKglobex'))
+
+
+@override_settings(**TENANT_SETTINGS)
+class TestTenantViews(APITestCase):
+
+    def test_token_is_signed_for_tenant(self):
+        """Test tokens are issued by the API key of the tenant of the request"""
+        for url in ('twilio:twilio-token-video', 'twilio:fast-twilio-token-video'):
+            with self.subTest(url=url):
+                response = self.client.post(reverse(url), data={"room_name": "some-room"}, format='json',
+                                            HTTP_X_TWILIO_TENANT='acme')
+
+                self.assertEqual(response.status_code, 201)
+                token = jwt.decode(response.json()['token'], TENANTS['acme']['api_key_secret'], algorithms=['HS256'])
+                self.assertEqual((token['iss'], token['sub']), ('SKacme', 'ACacme'))
+
+    @override_settings(TWILIO_TENANT_RESOLVER='test_app.tests.test_credentials.user_tenant_resolver')
+    def test_tenant_of_authenticated_user(self):
+        """Test the resolver sees the user authenticated by DRF, on the DRF, fast and async views"""
+        self.client.force_login(User.objects.create_user('acme'))
+        for url in ('twilio:twilio-token-video', 'twilio:fast-twilio-token-video', 'twilio:async-twilio-token-video'):
+            with self.subTest(url=url):
+                response = self.client.post(reverse(url), data={"room_name": "some-room"}, format='json')
+
+                self.assertEqual(response.status_code, 201)
+                token = jwt.decode(response.json()['token'], TENANTS['acme']['api_key_secret'], algorithms=['HS256'])
+                self.assertEqual(token['sub'], 'ACacme')
+
+    def test_unknown_tenant(self):
+        """Test requests of an unknown tenant are answered with 404"""
+        for url in ('twilio:twilio-token-video', 'twilio:fast-twilio-token-video'):
+            with self.subTest(url=url):
+                response = self.client.post(reverse(url), data={"room_name": "some-room"}, format='json',
+                                            HTTP_X_TWILIO_TENANT='initech')
+
+                self.assertEqual(response.status_code, 404)
+                self.assertDictEqual(response.json(), {'detail': 'Unknown tenant.'})
+
+    @patch('twilio.rest.video.v1.room.RoomList.create', side_effect=mock_create, autospec=True)
+    def test_room_is_created_for_tenant(self, mock_room_create):
+        """Test rooms are created in the Twilio account of the tenant of the request"""
+        request_body = {"room_name": '1234567890123456789012345678901234', "type": "group"}
+        response = self.client.post(reverse('twilio:group-room'), data=request_body, format='json',
+                                    HTTP_X_TWILIO_TENANT='globex')
+
+        self.assertEqual(response.status_code, 201)
+        room_list = mock_room_create.call_args[0][0]
+        self.assertEqual(room_list._version.domain.twilio.account_sid, 'ACglobex')
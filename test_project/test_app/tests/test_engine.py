@@ -0,0 +1,112 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+import jwt
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from unittest.mock import patch
+
+from django_twilio_access_token.engine import SigningEngine, TokenSpec
+from django_twilio_access_token.keyring import SIGNING_KEYS_CACHE_KEY, CacheKeySource, key_rotation, publish_signing_keys
+from django_twilio_access_token.serializers import TokenSerializer, VideoTokenDeserializer
+
+NOW = 1600000000
+PAYLOADS = [
+    {'identity': 'alice', 'room_name': 'room-1', 'valid_until': '2030-10-17T15:53:00+07:00'},
+    {'identity': 'bob', 'room_name': 'room-2'},
+    {'room_name': 'room-3'},
+    {'identity': 'carol', 'room_name': 'room-4'},
+    {'identity': 'dave', 'room_name': 'room-5', 'valid_until': '2030-10-17T15:53:00'},
+]
+
+
+OLD_KEY = {'sid': 'SKold', 'secret': 'old-secret-of-at-least-32-bytes!!!'}
+NEW_KEY = {'sid': 'SKnew', 'secret': 'new-secret-of-at-least-32-bytes!!!', 'not_before': '2020-01-01T00:00:00Z'}
+
+
+def reference_token(payload):
+    """Sign a payload through `VideoTokenDeserializer` at `NOW`."""
+    deserializer = VideoTokenDeserializer(data=payload)
+    deserializer.is_valid(raise_exception=True)
+    deserializer.save()
+    with patch('django_twilio_access_token.signing.time.time', return_value=NOW):
+        return TokenSerializer(deserializer.instance).data['token']
+
+
+def issuer(token, secret):
+    """Check the signature of a token signed at `NOW` and return its issuer."""
+    return jwt.decode(token, secret, algorithms=['HS256'], options={'verify_exp': False})['iss']
+
+
+def spec_of(payload):
+    deserializer = VideoTokenDeserializer(data=payload)
+    deserializer.is_valid(raise_exception=True)
+    return TokenSpec(**deserializer.validated_data)
+
+
+class TestSigningEngine(TestCase):
+
+    def test_same_tokens_as_deserializer(self):
+        """Test the engine signs the same tokens as `VideoTokenDeserializer`, in this process"""
+        with SigningEngine.from_settings(workers=1) as engine:
+            tokens = engine.sign([spec_of(payload) for payload in PAYLOADS], now=NOW)
+
+        self.assertEqual(tokens, [reference_token(payload) for payload in PAYLOADS])
+
+    def test_same_tokens_in_worker_processes(self):
+        """Test tokens signed by worker processes are the same and in input order"""
+        with SigningEngine.from_settings(workers=2, chunk_size=2) as engine:
+            tokens = engine.sign([spec_of(payload) for payload in PAYLOADS], now=NOW)
+
+        self.assertEqual(tokens, [reference_token(payload) for payload in PAYLOADS])
+
+    @override_settings(TWILIO_SIGNING_KEYS_CACHE='default')
+    def test_rotated_keys(self):
+        """Test the engine signs with the active key, picked again for each batch"""
+        self.addCleanup(caches['default'].delete, SIGNING_KEYS_CACHE_KEY)
+        publish_signing_keys([OLD_KEY], 'default')
+        key_rotation.start()
+        key_rotation.wait(2)
+        specs = [spec_of(payload) for payload in PAYLOADS]
+
+        with SigningEngine.from_settings(workers=2, chunk_size=2) as engine:
+            before = engine.sign(specs, now=NOW)
+            publish_signing_keys([OLD_KEY, NEW_KEY], 'default')
+            key_rotation.refresh(CacheKeySource('default'))
+            after = engine.sign(specs, now=NOW)
+
+        self.assertEqual({issuer(token, OLD_KEY['secret']) for token in before}, {'SKold'})
+        self.assertEqual({issuer(token, NEW_KEY['secret']) for token in after}, {'SKnew'})
+
+    def test_extra_grants(self):
+        """Test grants of a spec are signed next to its video grant"""
+        engine = SigningEngine('ACxxx', 'SKxxx', 'secret', workers=1)
+        token = engine.sign([TokenSpec(identity='alice', room_name='room', grants={'chat': {'service_sid': 'ISxxx'}})],
+                            now=NOW)[0]
+
+        self.assertEqual(token, engine.context.sign(
+            {'chat': {'service_sid': 'ISxxx'}, 'video': {'room': 'room'}}, identity='alice', now=NOW))
+
+
+class TestSignVideoTokensCommand(TestCase):
+
+    def test_command(self):
+        """Test the command writes a token or errors per roster line, in input order"""
+        fd, path = tempfile.mkstemp(suffix='.ndjson')
+        self.addCleanup(os.remove, path)
+        with os.fdopen(fd, 'w') as f:
+            f.write('{"identity": "alice", "room_name": "room-1"}\n\n{"identity": "bob"}\nnot json\n')
+        output = StringIO()
+
+        with patch('django_twilio_access_token.engine.time.time', return_value=NOW):
+            call_command('sign_video_tokens', path, workers=1, stdout=output)
+
+        lines = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(lines, [
+            {'token': reference_token({'identity': 'alice', 'room_name': 'room-1'})},
+            {'errors': {'room_name': ['This field is required.']}},
+            {'errors': {'non_field_errors': ['Invalid JSON.']}},
+        ])
@@ -0,0 +1,137 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from unittest.mock import MagicMock, Mock, patch
+
+from django_twilio_access_token.instrumentation import (
+    Hook, Instrumentation, OpenTelemetryHook, PrometheusHook, instrumentation
+)
+
+from .test_views.test_twilio_room_view import mock_create
+
+
+class RecordingHook(Hook):
+    def __init__(self):
+        self.events = []
+
+    def enter(self, phase, tags):
+        self.events.append(('enter', phase))
+        return phase
+
+    def exit(self, phase, tags, state, duration, error):
+        self.events.append(('exit', phase, state, duration >= 0, error))
+
+
+class TestInstrumentation(TestCase):
+
+    def setUp(self):
+        self.instrumentation = Instrumentation()
+        self.hook = RecordingHook()
+
+    def test_no_hook(self):
+        """Test phases are not timed when no hook is registered"""
+        first = self.instrumentation.measure('token.sign')
+        second = self.instrumentation.measure('room.create')
+
+        self.assertIs(first, second)
+        with first:
+            pass
+
+    def test_hook_is_notified(self):
+        """Test hooks are notified around a phase with its duration"""
+        self.instrumentation.add_hook(self.hook)
+        with self.instrumentation.measure('token.sign'):
+            pass
+
+        self.assertEqual(self.hook.events, [('enter', 'token.sign'), ('exit', 'token.sign', 'token.sign', True, None)])
+
+    def test_hook_is_notified_of_errors(self):
+        """Test hooks receive the error raised by a phase, which is raised further"""
+        self.instrumentation.add_hook(self.hook)
+        error = ValueError('boom')
+        with self.assertRaises(ValueError):
+            with self.instrumentation.measure('room.create'):
+                raise error
+
+        self.assertIs(self.hook.events[-1][-1], error)
+
+    def test_remove_hook(self):
+        """Test removed hooks are no longer notified"""
+        self.instrumentation.add_hook(self.hook)
+        self.instrumentation.remove_hook(self.hook)
+        with self.instrumentation.measure('token.sign'):
+            pass
+
+        self.assertEqual(self.hook.events, [])
+
+    @override_settings(TWILIO_INSTRUMENTATION_HOOKS=['test_app.tests.test_instrumentation.RecordingHook'])
+    def test_load_settings(self):
+        """Test hooks are loaded from settings, replacing the ones loaded before"""
+        self.instrumentation.add_hook(self.hook)
+        self.instrumentation.load_settings()
+        self.instrumentation.load_settings()
+
+        self.assertEqual(len(self.instrumentation.hooks), 2)
+        self.assertIs(self.instrumentation.hooks[0], self.hook)
+        self.assertIsInstance(self.instrumentation.hooks[1], RecordingHook)
+
+
+class TestAdapters(TestCase):
+
+    def test_prometheus_hook(self):
+        """Test phase durations are observed in the histogram labelled by phase and outcome"""
+        histogram = Mock()
+        hook = PrometheusHook(histogram=histogram)
+        hook.exit('room.create', {}, None, 0.25, ValueError())
+
+        histogram.labels.assert_called_once_with(phase='room.create', outcome='error')
+        histogram.labels.return_value.observe.assert_called_once_with(0.25)
+
+    def test_opentelemetry_hook(self):
+        """Test each phase is traced as a span ended with its error"""
+        tracer = MagicMock()
+        hook = OpenTelemetryHook(tracer=tracer)
+        error = ValueError('boom')
+        state = hook.enter('room.create', {'room_type': 'group'})
+        hook.exit('room.create', {'room_type': 'group'}, state, 0.25, error)
+
+        tracer.start_as_current_span.assert_called_once_with('twilio.room.create', attributes={'room_type': 'group'})
+        span = tracer.start_as_current_span.return_value
+        span.__enter__.assert_called_once()
+        span.__exit__.assert_called_once_with(ValueError, error, None)
+
+    @patch.dict('sys.modules', {'prometheus_client': None, 'opentelemetry': None})
+    def test_missing_packages(self):
+        """Test adapters without their optional package are reported as misconfiguration"""
+        with self.assertRaises(ImproperlyConfigured):
+            PrometheusHook()
+        with self.assertRaises(ImproperlyConfigured):
+            OpenTelemetryHook()
+
+
+class TestInstrumentedViews(APITestCase):
+
+    def setUp(self):
+        self.hook = RecordingHook()
+        instrumentation.add_hook(self.hook)
+
+    def tearDown(self):
+        instrumentation.remove_hook(self.hook)
+
+    def phases(self):
+        return [event[1] for event in self.hook.events if event[0] == 'exit']
+
+    def test_token_phases(self):
+        """Test validation, creation and signing of a token are instrumented"""
+        self.client.post(reverse('twilio:twilio-token-video'), data={"room_name": "some-room"}, format='json')
+
+        self.assertEqual(self.phases(), ['token.validate', 'token.create', 'token.sign'])
+
+    @patch('twilio.rest.video.v1.room.RoomList.create', side_effect=mock_create)
+    def test_room_phases(self, mock_room_create):
+        """Test validation, client lookup and the upstream call of a room creation are instrumented"""
+        request_body = {"room_name": '1234567890123456789012345678901234', "type": "group"}
+        self.client.post(reverse('twilio:group-room'), data=request_body, format='json')
+
+        self.assertEqual(self.phases(), ['room.validate', 'room.client', 'room.create'])
@@ -0,0 +1,163 @@
+import threading
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIRequestFactory, APITestCase
+from unittest.mock import patch
+
+from django_twilio_access_token.jobs import FAILED, PENDING, SUCCEEDED, Job, respond_async, room_jobs
+from django_twilio_access_token.resilience import UpstreamUnavailable
+
+from .test_views.test_twilio_room_view import mock_create
+
+ROOM_NAME = '1234567890123456789012345678901234'
+
+
+class InlineBackend(object):
+    """Run jobs when submitted, so tests do not wait on threads."""
+
+    def submit(self, job, fn):
+        job.run(fn)
+
+
+class TestJob(TestCase):
+
+    def test_success(self):
+        """Test the result of a job is kept with a 201 status"""
+        job = Job()
+        job.run(lambda: {'sid': 'RM123'})
+
+        self.assertEqual((job.status, job.status_code, job.result), (SUCCEEDED, 201, {'sid': 'RM123'}))
+
+    def test_api_error(self):
+        """Test API errors of a job are kept as response"""
+        job = Job()
+
+        def fail():
+            raise ValidationError({'twilio_err_code': 20503})
+        job.run(fail)
+
+        self.assertEqual((job.status, job.status_code), (FAILED, 400))
+        self.assertEqual(job.result, {'twilio_err_code': '20503'})
+        self.assertIsNone(job.wait)
+
+    def test_unavailable_error(self):
+        """Test errors with a plain detail are kept like DRF answers them, with their wait"""
+        job = Job()
+
+        def fail():
+            raise UpstreamUnavailable(wait=3)
+        job.run(fail)
+
+        self.assertEqual((job.status, job.status_code, job.wait), (FAILED, 503, 3))
+        self.assertEqual(job.result, {'detail': 'Twilio is unavailable, try again later.'})
+
+    def test_unexpected_error(self):
+        """Test unexpected errors of a job are answered as server errors"""
+        job = Job()
+
+        def fail():
+            raise ValueError('boom')
+        with self.assertLogs('django_twilio_access_token.jobs', level='ERROR'):
+            job.run(fail)
+
+        self.assertEqual((job.status, job.status_code), (FAILED, 500))
+
+    def test_respond_async(self):
+        """Test room creations are answered early according to the mode and `Prefer` header"""
+        factory = APIRequestFactory()
+        prefer = factory.post('/', HTTP_PREFER='return=minimal, respond-async')
+        plain = factory.post('/')
+
+        with override_settings(TWILIO_ROOM_JOBS_MODE=None):
+            self.assertFalse(respond_async(prefer))
+        with override_settings(TWILIO_ROOM_JOBS_MODE='prefer'):
+            self.assertTrue(respond_async(prefer))
+            self.assertFalse(respond_async(plain))
+        with override_settings(TWILIO_ROOM_JOBS_MODE='always'):
+            self.assertTrue(respond_async(plain))
+
+
+@override_settings(TWILIO_ROOM_JOBS_MODE='prefer')
+class TestRoomJobViews(APITestCase):
+
+    def setUp(self):
+        self.request_body = {"room_name": ROOM_NAME, "type": "group"}
+
+    def post(self, url='twilio:group-room', body=None):
+        return self.client.post(reverse(url), data=body or self.request_body, format='json',
+                                HTTP_PREFER='respond-async')
+
+    @override_settings(TWILIO_ROOM_JOBS_BACKEND='test_app.tests.test_jobs.InlineBackend')
+    @patch('twilio.rest.video.v1.room.RoomList.create', side_effect=mock_create)
+    def test_created_room_is_polled(self, mock_room_create):
+        """Test a room creation is answered with 202 and its job answers the room once done"""
+        response = self.post()
+
+        self.assertEqual(response.status_code, 202)
+        job_url = reverse('twilio:room-job', kwargs={'job_id': response.data['job_id']})
+        self.assertEqual(response['Location'], job_url)
+
+        response = self.client.get(job_url)
+        self.assertEqual(response.status_code, 201)
+        self.assertDictEqual(response.data, {"room_name": ROOM_NAME, "sid": "random-session-id"})
+
+    @override_settings(TWILIO_ROOM_JOBS_BACKEND='test_app.tests.test_jobs.InlineBackend')
+    @patch('twilio.rest.video.v1.room.RoomList.create', side_effect=mock_create)
+    def test_peer_to_peer_room(self, mock_room_create):
+        """Test peer-to-peer room creations can be run in the background too"""
+        response = self.post('twilio:peer-to-peer-room', {"room_name": ROOM_NAME, "type": "peer-to-peer"})
+
+        self.assertEqual(response.status_code, 202)
+
+    def test_pending_job(self):
+        """Test a job is reported pending until Twilio answered, without holding the request"""
+        answered = threading.Event()
+
+        def slow_create(*args, **kwargs):
+            answered.wait(5)
+            return mock_create()
+
+        with patch('twilio.rest.video.v1.room.RoomList.create', side_effect=slow_create):
+            response = self.post()
+            job_url = response['Location']
+            pending = self.client.get(job_url)
+            answered.set()
+            while room_jobs.get(response.data['job_id']).status == PENDING:
+                answered.wait(0.01)
+
+        self.assertEqual(pending.status_code, 202)
+        self.assertDictEqual(pending.data, {'job_id': response.data['job_id'], 'status': PENDING})
+        self.assertEqual(self.client.get(job_url).status_code, 201)
+
+    @override_settings(TWILIO_ROOM_JOBS_BACKEND='test_app.tests.test_jobs.InlineBackend')
+    @patch('django_twilio_access_token.serializers.twilio_room_serializer.room_guard.call',
+           side_effect=UpstreamUnavailable(wait=3))
+    def test_failed_job_is_answered_like_the_creation(self, mock_call):
+        """Test a failed job answers the same payload and `Retry-After` as the creation would have"""
+        job_response = self.client.get(self.post()['Location'])
+        response = self.client.post(reverse('twilio:group-room'), data=self.request_body, format='json')
+
+        self.assertEqual(job_response.status_code, 503)
+        self.assertEqual(job_response.json(), response.json())
+        self.assertEqual(job_response['Retry-After'], response['Retry-After'])
+
+    def test_invalid_payload_is_rejected_at_once(self):
+        """Test invalid payloads are answered with 400 without creating a job"""
+        response = self.post(body={"room_name": "too-short", "type": "group"})
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_unknown_job(self):
+        """Test polling an unknown job is answered with 404"""
+        response = self.client.get(reverse('twilio:room-job', kwargs={'job_id': 'unknown'}))
+
+        self.assertEqual(response.status_code, 404)
+
+    @patch('twilio.rest.video.v1.room.RoomList.create', side_effect=mock_create)
+    def test_without_prefer_header(self, mock_room_create):
+        """Test room creations without `Prefer: respond-async` are answered once done"""
+        response = self.client.post(reverse('twilio:group-room'), data=self.request_body, format='json')
+
+        self.assertEqual(response.status_code, 201)
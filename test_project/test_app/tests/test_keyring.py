@@ -0,0 +1,170 @@
+import json
+import os
+import tempfile
+import threading
+import time
+
+import jwt
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from unittest.mock import patch
+
+from django_twilio_access_token.keyring import (
+    FileKeySource, KeyRing, SigningKey, key_rotation, publish_signing_keys, signing_key_from_dict
+)
+
+OLD_KEY = {'sid': 'SKold', 'secret': 'old-secret-of-at-least-32-bytes!!!', 'not_after': '2030-01-01T00:00:00Z'}
+NEW_KEY = {'sid': 'SKnew', 'secret': 'new-secret-of-at-least-32-bytes!!!', 'not_before': '2020-01-01T00:00:00Z'}
+NOW = 1600000000
+
+
+class TestKeyRing(TestCase):
+
+    def setUp(self):
+        self.ring = KeyRing('ACxxx', [
+            SigningKey('SKold', 'old-secret', not_before=None, not_after=NOW + 200),
+            SigningKey('SKnew', 'new-secret', not_before=NOW + 100, not_after=None),
+        ])
+
+    def sid_at(self, now):
+        context = self.ring.get_signing_context(now=now)
+        return context.signing_key_sid if context is not None else None
+
+    def test_rotation(self):
+        """Test the most recently activated key signs once active, while the old one has not expired yet"""
+        self.assertEqual(self.sid_at(NOW), 'SKold')
+        self.assertEqual(self.sid_at(NOW + 100), 'SKnew')
+        self.assertEqual(self.sid_at(NOW + 300), 'SKnew')
+
+    def test_no_active_key(self):
+        """Test no key is returned when every key expired"""
+        ring = KeyRing('ACxxx', [SigningKey('SKold', 'old-secret', not_after=NOW)])
+
+        self.assertIsNone(ring.get_signing_context(now=NOW))
+
+    def test_key_from_dict(self):
+        """Test activation and expiry are read from ISO 8601 datetimes or timestamps"""
+        key = signing_key_from_dict({'sid': 'SKxxx', 'secret': 'secret', 'not_before': '2020-09-13T12:26:40Z',
+                                     'not_after': NOW + 1})
+
+        self.assertEqual(key, SigningKey('SKxxx', 'secret', not_before=NOW, not_after=NOW + 1))
+
+
+class TestKeyRotation(APITestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+        self.write([OLD_KEY])
+        self.settings = override_settings(TWILIO_SIGNING_KEYS_FILE=self.path, TWILIO_SIGNING_KEYS_POLL_INTERVAL=0.01)
+        self.settings.enable()
+        key_rotation.start()
+        key_rotation.wait(2)
+
+    def tearDown(self):
+        self.settings.disable()
+        os.remove(self.path)
+
+    def write(self, keys):
+        with open(self.path, 'w') as f:
+            json.dump(keys, f)
+
+    def issuer(self):
+        response = self.client.post(reverse('twilio:twilio-token-video'), data={"room_name": "some-room"}, format='json')
+        return jwt.decode(response.data['token'], options={'verify_signature': False})['iss']
+
+    def test_keys_are_loaded(self):
+        """Test tokens are signed with the active key of the file"""
+        self.assertEqual(self.issuer(), 'SKold')
+
+    def test_new_keys_are_polled(self):
+        """Test new keys are picked up in the background without restart"""
+        self.assertEqual(self.issuer(), 'SKold')
+        self.write([OLD_KEY, NEW_KEY])
+
+        deadline = time.time() + 2
+        while key_rotation.ring.keys[0].sid != 'SKnew' and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.issuer(), 'SKnew')
+
+    def test_invalid_keys_are_ignored(self):
+        """Test the current keys are kept when the file cannot be loaded"""
+        with open(self.path, 'w') as f:
+            f.write('{"sid": ')
+        with self.assertLogs('django_twilio_access_token.keyring', level='ERROR'):
+            key_rotation.refresh(FileKeySource(self.path))
+
+        self.assertEqual(self.issuer(), 'SKold')
+
+    def test_keys_are_read_outside_the_lock(self):
+        """Test a slow read of the keys does not hold the lock, which a fork would leave held in the child"""
+        self.write([OLD_KEY, NEW_KEY])
+        source = FileKeySource(self.path)
+        read = source.read
+        locked = []
+
+        def read_while_checking():
+            locked.append(key_rotation._lock.locked())
+            return read()
+
+        with patch.object(source, 'read', side_effect=read_while_checking):
+            key_rotation.refresh(source)
+
+        self.assertEqual(locked, [False])
+        self.assertEqual(self.issuer(), 'SKnew')
+
+    def test_reset_after_fork(self):
+        """Test a child gets a new lock and keeps the keys inherited from its parent"""
+        lock = key_rotation._lock
+
+        with lock:
+            key_rotation.reset_after_fork()
+
+        self.assertIsNot(key_rotation._lock, lock)
+        self.assertFalse(key_rotation._lock.locked())
+        self.assertEqual(self.issuer(), 'SKold')
+
+    def test_keys_are_loaded_in_the_background(self):
+        """Test starting does not read the keys on the request, which signs with the key of the settings until they are loaded"""
+        key_rotation.stop()
+        source = FileKeySource(self.path)
+        release = threading.Event()
+        readers = []
+
+        def slow_read():
+            readers.append(threading.current_thread().name)
+            release.wait(2)
+            return FileKeySource.read(source)
+
+        with patch.object(key_rotation, 'source', return_value=source), \
+                patch.object(source, 'read', side_effect=slow_read):
+            self.assertEqual(self.issuer(), 'PUT_YOUR_TWILIO_VIDEO_API_KEY_SID_HERE')
+            release.set()
+            self.assertTrue(key_rotation.wait(2))
+
+        self.assertEqual(readers[0], 'twilio-signing-keys')
+        self.assertEqual(self.issuer(), 'SKold')
+
+    def test_fallback_to_settings(self):
+        """Test tokens are signed with the key of the settings when no key is active"""
+        key_rotation.stop()
+        self.write([dict(OLD_KEY, not_after='2020-01-01T00:00:00Z')])
+        key_rotation.start()
+        key_rotation.wait(2)
+
+        self.assertEqual(self.issuer(), 'PUT_YOUR_TWILIO_VIDEO_API_KEY_SID_HERE')
+
+
+@override_settings(TWILIO_SIGNING_KEYS_CACHE='default')
+class TestCacheKeySource(APITestCase):
+
+    def test_published_keys(self):
+        """Test keys published to the cache are used to sign tokens"""
+        publish_signing_keys([NEW_KEY], 'default')
+        key_rotation.start()
+        key_rotation.wait(2)
+        response = self.client.post(reverse('twilio:twilio-token-video'), data={"room_name": "some-room"}, format='json')
+
+        token = jwt.decode(response.data['token'], NEW_KEY['secret'], algorithms=['HS256'])
+        self.assertEqual(token['iss'], 'SKnew')
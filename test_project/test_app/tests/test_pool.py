@@ -0,0 +1,159 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from twilio.base.exceptions import TwilioRestException
+from unittest.mock import patch
+
+from django_twilio_access_token.pool import RoomPool, room_pool
+from django_twilio_access_token.rooms import RoomRecord
+
+
+class FakeTimer(object):
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def mock_create(*args, **kwargs):
+    """
+    A mock function for `twilio.rest.Client.video.rooms.create` answering the requested room.
+    """
+    from twilio.rest.video.v1.room import RoomInstance
+    return RoomInstance(version='test', payload={'unique_name': kwargs['unique_name'], 'sid': 'RM' + kwargs['unique_name']})
+
+
+@override_settings(TWILIO_ROOM_POOL_SIZES={'group': 2, 'peer-to-peer': 1},
+                   TWILIO_ROOM_POOL_PARAMS={'peer-to-peer': {'enable_turn': False}}, TWILIO_ROOM_POOL_MAX_AGE=60)
+class TestRoomPool(TestCase):
+
+    def setUp(self):
+        self.timer = FakeTimer()
+        self.pool = RoomPool(timer=self.timer)
+        # Refills are run by the tests, not by a thread.
+        self.pool.start = lambda: None
+
+    @patch('twilio.rest.video.v1.room.RoomList.create', side_effect=mock_create)
+    def test_refill(self, mock_room_create):
+        """Test refilling creates rooms until every pool is full, with the parameters of their type"""
+        self.pool.refill()
+        self.pool.refill()
+
+        self.assertEqual(self.pool.stats()['sizes'], {'group': 2, 'peer-to-peer': 1})
+        self.assertEqual(mock_room_create.call_count, 3)
+        mock_room_create.assert_any_call(type='peer-to-peer', enable_turn=False, unique_name=mock_room_create.call_args[1]['unique_name'])
+        self.assertEqual(len(mock_room_create.call_args[1]['unique_name']), 34)
+
+    @patch('twilio.rest.video.v1.room.RoomList.create', side_effect=mock_create)
+    def test_allocate(self, mock_room_create):
+        """Test allocation hands out ready rooms, oldest first, and reports misses"""
+        self.pool.refill()
+        first, second = [room for room, created_at in self.pool.rooms['group']]
+
+        self.assertEqual(self.pool.allocate('group'), first)
+        self.assertEqual(self.pool.allocate('group'), second)
+        self.assertIsNone(self.pool.allocate('group'))
+        self.assertIsNone(self.pool.allocate('group-small'))
+
+        stats = self.pool.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['hit_rate']), (2, 2, 0.5))
+        self.assertEqual(stats['refills'], 3)
+
+    @patch('twilio.rest.video.v1.room.RoomContext.update')
+    @patch('twilio.rest.video.v1.room.RoomList.create', side_effect=mock_create)
+    def test_expired_rooms_are_completed(self, mock_room_create, mock_room_update):
+        """Test rooms unused for `TWILIO_ROOM_POOL_MAX_AGE` are not handed out, and completed at the next refill"""
+        self.pool.refill()
+        self.timer.now += 60
+
+        self.assertIsNone(self.pool.allocate('group'))
+
+        self.pool.refill()
+
+        self.assertEqual(mock_room_update.call_count, 3)
+        mock_room_update.assert_called_with(status='completed')
+        self.assertEqual(self.pool.stats()['expired'], 3)
+        self.assertEqual(self.pool.stats()['sizes'], {'group': 2, 'peer-to-peer': 1})
+        self.assertIsNotNone(self.pool.allocate('group'))
+
+    @patch('twilio.rest.video.v1.room.RoomList.create', side_effect=mock_create)
+    def test_reset_after_fork(self, mock_room_create):
+        """Test a forked child forgets the rooms of its parent and starts again"""
+        self.pool.refill()
+        self.pool.allocate('group')
+
+        self.pool.reset_after_fork()
+
+        self.assertEqual(self.pool.rooms, {})
+        self.assertIsNone(self.pool._pid)
+        self.assertEqual(self.pool.stats()['hits'], 0)
+
+    @patch('twilio.rest.video.v1.room.RoomList.create')
+    def test_refill_failure(self, mock_room_create):
+        """Test Twilio errors while refilling are counted and retried at the next refill"""
+        mock_room_create.side_effect = TwilioRestException(status=500, uri='/Rooms', msg='Error')
+
+        with self.assertLogs('django_twilio_access_token.pool', 'WARNING'):
+            self.pool.refill()
+
+        self.assertEqual(self.pool.stats()['refill_failures'], 2)
+        self.assertEqual(self.pool.stats()['sizes'], {})
+
+
+@override_settings(TWILIO_ROOM_POOL_SIZES={'group': 1})
+class TestTwilioAllocateRoomView(APITestCase):
+
+    def setUp(self):
+        patcher = patch.object(room_pool, 'start')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(room_pool.reset_stats)
+
+    @patch('twilio.rest.video.v1.room.RoomList.create', side_effect=mock_create)
+    def test_allocate_ready_room(self, mock_room_create):
+        """Test a ready room of the pool is handed out without calling Twilio"""
+        room_pool.refill()
+        room = room_pool.rooms['group'][0][0]
+        mock_room_create.reset_mock()
+
+        response = self.client.post(reverse('twilio:allocate-room'), data={'type': 'group'}, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data, {'room_name': room.unique_name, 'sid': room.sid})
+        mock_room_create.assert_not_called()
+
+    @override_settings(TWILIO_ROOM_POOL_PARAMS={'group-small': {'record_participants_on_connect': True}})
+    @patch('twilio.rest.video.v1.room.RoomList.create', side_effect=mock_create)
+    def test_allocate_without_ready_room(self, mock_room_create):
+        """Test a room is created on the spot with the pool parameters when none is ready"""
+        response = self.client.post(reverse('twilio:allocate-room'), data={'type': 'group-small'}, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        mock_room_create.assert_called_once_with(type='group-small', record_participants_on_connect=True,
+                                                 unique_name=response.data['room_name'])
+        self.assertEqual(room_pool.stats()['misses'], 1)
+
+    def test_allocate_with_invalid_type(self):
+        """Test allocating a room of an unknown type is not allowed"""
+        response = self.client.post(reverse('twilio:allocate-room'), data={'type': 'unknown'}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('"unknown" is not a valid choice.', response.data['type'])
+
+    def test_started_by_the_first_request(self):
+        """Test the pool is not started with the app, but by the first request served"""
+        room_pool.stop()
+        room_pool.start.assert_not_called()
+
+        self.client.get(reverse('twilio:allocate-room'))
+
+        room_pool.start.assert_called_once_with()
+
+    def test_settings_change_empties_the_pool(self):
+        """Test the ready rooms are forgotten when the pool settings change"""
+        room_pool.rooms['group'] = [(RoomRecord(sid='RMxxx', unique_name='room'), 0)]
+
+        with override_settings(TWILIO_ROOM_POOL_SIZES={'group': 2}):
+            self.assertEqual(room_pool.rooms, {})
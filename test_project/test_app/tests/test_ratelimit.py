@@ -0,0 +1,177 @@
+import json
+
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from unittest.mock import patch
+
+from django_twilio_access_token.ratelimit import RateLimitShard, TokenRateLimiter, parse_rate, token_rate_limiter
+
+ROOM_LIMITS = {'room_name': '2/min'}
+
+
+class Clock(object):
+
+    def __init__(self, now=6000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestRateLimitShard(TestCase):
+
+    def test_parse_rate(self):
+        """Test rates are read like DRF throttle rates"""
+        self.assertEqual(parse_rate('10/min'), (10, 60))
+        self.assertEqual(parse_rate('1000/hour'), (1000, 3600))
+        self.assertEqual(parse_rate('5/s'), (5, 1))
+
+    def test_limit_within_window(self):
+        """Test requests over the limit of a window are rejected until the window is over"""
+        shard = RateLimitShard(max_keys=10)
+
+        self.assertEqual([shard.hit('alice', 2, 60, 6010) for _ in range(2)], [None, None])
+        self.assertEqual(shard.hit('alice', 2, 60, 6015), 45)
+        self.assertIsNone(shard.hit('bob', 2, 60, 6015))
+
+    def test_sliding_window(self):
+        """Test requests of the previous window count in proportion of its part still in the sliding window"""
+        shard = RateLimitShard(max_keys=10)
+        for _ in range(4):
+            shard.hit('alice', 4, 60, 6000)
+
+        # A quarter into the next window, three quarters of the 4 previous requests still count.
+        self.assertIsNone(shard.hit('alice', 4, 60, 6075))
+        self.assertAlmostEqual(shard.hit('alice', 4, 60, 6075), 15)
+        self.assertIsNone(shard.hit('alice', 4, 60, 6091))
+
+    def test_max_keys(self):
+        """Test the least recently used keys are evicted past `max_keys`"""
+        shard = RateLimitShard(max_keys=2)
+        for key in ('alice', 'bob', 'alice', 'carol'):
+            shard.hit(key, 5, 60, 6000)
+
+        self.assertEqual(list(shard.counters), ['alice', 'carol'])
+
+
+@override_settings(TWILIO_TOKEN_RATE_LIMITS={'identity': '2/min', 'ip': '3/min'})
+class TestTokenRateLimiter(TestCase):
+
+    def setUp(self):
+        self.clock = Clock()
+        self.limiter = TokenRateLimiter(timer=self.clock)
+        self.limiter.build()
+
+    def test_rejected_request_is_not_counted(self):
+        """Test a request rejected for one key does not count for the other keys"""
+        self.assertIsNone(self.limiter.hit([('identity', 'alice'), ('ip', '10.0.0.1')]))
+        self.assertIsNone(self.limiter.hit([('identity', 'alice'), ('ip', '10.0.0.1')]))
+        self.assertIsNotNone(self.limiter.hit([('ip', '10.0.0.1'), ('identity', 'alice')]))
+
+        self.assertIsNone(self.limiter.hit([('identity', 'bob'), ('ip', '10.0.0.1')]))
+        self.assertEqual(self.limiter.stats()['rejected'], {'identity': 1})
+
+    def test_sync(self):
+        """Test counters of several processes add up through the shared cache"""
+        cache = caches['default']
+        cache.clear()
+        other = TokenRateLimiter(timer=self.clock)
+        other.build()
+
+        self.assertIsNone(self.limiter.hit([('identity', 'alice')]))
+        self.assertIsNone(other.hit([('identity', 'alice')]))
+        self.limiter.sync(cache)
+        other.sync(cache)
+        self.limiter.sync(cache)
+
+        self.assertIsNotNone(self.limiter.hit([('identity', 'alice')]))
+        self.assertIsNotNone(other.hit([('identity', 'alice')]))
+        self.assertEqual(self.limiter.stats()['syncs'], 2)
+
+    def test_sync_errors(self):
+        """Test cache errors are logged and the local counters kept"""
+        self.limiter.hit([('identity', 'alice')])
+
+        with patch.object(caches['default'], 'incr', side_effect=ConnectionError('Cache is down.')), \
+                self.assertLogs('django_twilio_access_token.ratelimit', 'ERROR'):
+            self.limiter.sync(caches['default'])
+
+        self.assertEqual(self.limiter.stats()['sync_errors'], 1)
+        self.assertIsNone(self.limiter.hit([('identity', 'alice')]))
+        self.assertIsNotNone(self.limiter.hit([('identity', 'alice')]))
+
+
+@override_settings(TWILIO_TOKEN_RATE_LIMITS=ROOM_LIMITS)
+class TestTokenRateLimitViews(APITestCase):
+    payload = {'identity': 'alice', 'room_name': 'my-room'}
+
+    def setUp(self):
+        token_rate_limiter.stop()
+        token_rate_limiter.reset_stats()
+        self.addCleanup(token_rate_limiter.stop)
+
+    def test_rejected_before_signing(self):
+        """Test requests over the limit are answered 429 with `Retry-After`, without minting a token"""
+        for _ in range(2):
+            self.assertEqual(self.client.post(reverse('twilio:twilio-token-video'), data=self.payload,
+                                              format='json').status_code, 201)
+
+        with patch('django_twilio_access_token.serializers.twilio_access_token_serializer.create_token') as create_token:
+            response = self.client.post(reverse('twilio:twilio-token-video'), data=self.payload, format='json')
+
+        create_token.assert_not_called()
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(response.data['detail'].startswith('Request was throttled.'))
+        self.assertIn('Retry-After', response)
+
+    def test_composite_token_room(self):
+        """Test composite tokens count for the room of their video grant"""
+        data = {'identity': 'alice', 'video': {'room_name': 'my-room'}}
+        statuses = [self.client.post(reverse('twilio:twilio-token'), data=data, format='json').status_code
+                    for _ in range(3)]
+
+        self.assertEqual(statuses, [201, 201, 429])
+
+    @patch.object(token_rate_limiter, '_timer', Clock())
+    def test_fast_view(self):
+        """Test the fast view rejects requests like the DRF view"""
+        for _ in range(2):
+            self.client.post(reverse('twilio:fast-twilio-token-video'), data=self.payload, format='json')
+
+        fast = self.client.post(reverse('twilio:fast-twilio-token-video'), data=self.payload, format='json')
+        drf = self.client.post(reverse('twilio:twilio-token-video'), data=self.payload, format='json')
+
+        self.assertEqual(fast.status_code, 429)
+        self.assertEqual(fast.json(), drf.json())
+        self.assertEqual(fast['Retry-After'], drf['Retry-After'])
+
+    def test_batch_entries(self):
+        """Test each valid batch entry counts, entries over the limit are reported as errors"""
+        tokens = [self.payload, {'identity': 'bob'}, self.payload, self.payload]
+        response = self.client.post(reverse('twilio:twilio-token-video-batch'), data={'tokens': tokens}, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        entries = response.data['tokens']
+        self.assertEqual([sorted(entry) for entry in entries], [['token'], ['errors'], ['token'], ['errors']])
+        self.assertIn('room_name', entries[1]['errors'])
+        self.assertTrue(entries[3]['errors']['non_field_errors'][0].startswith('Request was throttled.'))
+
+    @override_settings(TWILIO_TOKEN_RATE_LIMITS={'ip': '2/min'})
+    def test_stream_lines(self):
+        """Test each stream line counts against the limits of the client IP"""
+        body = ''.join(json.dumps(self.payload) + '\n' for _ in range(3))
+        response = self.client.post(reverse('twilio:twilio-token-video-stream'), data=body,
+                                    content_type='application/x-ndjson')
+        lines = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+
+        self.assertEqual([sorted(line) for line in lines], [['token'], ['token'], ['errors']])
+        self.assertEqual(token_rate_limiter.stats()['rejected'], {'ip': 1})
+
+    @override_settings(TWILIO_TOKEN_RATE_LIMITS={})
+    def test_disabled(self):
+        """Test tokens are not limited without `TWILIO_TOKEN_RATE_LIMITS`"""
+        for _ in range(3):
+            self.assertEqual(self.client.post(reverse('twilio:twilio-token-video'), data=self.payload,
+                                              format='json').status_code, 201)
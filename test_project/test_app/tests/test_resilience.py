@@ -0,0 +1,246 @@
+import threading
+import time
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from requests.exceptions import ConnectTimeout
+from rest_framework.test import APITestCase
+from twilio.base.exceptions import TwilioRestException
+from unittest.mock import Mock, patch
+
+from django_twilio_access_token.resilience import (
+    CLOSED, HALF_OPEN, OPEN, Bulkhead, CircuitBreaker, RetryPolicy, UpstreamUnavailable, room_guard
+)
+
+from .test_views.test_twilio_room_view import mock_create
+
+ROOM_NAME = '1234567890123456789012345678901234'
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestBulkhead(TestCase):
+
+    def test_queue_full(self):
+        """Test callers are rejected at once when every slot is taken and the queue is full"""
+        bulkhead = Bulkhead(max_concurrent=1, max_queue=0)
+        with bulkhead:
+            with self.assertRaises(UpstreamUnavailable):
+                with bulkhead:
+                    pass
+
+        self.assertEqual(bulkhead.rejected, 1)
+        self.assertEqual(bulkhead.active, 0)
+
+    def test_queued_caller_gets_slot(self):
+        """Test a queued caller proceeds once a slot is released"""
+        bulkhead = Bulkhead(max_concurrent=1, max_queue=1, queue_timeout=5)
+        entered = []
+
+        def wait_for_slot():
+            with bulkhead:
+                entered.append(1)
+
+        with bulkhead:
+            thread = threading.Thread(target=wait_for_slot)
+            thread.start()
+            while bulkhead.queued == 0:
+                time.sleep(0.001)
+            self.assertEqual(entered, [])
+        thread.join()
+
+        self.assertEqual(entered, [1])
+        self.assertEqual(bulkhead.rejected, 0)
+
+    def test_queue_timeout(self):
+        """Test a queued caller is rejected when no slot is released in time"""
+        bulkhead = Bulkhead(max_concurrent=1, max_queue=1, queue_timeout=0.01)
+        with bulkhead:
+            with self.assertRaises(UpstreamUnavailable):
+                with bulkhead:
+                    pass
+
+        self.assertEqual(bulkhead.queued, 0)
+
+
+class TestCircuitBreaker(TestCase):
+
+    def setUp(self):
+        self.clock = Clock()
+        self.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, timer=self.clock)
+
+    def test_opens_after_consecutive_failures(self):
+        """Test the circuit opens after the threshold of consecutive failures"""
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CLOSED)
+
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, OPEN)
+        with self.assertRaises(UpstreamUnavailable) as context:
+            self.breaker.before_call()
+        self.assertEqual(context.exception.wait, 10)
+
+    def test_trial_call(self):
+        """Test a single trial call is let through after the reset timeout"""
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.clock.now = 10
+
+        self.breaker.before_call()
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        with self.assertRaises(UpstreamUnavailable):
+            self.breaker.before_call()
+
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CLOSED)
+
+    def test_failed_trial_call(self):
+        """Test a failed trial call opens the circuit again"""
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.clock.now = 10
+        self.breaker.before_call()
+        self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state, OPEN)
+        self.assertEqual(self.breaker.opened, 2)
+
+
+def twilio_error(status, code):
+    return TwilioRestException(status=status, uri='/Rooms', msg='Error', code=code)
+
+
+class TestRetryPolicy(TestCase):
+
+    def setUp(self):
+        self.clock = Clock()
+        self.sleeps = []
+        self.policy = RetryPolicy(max_attempts=3, base_delay=0.1, max_delay=2.0, deadline=5.0, timer=self.clock,
+                                  sleep=self.sleep, random=lambda: 0.5)
+
+    def sleep(self, delay):
+        self.sleeps.append(delay)
+        self.clock.now += delay
+
+    def test_retry_transient_errors(self):
+        """Test transient errors are retried with exponential backoff"""
+        fn = Mock(side_effect=[twilio_error(429, 20429), twilio_error(503, 20503), 'room'])
+
+        self.assertEqual(self.policy.call(fn), 'room')
+        self.assertEqual(self.sleeps, [0.05, 0.1])
+        self.assertDictEqual(self.policy.retries, {20429: 1, 20503: 1})
+        self.assertEqual(self.policy.recovered, 1)
+
+    def test_other_errors_are_not_retried(self):
+        """Test errors caused by the request itself are raised at once"""
+        fn = Mock(side_effect=twilio_error(400, 53113))
+
+        with self.assertRaises(TwilioRestException):
+            self.policy.call(fn)
+        fn.assert_called_once()
+
+    def test_max_attempts(self):
+        """Test the last error is raised once every attempt failed"""
+        fn = Mock(side_effect=twilio_error(503, 20503))
+
+        with self.assertRaises(TwilioRestException):
+            self.policy.call(fn)
+        self.assertEqual(fn.call_count, 3)
+        self.assertDictEqual(self.policy.exhausted, {20503: 1})
+
+    def test_retry_after(self):
+        """Test `Retry-After` is waited for, with jitter on top"""
+        fn = Mock(side_effect=[twilio_error(429, 20429), 'room'])
+
+        self.assertEqual(self.policy.call(fn, retry_after=lambda: 2), 'room')
+        self.assertEqual(self.sleeps, [2.05])
+
+    def test_deadline(self):
+        """Test no retry starts when it would end past the deadline"""
+        fn = Mock(side_effect=twilio_error(429, 20429))
+
+        with self.assertRaises(TwilioRestException):
+            self.policy.call(fn, retry_after=lambda: 10)
+        fn.assert_called_once()
+        self.assertEqual(self.sleeps, [])
+
+
+@override_settings(TWILIO_ROOM_BREAKER_THRESHOLD=2, TWILIO_ROOM_MAX_CONCURRENCY=4)
+class TestGuardedRoomView(APITestCase):
+
+    def setUp(self):
+        room_guard.reset()
+        self.request_body = {"room_name": ROOM_NAME, "type": "group"}
+
+    def post(self):
+        return self.client.post(reverse('twilio:group-room'), data=self.request_body, format='json')
+
+    @patch('twilio.rest.video.v1.room.RoomList.create',
+           side_effect=TwilioRestException(status=503, uri='/Rooms', msg='Service Unavailable', code=20503))
+    def test_breaker_opens_on_twilio_errors(self, mock_room_create):
+        """Test Twilio is no longer called once failing, and requests are answered with 503"""
+        self.assertEqual(self.post().status_code, 400)
+        self.assertEqual(self.post().status_code, 400)
+        response = self.post()
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '30')
+        self.assertEqual(mock_room_create.call_count, 2)
+        self.assertEqual(room_guard.stats()['breaker_state'], OPEN)
+
+    @patch('twilio.rest.video.v1.room.RoomList.create', side_effect=ConnectTimeout())
+    def test_breaker_opens_on_timeouts(self, mock_room_create):
+        """Test timeouts count as failures of Twilio"""
+        for _ in range(2):
+            with self.assertRaises(ConnectTimeout):
+                self.post()
+
+        self.assertEqual(self.post().status_code, 503)
+
+    @patch('twilio.rest.video.v1.room.RoomList.create',
+           side_effect=TwilioRestException(status=400, uri='/Rooms', msg='Invalid', code=53123))
+    def test_refused_requests_do_not_open_breaker(self, mock_room_create):
+        """Test errors caused by the request itself do not count as failures of Twilio"""
+        for _ in range(3):
+            self.assertEqual(self.post().status_code, 400)
+
+        self.assertEqual(room_guard.stats()['breaker_state'], CLOSED)
+
+    @override_settings(TWILIO_ROOM_MAX_CONCURRENCY=1, TWILIO_ROOM_MAX_QUEUE=0)
+    @patch('twilio.rest.video.v1.room.RoomList.create', side_effect=mock_create)
+    def test_rejection_when_saturated(self, mock_room_create):
+        """Test requests are rejected at once while every slot is taken"""
+        room_guard.build()
+        with room_guard.bulkhead:
+            response = self.post()
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(room_guard.stats()['bulkhead_rejected'], 1)
+        mock_room_create.assert_not_called()
+        self.assertEqual(self.post().status_code, 201)
+
+
+@override_settings(TWILIO_ROOM_RETRY_MAX_ATTEMPTS=3, TWILIO_ROOM_RETRY_BASE_DELAY=0.001)
+class TestRetriedRoomView(APITestCase):
+
+    def setUp(self):
+        room_guard.reset()
+        self.request_body = {"room_name": ROOM_NAME, "type": "group"}
+
+    @patch('twilio.rest.video.v1.room.RoomList.create', side_effect=[twilio_error(503, 20503), mock_create()])
+    def test_transient_error_is_retried(self, mock_room_create):
+        """Test a room is created despite a transient Twilio error"""
+        response = self.client.post(reverse('twilio:group-room'), data=self.request_body, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(mock_room_create.call_count, 2)
+        self.assertDictEqual(room_guard.stats()['retries'], {20503: 1})
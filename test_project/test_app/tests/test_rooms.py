@@ -0,0 +1,260 @@
+import threading
+import time
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from twilio.base.exceptions import TwilioRestException
+from twilio.rest.video.v1.room import RoomInstance
+from unittest.mock import Mock, patch
+
+from django_twilio_access_token.rooms import RoomCache, RoomIndex, RoomRecord, room_cache, room_index
+
+from .test_views.test_twilio_room_view import mock_create
+
+ROOM_NAME = '1234567890123456789012345678901234'
+
+
+def room_instance():
+    return RoomInstance(version='test', payload={'unique_name': ROOM_NAME, 'sid': 'random-session-id'})
+
+
+@override_settings(TWILIO_ROOM_CACHE_ENABLED=True)
+class TestRoomCache(TestCase):
+
+    def setUp(self):
+        self.cache = RoomCache()
+
+    def test_created_room_is_cached(self):
+        """Test repeated creations of a room are answered locally"""
+        mock_room_create = Mock(side_effect=room_instance)
+        first = self.cache.get_or_create(ROOM_NAME, mock_room_create)
+        second = self.cache.get_or_create(ROOM_NAME, mock_room_create)
+
+        self.assertEqual(first, RoomRecord(sid='random-session-id', unique_name=ROOM_NAME))
+        self.assertEqual(second, first)
+        mock_room_create.assert_called_once()
+
+    def test_concurrent_creations_are_coalesced(self):
+        """Test concurrent creations of the same room share one upstream call"""
+        calls = []
+        results = []
+
+        def create():
+            calls.append(1)
+            time.sleep(0.05)
+            return room_instance()
+
+        threads = [threading.Thread(target=lambda: results.append(self.cache.get_or_create(ROOM_NAME, create)))
+                   for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(results), 5)
+        self.assertEqual(len(set(results)), 1)
+
+    def test_failed_creation_is_not_cached(self):
+        """Test errors are raised and the next creation calls upstream again"""
+        def fail():
+            raise ValueError('boom')
+
+        with self.assertRaises(ValueError):
+            self.cache.get_or_create(ROOM_NAME, fail)
+
+        self.assertEqual(self.cache.get_or_create(ROOM_NAME, room_instance).sid, 'random-session-id')
+
+    @override_settings(TWILIO_ROOM_CACHE_ENABLED=False)
+    def test_disabled_cache(self):
+        """Test rooms are always created upstream when the cache is disabled"""
+        room = self.cache.get_or_create(ROOM_NAME, room_instance)
+
+        self.assertIsInstance(room, RoomInstance)
+        self.assertIsNone(self.cache.local.get((None, ROOM_NAME)))
+
+
+@override_settings(TWILIO_ROOM_CACHE_ENABLED=True)
+class TestIdempotentRoomView(APITestCase):
+
+    def setUp(self):
+        room_cache.clear()
+        self.request_body = {"room_name": ROOM_NAME, "type": "group"}
+
+    @patch('twilio.rest.video.v1.room.RoomList.create', side_effect=mock_create)
+    def test_repeated_creation(self, mock_room_create):
+        """Test creating the same room twice calls Twilio once and answers the same room"""
+        first = self.client.post(reverse('twilio:group-room'), data=self.request_body, format='json')
+        second = self.client.post(reverse('twilio:group-room'), data=self.request_body, format='json')
+
+        self.assertEqual(second.status_code, 201)
+        self.assertDictEqual(second.data, first.data)
+        mock_room_create.assert_called_once()
+
+    @override_settings(TWILIO_STATUS_CALLBACK_VALIDATE=False)
+    @patch('twilio.rest.video.v1.room.RoomList.create', side_effect=mock_create)
+    def test_creation_after_room_ended(self, mock_room_create):
+        """Test a room is created again by Twilio once its room-ended callback is received"""
+        self.client.post(reverse('twilio:group-room'), data=self.request_body, format='json')
+        self.client.post(reverse('twilio:status-callback'), data={
+            'AccountSid': settings.TWILIO_ACCOUNT_SID, 'RoomSid': 'random-session-id', 'RoomName': ROOM_NAME,
+            'RoomStatus': 'completed', 'StatusCallbackEvent': 'room-ended',
+        })
+        response = self.client.post(reverse('twilio:group-room'), data=self.request_body, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(mock_room_create.call_count, 2)
+
+    @patch('twilio.rest.video.v1.room.RoomContext.fetch', side_effect=mock_create)
+    @patch('twilio.rest.video.v1.room.RoomList.create',
+           side_effect=TwilioRestException(status=400, uri='/Rooms', msg='Room exists', code=53113))
+    def test_room_created_elsewhere(self, mock_room_create, mock_room_fetch):
+        """Test a room already created by another worker is fetched instead of failing"""
+        response = self.client.post(reverse('twilio:group-room'), data=self.request_body, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertDictEqual(response.data, {"room_name": ROOM_NAME, "sid": "random-session-id"})
+        mock_room_fetch.assert_called_once()
+
+
+class TestRoomIndex(TestCase):
+
+    def setUp(self):
+        self.index = RoomIndex()
+
+    def test_lookup_by_sid_or_name(self):
+        """Test indexed rooms are found by sid or unique name, per account"""
+        room = self.index.add('AC1', 'RM1', 'room-1', status='in-progress', room_type='group')
+
+        self.assertEqual(self.index.get('AC1', 'RM1'), room)
+        self.assertEqual(self.index.get('AC1', 'room-1'), room)
+        self.assertIsNone(self.index.get('AC2', 'RM1'))
+
+    def test_update_status(self):
+        """Test the status of indexed rooms is updated, unknown rooms are ignored"""
+        self.index.add('AC1', 'RM1', 'room-1', status='in-progress')
+
+        self.assertEqual(self.index.update_status('AC1', 'RM1', 'completed').status, 'completed')
+        self.assertEqual(self.index.get('AC1', 'room-1').status, 'completed')
+        self.assertIsNone(self.index.update_status('AC1', 'RM2', 'completed'))
+
+    def test_reused_name(self):
+        """Test a unique name is looked up as its most recent room"""
+        self.index.add('AC1', 'RM1', 'room', status='completed')
+        self.index.add('AC1', 'RM2', 'room', status='in-progress')
+
+        self.assertEqual(self.index.get('AC1', 'room').sid, 'RM2')
+
+    def test_paging(self):
+        """Test rooms are paged most recent first, with filters"""
+        for i in range(1, 8):
+            self.index.add('AC1', 'RM{}'.format(i), 'room-{}'.format(i), status='in-progress' if i % 2 else 'completed')
+        self.index.add('AC2', 'RM8', 'room-8', status='in-progress')
+
+        rooms, cursor = self.index.page('AC1', limit=3)
+        self.assertEqual([room.sid for room in rooms], ['RM7', 'RM6', 'RM5'])
+        rooms, cursor = self.index.page('AC1', limit=3, before=cursor)
+        self.assertEqual([room.sid for room in rooms], ['RM4', 'RM3', 'RM2'])
+        rooms, cursor = self.index.page('AC1', limit=3, before=cursor)
+        self.assertEqual(([room.sid for room in rooms], cursor), (['RM1'], None))
+
+        rooms, cursor = self.index.page('AC1', limit=10, status='completed')
+        self.assertEqual(([room.sid for room in rooms], cursor), (['RM6', 'RM4', 'RM2'], None))
+
+    @override_settings(TWILIO_ROOM_INDEX_MAX_SIZE=2)
+    def test_max_size(self):
+        """Test the oldest rooms are evicted beyond `TWILIO_ROOM_INDEX_MAX_SIZE`"""
+        for i in range(3):
+            self.index.add('AC1', 'RM{}'.format(i), 'room-{}'.format(i))
+
+        self.assertEqual(len(self.index), 2)
+        self.assertIsNone(self.index.get('AC1', 'RM0'))
+        self.assertIsNone(self.index.get('AC1', 'room-0'))
+
+    @override_settings(TWILIO_ROOM_INDEX_MAX_SIZE=3)
+    def test_pages_after_many_evictions(self):
+        """Test pages and cursors only cover the kept rooms once evicted ones are dropped in batches"""
+        for i in range(10):
+            self.index.add('AC1', 'RM{}'.format(i), 'room-{}'.format(i))
+
+        self.assertEqual(len(self.index), 3)
+        rooms, cursor = self.index.page('AC1', limit=2)
+        self.assertEqual([room.sid for room in rooms], ['RM9', 'RM8'])
+        rooms, cursor = self.index.page('AC1', limit=2, before=cursor)
+        self.assertEqual(([room.sid for room in rooms], cursor), (['RM7'], None))
+        rooms, cursor = self.index.page('AC1', limit=2, before=1)
+        self.assertEqual((rooms, cursor), ([], None))
+
+
+def mock_fetch(self, *args, **kwargs):
+    """
+    A mock function for `twilio.rest.Client.video.rooms(...).fetch`.
+    """
+    if self._solution['sid'] == 'RMmissing':
+        raise TwilioRestException(status=404, uri='/Rooms/RMmissing', msg='Not found', code=20404)
+    return RoomInstance(version='test', payload={'unique_name': 'remote-room', 'sid': self._solution['sid'],
+                                                 'status': 'completed', 'type': 'group'})
+
+
+class TestRoomLookupViews(APITestCase):
+
+    def setUp(self):
+        room_index.clear()
+        self.addCleanup(room_index.clear)
+
+    @patch('twilio.rest.video.v1.room.RoomContext.fetch', autospec=True, side_effect=mock_fetch)
+    @patch('twilio.rest.video.v1.room.RoomList.create', side_effect=mock_create)
+    def test_retrieve_created_room(self, mock_room_create, mock_room_fetch):
+        """Test rooms created by this service are retrieved without calling Twilio"""
+        self.client.post(reverse('twilio:group-room'), data={'room_name': ROOM_NAME, 'type': 'group'}, format='json')
+
+        for key in (ROOM_NAME, 'random-session-id'):
+            response = self.client.get(reverse('twilio:room-detail', kwargs={'room': key}))
+
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data, {'room_name': ROOM_NAME, 'sid': 'random-session-id', 'status': None,
+                                             'type': 'group'})
+        mock_room_fetch.assert_not_called()
+
+    @patch('twilio.rest.video.v1.room.RoomContext.fetch', autospec=True, side_effect=mock_fetch)
+    def test_retrieve_unknown_room(self, mock_room_fetch):
+        """Test rooms missing from the index are fetched from Twilio, completed ones are indexed"""
+        response = self.client.get(reverse('twilio:room-detail', kwargs={'room': 'RMremote'}))
+        self.client.get(reverse('twilio:room-detail', kwargs={'room': 'RMremote'}))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'room_name': 'remote-room', 'sid': 'RMremote', 'status': 'completed',
+                                         'type': 'group'})
+        mock_room_fetch.assert_called_once()
+
+        response = self.client.get(reverse('twilio:room-detail', kwargs={'room': 'RMmissing'}))
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(TWILIO_ROOM_INDEX_PAGE_SIZE=2)
+    def test_list_rooms(self):
+        """Test rooms are listed page by page from the index"""
+        for i in range(3):
+            room_index.add('PUT_YOUR_TWILIO_ACCOUNT_SID_HERE', 'RM{}'.format(i), 'room-{}'.format(i),
+                           status='in-progress', room_type='group')
+
+        response = self.client.get(reverse('twilio:room-list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([room['sid'] for room in response.data['results']], ['RM2', 'RM1'])
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual([room['sid'] for room in response.data['results']], ['RM0'])
+        self.assertIsNone(response.data['next'])
+
+        response = self.client.get(reverse('twilio:room-list'), data={'status': 'completed'})
+        self.assertEqual(response.data, {'next': None, 'results': []})
+
+    @override_settings(TWILIO_ROOM_INDEX_MAX_PAGE_SIZE=10)
+    def test_list_rooms_with_invalid_query(self):
+        """Test listing rooms with invalid query parameters is not allowed"""
+        response = self.client.get(reverse('twilio:room-list'), data={'limit': 11, 'status': 'unknown'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('limit', response.data)
+        self.assertIn('status', response.data)
@@ -1,8 +1,16 @@
-from django.test import TestCase
+from django.core.validators import URLValidator
+from django.test import TestCase, override_settings
+from rest_framework import serializers
 from rest_framework.exceptions import ErrorDetail, ValidationError
 from twilio.rest.video.v1.room import RoomInstance
+from unittest.mock import patch
 
-from django_twilio_access_token.serializers import GroupRoomDeserializer, PeerToPeerRoomDeserializer, RoomSerializer
+from django_twilio_access_token.serializers import (
+    AllocateRoomDeserializer, GroupRoomDeserializer, PeerToPeerRoomDeserializer, RoomSerializer
+)
+from django_twilio_access_token.validation import CompiledValidation
+
+ROOM_NAME = '1234567890123456789012345678901234'
 
 
 class TestRoomSerializer(TestCase):
@@ -254,3 +262,89 @@ class TestPeerToPeerRoomDeserializer(TestCase):
             ctx.exception.detail,
             {'status_callback': [ErrorDetail(string='Enter a valid URL.', code='invalid')]}
         )
+
+
+class TestCompiledRoomValidation(TestCase):
+    payloads = [
+        {'room_name': ROOM_NAME, 'type': 'group', 'status_callback': 'https://example.org/callbacks/?a=1',
+         'record_participants_on_connect': True},
+        {'room_name': '  ' + ROOM_NAME + ' ', 'type': 'group-small', 'extra': 1},
+        {'room_name': ROOM_NAME, 'type': 'peer-to-peer', 'enable_turn': False},
+        {'room_name': ROOM_NAME, 'type': 'group', 'status_callback': 'http://[::1]:8000/'},
+        {'room_name': ROOM_NAME, 'type': 'group', 'status_callback': 'http://exämple.org/'},
+        {'room_name': ROOM_NAME, 'type': 'group', 'record_participants_on_connect': 'true'},
+        {'room_name': ROOM_NAME, 'type': 'group', 'status_callback': 'invalid-url'},
+        {'room_name': ROOM_NAME, 'type': 'group', 'status_callback': 'ftp://example.org/'},
+        {'room_name': ROOM_NAME, 'type': 'group', 'status_callback': None},
+        {'room_name': ROOM_NAME, 'type': 'group', 'record_participants_on_connect': 'maybe'},
+        {'room_name': 'abcd', 'type': 'unknown'},
+        {'room_name': ROOM_NAME + '5', 'type': 'peer-to-peer'},
+        {'room_name': 1234567890123456789012345678901234, 'type': 'group'},
+        {'room_name': ROOM_NAME[:-1] + '\x00', 'type': 'group'},
+        {'room_name': ' ', 'type': ''},
+        {'room_name': None, 'type': ['group']},
+        {'type': 'group'},
+        {},
+        [],
+    ]
+
+    def run_deserializer(self, deserializer_class, payload):
+        deserializer = deserializer_class(data=payload)
+        valid = deserializer.is_valid()
+        return valid, dict(deserializer.validated_data) if valid else deserializer.errors
+
+    def test_same_result_as_drf(self):
+        """Test compiled validation gives the same validated data and errors as DRF"""
+        for deserializer_class in (GroupRoomDeserializer, PeerToPeerRoomDeserializer, AllocateRoomDeserializer):
+            for payload in self.payloads:
+                with self.subTest(deserializer=deserializer_class.__name__, payload=payload):
+                    expected = self.run_deserializer(deserializer_class, payload)
+                    with override_settings(TWILIO_ROOM_COMPILED_VALIDATION=True):
+                        self.assertEqual(self.run_deserializer(deserializer_class, payload), expected)
+
+    @override_settings(TWILIO_ROOM_COMPILED_VALIDATION=True)
+    def test_valid_payload_skips_drf(self):
+        """Test plainly valid payloads are validated without the DRF fields"""
+        payload = {'room_name': ROOM_NAME, 'type': 'group', 'status_callback': 'http://example.org'}
+
+        with patch('rest_framework.serializers.Serializer.run_validation') as run_validation:
+            deserializer = GroupRoomDeserializer(data=payload)
+            self.assertTrue(deserializer.is_valid())
+
+        run_validation.assert_not_called()
+        self.assertEqual(deserializer.validated_data, dict(payload, record_participants_on_connect=False))
+
+    def test_plan_is_compiled_once_per_class(self):
+        """Test the validation plan is built once for each room deserializer class"""
+        for deserializer_class in (GroupRoomDeserializer, PeerToPeerRoomDeserializer, AllocateRoomDeserializer):
+            compiled_validation = deserializer_class.get_compiled_validation()
+            self.assertIsInstance(compiled_validation, CompiledValidation)
+            self.assertIs(deserializer_class.get_compiled_validation(), compiled_validation)
+        self.assertEqual([name for name, *_ in AllocateRoomDeserializer.get_compiled_validation().plan], ['type'])
+
+    def test_url_validator_without_unsafe_chars(self):
+        """Test URL validators of Django versions without `unsafe_chars` still compile"""
+        class WithCallback(serializers.Serializer):
+            status_callback = serializers.URLField()
+
+        self.addCleanup(setattr, URLValidator, 'unsafe_chars', URLValidator.unsafe_chars)
+        del URLValidator.unsafe_chars
+
+        compiled_validation = CompiledValidation.compile(WithCallback)
+
+        self.assertEqual(compiled_validation.validate({'status_callback': 'http://example.org'}),
+                         {'status_callback': 'http://example.org'})
+
+    def test_not_compilable(self):
+        """Test serializers with other fields or validation hooks are not compiled"""
+        class WithIntegerField(serializers.Serializer):
+            limit = serializers.IntegerField()
+
+        class WithHook(serializers.Serializer):
+            room_name = serializers.CharField()
+
+            def validate_room_name(self, value):
+                return value
+
+        self.assertIsNone(CompiledValidation.compile(WithIntegerField))
+        self.assertIsNone(CompiledValidation.compile(WithHook))
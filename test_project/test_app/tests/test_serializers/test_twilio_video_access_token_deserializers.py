@@ -1,8 +1,10 @@
 from dateutil.parser import parse
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from rest_framework.exceptions import ErrorDetail, ValidationError
 
-from django_twilio_access_token.serializers import VideoTokenDeserializer, TokenSerializer
+from django_twilio_access_token.serializers import (
+    BatchTokenSerializer, BatchVideoTokenDeserializer, VideoTokenDeserializer, TokenSerializer
+)
 
 
 class TestTokenSerializer(TestCase):
@@ -148,3 +150,68 @@ class TestVideoTokenDeserializer(TestCase):
                 'room_name': [ErrorDetail(string='This field is required.', code='required')]
             }
         )
+
+
+class TestBatchVideoTokenDeserializer(TestCase):
+
+    def test_deserializer_with_valid_payload(self):
+        """Test batch deserializer creates a token for every entry"""
+        payload = {
+            "tokens": [
+                {"identity": "alice", "room_name": "some-random-room-name"},
+                {"identity": "bob", "valid_until": "2019-10-17T15:53:00+07:00", "room_name": "some-random-room-name"}
+            ]
+        }
+        deserializer = BatchVideoTokenDeserializer(data=payload)
+        deserializer.is_valid(raise_exception=True)
+        deserializer.save()
+
+        data = BatchTokenSerializer(deserializer.instance).data
+        self.assertEqual(len(data['tokens']), 2)
+        for item in data['tokens']:
+            self.assertIsNotNone(item['token'])
+
+    def test_deserializer_with_invalid_entries(self):
+        """Test invalid entries are reported individually without failing the batch"""
+        payload = {
+            "tokens": [
+                {"identity": "alice", "room_name": "some-random-room-name"},
+                {"identity": "bob"},
+                "not-an-object"
+            ]
+        }
+        deserializer = BatchVideoTokenDeserializer(data=payload)
+        deserializer.is_valid(raise_exception=True)
+        deserializer.save()
+
+        data = BatchTokenSerializer(deserializer.instance).data
+        self.assertIsNotNone(data['tokens'][0]['token'])
+        self.assertDictEqual(
+            data['tokens'][1],
+            {'errors': {'room_name': [ErrorDetail(string='This field is required.', code='required')]}}
+        )
+        self.assertIn('non_field_errors', data['tokens'][2]['errors'])
+
+    def test_deserializer_with_empty_batch(self):
+        """Test batch deserializer without entries is not allowed"""
+        deserializer = BatchVideoTokenDeserializer(data={"tokens": []})
+        with self.assertRaises(ValidationError) as ctx:
+            deserializer.is_valid(raise_exception=True)
+
+        self.assertDictEqual(
+            ctx.exception.detail,
+            {'tokens': [ErrorDetail(string='This list may not be empty.', code='empty')]}
+        )
+
+    @override_settings(TWILIO_TOKEN_BATCH_MAX_SIZE=1)
+    def test_deserializer_with_too_many_entries(self):
+        """Test batch deserializer with more entries than `TWILIO_TOKEN_BATCH_MAX_SIZE` is not allowed"""
+        payload = {"tokens": [{"room_name": "room-1"}, {"room_name": "room-2"}]}
+        deserializer = BatchVideoTokenDeserializer(data=payload)
+        with self.assertRaises(ValidationError) as ctx:
+            deserializer.is_valid(raise_exception=True)
+
+        self.assertDictEqual(
+            ctx.exception.detail,
+            {'tokens': [ErrorDetail(string='Ensure this field has no more than 1 elements.', code='max_length')]}
+        )
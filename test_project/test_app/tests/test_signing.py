@@ -0,0 +1,53 @@
+from datetime import datetime, timezone
+
+import jwt
+from django.test import TestCase, override_settings
+from twilio.jwt.access_token import AccessToken
+from twilio.jwt.access_token.grants import VideoGrant
+from unittest.mock import patch
+
+from django_twilio_access_token.signing import PreparedAccessToken, SigningContext, get_signing_context
+
+SECRET = 'some-api-key-secret-of-at-least-32-bytes'
+
+
+class TestSigningContext(TestCase):
+
+    def setUp(self):
+        self.context = SigningContext(account_sid='AC123', signing_key_sid='SK123', secret=SECRET)
+
+    def decode(self, token):
+        return jwt.get_unverified_header(token), jwt.decode(
+            token, SECRET, algorithms=['HS256'], options={'verify_exp': False, 'verify_nbf': False})
+
+    @patch('time.time', return_value=1571302380)
+    def test_tokens_match_twilio_access_token(self, mock_time):
+        """Test signing context produces the same token as `AccessToken.to_jwt`"""
+        valid_until = datetime(2019, 10, 17, 15, 53, tzinfo=timezone.utc)
+        for identity, valid_until in (('alice', valid_until), (None, None)):
+            expected = AccessToken(account_sid='AC123', signing_key_sid='SK123', secret=SECRET,
+                                   identity=identity, valid_until=valid_until)
+            expected.add_grant(VideoGrant(room='my-room'))
+            token = PreparedAccessToken(self.context, [VideoGrant(room='my-room')],
+                                        identity=identity, valid_until=valid_until)
+
+            self.assertEqual(self.decode(token.to_jwt()), self.decode(expected.to_jwt()))
+
+    def test_context_is_immutable(self):
+        """Test signing context can not be altered once built"""
+        with self.assertRaises(AttributeError):
+            self.context.signing_key_sid = 'SK456'
+
+    def test_context_without_secret(self):
+        """Test signing without a secret is not allowed"""
+        context = SigningContext(account_sid='AC123', signing_key_sid='SK123', secret=None)
+        with self.assertRaises(ValueError):
+            context.sign({'video': {'room': 'my-room'}})
+
+    def test_default_context_follows_settings(self):
+        """Test default signing context is rebuilt when the Twilio keys change"""
+        context = get_signing_context()
+        self.assertIs(get_signing_context(), context)
+
+        with override_settings(TWILIO_VIDEO_API_KEY_SID='SK456'):
+            self.assertEqual(get_signing_context().signing_key_sid, 'SK456')
@@ -0,0 +1,211 @@
+import asyncio
+import json
+import threading
+import time
+
+from django.test import AsyncRequestFactory, Client, TestCase, override_settings
+from django.urls import reverse
+from unittest.mock import patch
+
+from django_twilio_access_token.cache import token_flight
+from django_twilio_access_token.signing import PreparedAccessToken
+from django_twilio_access_token.singleflight import CallInterrupted, SingleFlight
+from django_twilio_access_token.views.twilio_async_view import AsyncTwilioVideoAccessTokenView
+
+
+def run_threads(target, count):
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def slow_to_jwt(token):
+    time.sleep(0.05)
+    return 'signed-token'
+
+
+class TestSingleFlight(TestCase):
+
+    def setUp(self):
+        self.flight = SingleFlight()
+
+    def test_concurrent_threads_share_one_call(self):
+        """Test concurrent threads with the same key share one execution"""
+        calls = []
+        results = []
+
+        def fn():
+            calls.append(1)
+            time.sleep(0.05)
+            return 'result'
+
+        run_threads(lambda: results.append(self.flight.do('key', fn)), 5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['result'] * 5)
+        self.assertDictEqual(self.flight.stats(), {'calls': 5, 'executions': 1, 'shared': 4, 'coalescing_ratio': 0.8})
+
+    def test_distinct_keys_are_not_shared(self):
+        """Test calls with different keys are executed separately"""
+        self.assertEqual(self.flight.do('a', lambda: 1), 1)
+        self.assertEqual(self.flight.do('b', lambda: 2), 2)
+        self.assertEqual(self.flight.stats()['executions'], 2)
+
+    def test_sequential_calls_are_not_shared(self):
+        """Test a completed call is not reused by the next one"""
+        self.flight.do('key', lambda: 1)
+        self.assertEqual(self.flight.do('key', lambda: 2), 2)
+
+    def test_error_is_raised_to_every_caller(self):
+        """Test an error of the shared execution is raised to waiting threads too"""
+        errors = []
+
+        def fn():
+            time.sleep(0.05)
+            raise ValueError('boom')
+
+        def call():
+            try:
+                self.flight.do('key', fn)
+            except ValueError as e:
+                errors.append(e)
+
+        run_threads(call, 3)
+
+        self.assertEqual(len(errors), 3)
+        self.assertEqual(self.flight.stats()['executions'], 1)
+
+    def test_interrupted_call_is_raised_to_waiting_threads(self):
+        """Test waiting threads get an error when the executing thread is interrupted"""
+        started = threading.Event()
+        errors = []
+
+        def fn():
+            started.set()
+            time.sleep(0.05)
+            raise KeyboardInterrupt
+
+        def lead():
+            try:
+                self.flight.do('key', fn)
+            except KeyboardInterrupt as e:
+                errors.append(e)
+
+        def follow():
+            started.wait()
+            try:
+                self.flight.do('key', fn)
+            except CallInterrupted as e:
+                errors.append(e)
+
+        leader = threading.Thread(target=lead)
+        leader.start()
+        run_threads(follow, 2)
+        leader.join()
+
+        self.assertEqual(sorted(type(error).__name__ for error in errors),
+                         ['CallInterrupted', 'CallInterrupted', 'KeyboardInterrupt'])
+
+    def test_concurrent_tasks_share_one_call(self):
+        """Test concurrent asyncio tasks with the same key share one execution"""
+        calls = []
+
+        async def fn():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return 'result'
+
+        async def main():
+            return await asyncio.gather(*(self.flight.do_async('key', fn) for _ in range(5)))
+
+        self.assertEqual(asyncio.run(main()), ['result'] * 5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(self.flight.stats()['shared'], 4)
+
+    def test_task_error_is_raised_to_every_caller(self):
+        """Test an error of the shared execution is raised to waiting tasks too"""
+        async def fn():
+            await asyncio.sleep(0.01)
+            raise ValueError('boom')
+
+        async def main():
+            return await asyncio.gather(*(self.flight.do_async('key', fn) for _ in range(3)), return_exceptions=True)
+
+        results = asyncio.run(main())
+
+        self.assertEqual(len(results), 3)
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+
+    def test_cancelled_task_does_not_hang_waiting_tasks(self):
+        """Test waiting tasks get an error when the executing task is cancelled"""
+        async def fn():
+            await asyncio.sleep(10)
+
+        async def main():
+            leader = asyncio.ensure_future(self.flight.do_async('key', fn))
+            await asyncio.sleep(0)
+            followers = [asyncio.ensure_future(self.flight.do_async('key', fn)) for _ in range(2)]
+            await asyncio.sleep(0)
+            leader.cancel()
+            return await asyncio.wait_for(asyncio.gather(leader, *followers, return_exceptions=True), timeout=1)
+
+        results = asyncio.run(main())
+
+        self.assertIsInstance(results[0], asyncio.CancelledError)
+        self.assertTrue(all(isinstance(result, CallInterrupted) for result in results[1:]))
+        self.assertEqual(self.flight.stats()['executions'], 1)
+
+
+@override_settings(TWILIO_TOKEN_SINGLE_FLIGHT=True)
+class TestTokenSingleFlight(TestCase):
+
+    def setUp(self):
+        token_flight.reset_stats()
+        self.request_body = {
+            "identity": "some-identity",
+            "valid_until": "2030-10-17T15:53:00+07:00",
+            "room_name": "some-random-room-name"
+        }
+
+    def test_concurrent_identical_requests_sign_once(self):
+        """Test concurrent identical token requests are signed once"""
+        statuses = []
+
+        def request():
+            response = Client().post(reverse('twilio:twilio-token-video'), data=json.dumps(self.request_body),
+                                     content_type='application/json')
+            statuses.append(response.status_code)
+
+        with patch.object(PreparedAccessToken, 'to_jwt', side_effect=slow_to_jwt, autospec=True) as to_jwt:
+            run_threads(request, 5)
+
+        self.assertEqual(statuses, [201] * 5)
+        self.assertEqual(to_jwt.call_count, 1)
+        self.assertEqual(token_flight.stats()['shared'], 4)
+
+    def test_concurrent_identical_async_requests_sign_once(self):
+        """Test concurrent identical requests to the async view share one worker thread"""
+        factory = AsyncRequestFactory()
+        view = AsyncTwilioVideoAccessTokenView.as_view()
+
+        async def main():
+            requests = [factory.post('/', data=self.request_body, content_type='application/json') for _ in range(5)]
+            return await asyncio.gather(*(view(request) for request in requests))
+
+        with patch.object(PreparedAccessToken, 'to_jwt', side_effect=slow_to_jwt, autospec=True) as to_jwt:
+            responses = asyncio.run(main())
+
+        self.assertEqual([response.status_code for response in responses], [201] * 5)
+        self.assertEqual(to_jwt.call_count, 1)
+
+    @override_settings(TWILIO_TOKEN_SINGLE_FLIGHT=False)
+    def test_disabled(self):
+        """Test requests are signed independently when single-flight is disabled"""
+        response = self.client.post(reverse('twilio:twilio-token-video'), data=self.request_body,
+                                    content_type='application/json')
+
+        self.assertEqual(response.status_code, 201)
+
+        self.assertEqual(token_flight.stats()['calls'], 0)
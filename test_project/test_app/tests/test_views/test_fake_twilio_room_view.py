@@ -0,0 +1,69 @@
+import uuid
+
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from benchmarks.fake_twilio import FakeTwilioConfig, start_server
+from django_twilio_access_token.clients import client_registry
+
+
+class TestRoomViewAgainstFakeTwilio(APITestCase):
+    """
+    Room creation through the pooled client against the local stand-in of the Twilio API.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = start_server(config=FakeTwilioConfig())
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        client_registry.reset()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.config = FakeTwilioConfig(seed=0)
+        # Rooms outlive a test on the server, hence each test uses its own room name.
+        self.request_body = {"room_name": 'RM' + uuid.uuid4().hex, "type": "group"}
+        self.settings = override_settings(TWILIO_HTTP_BASE_URL=self.server.url, TWILIO_HTTP_MAX_RETRIES=0)
+        self.settings.enable()
+
+    def tearDown(self):
+        self.settings.disable()
+
+    def test_create_group_room(self):
+        """Test room is created through the stand-in server"""
+        response = self.client.post(reverse('twilio:group-room'), data=self.request_body, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['room_name'], self.request_body['room_name'])
+        self.assertTrue(response.data['sid'].startswith('RM'))
+
+    def test_create_existing_room(self):
+        """Test creating an in-progress room again is reported as Twilio error"""
+        self.client.post(reverse('twilio:group-room'), data=self.request_body, format='json')
+        response = self.client.post(reverse('twilio:group-room'), data=self.request_body, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['twilio_err_code'], '53113')
+
+    def test_injected_error(self):
+        """Test injected upstream errors map to validation errors"""
+        self.server.config = FakeTwilioConfig(error_rate=1, error_status=503, error_code=20503,
+                                              error_message='Service Unavailable')
+        response = self.client.post(reverse('twilio:group-room'), data=self.request_body, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertDictEqual(response.data, {'twilio_err_code': '20503', 'twilio_err_msg': 'Unable to create record: Service Unavailable'})
+
+    def test_rate_limit(self):
+        """Test requests over the rate limit are answered with Twilio error 20429"""
+        self.server.config = FakeTwilioConfig(rate_limit=0)
+        response = self.client.post(reverse('twilio:group-room'), data=self.request_body, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['twilio_err_code'], '20429')
@@ -0,0 +1,89 @@
+import jwt
+from django.core.exceptions import ImproperlyConfigured
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+
+def decode(response):
+    return jwt.decode(response.data['token'], options={'verify_signature': False})
+
+
+@override_settings(TWILIO_CHAT_SERVICE_SID='IS123', TWILIO_VOICE_OUTGOING_APPLICATION_SID='AP123',
+                   TWILIO_SYNC_SERVICE_SID='IS456')
+class TestTwilioAccessTokenViews(APITestCase):
+
+    def test_chat_token(self):
+        """Test create chat token with the chat service of the settings"""
+        response = self.client.post(reverse('twilio:twilio-token-chat'), data={'identity': 'alice'}, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(decode(response)['grants'], {'identity': 'alice', 'chat': {'service_sid': 'IS123'}})
+
+    def test_voice_token(self):
+        """Test create voice token with the outgoing application of the settings"""
+        response = self.client.post(reverse('twilio:twilio-token-voice'),
+                                    data={'identity': 'alice', 'incoming_allow': True}, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(decode(response)['grants']['voice'],
+                         {'incoming': {'allow': True}, 'outgoing': {'application_sid': 'AP123'}})
+
+    def test_sync_token(self):
+        """Test create sync token with the sync service of the settings"""
+        response = self.client.post(reverse('twilio:twilio-token-sync'), data={'identity': 'alice'}, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(decode(response)['grants']['data_sync'], {'service_sid': 'IS456'})
+
+    def test_identity_is_required(self):
+        """Test chat, voice and sync tokens without identity are not allowed"""
+        for name in ('twilio:twilio-token-chat', 'twilio:twilio-token-voice', 'twilio:twilio-token-sync'):
+            with self.subTest(name=name):
+                response = self.client.post(reverse(name), data={}, format='json')
+
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('This field is required.', response.data['identity'])
+
+    def test_composite_token(self):
+        """Test create one token holding several grants"""
+        response = self.client.post(reverse('twilio:twilio-token'), data={
+            'identity': 'alice',
+            'valid_until': '2030-10-17T15:53:00+07:00',
+            'video': {'room_name': 'my-room'},
+            'chat': {},
+        }, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(decode(response)['grants'], {
+            'identity': 'alice', 'video': {'room': 'my-room'}, 'chat': {'service_sid': 'IS123'}
+        })
+
+    def test_composite_token_without_grant(self):
+        """Test composite token without any grant is not allowed"""
+        response = self.client.post(reverse('twilio:twilio-token'), data={'identity': 'alice'}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('At least one of the video, chat, voice, sync grants is required.', response.data['non_field_errors'])
+
+    def test_composite_token_identity(self):
+        """Test composite token needs an identity for chat, voice and sync grants only"""
+        response = self.client.post(reverse('twilio:twilio-token'), data={'video': {'room_name': 'my-room'}}, format='json')
+        self.assertEqual(response.status_code, 201)
+
+        response = self.client.post(reverse('twilio:twilio-token'), data={'voice': {}}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('identity', response.data)
+
+    def test_composite_token_with_invalid_grant(self):
+        """Test composite token with an invalid grant is not allowed"""
+        response = self.client.post(reverse('twilio:twilio-token'), data={'video': {}}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('This field is required.', response.data['video']['room_name'])
+
+    @override_settings(TWILIO_CHAT_SERVICE_SID=None)
+    def test_chat_token_without_service(self):
+        """Test chat token without chat service configured raises an error"""
+        with self.assertRaises(ImproperlyConfigured):
+            self.client.post(reverse('twilio:twilio-token-chat'), data={'identity': 'alice'}, format='json')
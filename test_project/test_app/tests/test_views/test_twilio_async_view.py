@@ -0,0 +1,150 @@
+import json
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.permissions import IsAuthenticated
+from twilio.base.exceptions import TwilioRestException
+from unittest.mock import patch
+
+from django_twilio_access_token.resilience import UpstreamUnavailable
+from django_twilio_access_token.views import TwilioGroupRoomView, TwilioVideoAccessTokenView
+
+from .test_twilio_room_view import mock_create
+
+
+class TestAsyncTwilioVideoAccessTokenView(TestCase):
+
+    def test_get_video_calling_access_token_with_valid_data(self):
+        """Test retrieve an access token for video calling through the async view"""
+        request_body = {
+            "identity": "some-identity",
+            "valid_until": "2019-10-17T15:53:00+07:00",
+            "room_name": "some-random-room-name"
+        }
+        response = self.client.post(reverse('twilio:async-twilio-token-video'), data=request_body,
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertIsNotNone(response.json()['token'])
+
+    def test_get_video_calling_access_token_with_form_data(self):
+        """Test async view accepts form encoded payloads like the sync view"""
+        response = self.client.post(reverse('twilio:async-twilio-token-video'), data='room_name=some-room',
+                                    content_type='application/x-www-form-urlencoded')
+        self.assertEqual(response.status_code, 201)
+        self.assertIsNotNone(response.json()['token'])
+
+    def test_get_video_calling_access_token_without_room_name(self):
+        """Test async view reports the same validation errors as the sync view"""
+        response = self.client.post(reverse('twilio:async-twilio-token-video'), data={},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('This field is required.', response.json()['room_name'])
+
+    def test_get_video_calling_access_token_with_malformed_json(self):
+        """Test async view rejects malformed JSON"""
+        response = self.client.post(reverse('twilio:async-twilio-token-video'), data='{"room_name":',
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('JSON parse error', response.json()['detail'])
+
+    def test_get_video_calling_access_token_with_unsupported_media_type(self):
+        """Test async view rejects unsupported content types"""
+        response = self.client.post(reverse('twilio:async-twilio-token-video'), data='room_name',
+                                    content_type='text/plain')
+        self.assertEqual(response.status_code, 415)
+
+    def test_get_is_not_allowed(self):
+        """Test async view only accepts POST"""
+        response = self.client.get(reverse('twilio:async-twilio-token-video'))
+        self.assertEqual(response.status_code, 405)
+
+    @patch.object(TwilioVideoAccessTokenView, 'permission_classes', [IsAuthenticated])
+    def test_permissions(self):
+        """Test the DRF permissions of the sync view apply to the async view"""
+        response = self.client.post(reverse('twilio:async-twilio-token-video'), data={'room_name': 'some-room'},
+                                    content_type='application/json')
+        reference = self.client.post(reverse('twilio:twilio-token-video'), data={'room_name': 'some-room'},
+                                     content_type='application/json')
+
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.content, reference.content)
+
+
+class TestAsyncTwilioRoomViews(TestCase):
+
+    def setUp(self):
+        self.request_body = {
+            "status_callback": "http://example.org",
+            "room_name": "1234567890123456789012345678901234",
+            "record_participants_on_connect": True,
+            "type": "group"
+        }
+
+    @patch('twilio.rest.video.v1.room.RoomList.create', side_effect=mock_create)
+    def test_create_group_room_with_valid_data(self, mock_room_create):
+        """Test create Twilio group room through the async view"""
+        response = self.client.post(reverse('twilio:async-group-room'), data=json.dumps(self.request_body),
+                                    content_type='application/json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertDictEqual(response.json(), {"room_name": "1234567890123456789012345678901234", "sid": "random-session-id"})
+        mock_room_create.assert_called_once()
+
+    @patch('twilio.rest.video.v1.room.RoomList.create', side_effect=mock_create)
+    def test_create_peer_to_peer_room_with_valid_data(self, mock_room_create):
+        """Test create Twilio peer-to-peer room through the async view"""
+        request_body = {"room_name": "1234567890123456789012345678901234", "type": "peer-to-peer"}
+        response = self.client.post(reverse('twilio:async-peer-to-peer-room'), data=request_body,
+                                    content_type='application/json')
+
+        self.assertEqual(response.status_code, 201)
+        mock_room_create.assert_called_once()
+
+    @patch.object(TwilioGroupRoomView, 'permission_classes', [IsAuthenticated])
+    @patch('twilio.rest.video.v1.room.RoomList.create', side_effect=mock_create)
+    def test_permissions(self, mock_room_create):
+        """Test anonymous callers cannot create rooms when the sync view requires authentication"""
+        response = self.client.post(reverse('twilio:async-group-room'), data=self.request_body,
+                                    content_type='application/json')
+
+        self.assertEqual(response.status_code, 403)
+        mock_room_create.assert_not_called()
+
+    @patch('django_twilio_access_token.serializers.twilio_room_serializer.room_guard.call',
+           side_effect=UpstreamUnavailable(wait=3))
+    def test_create_group_room_while_twilio_is_unavailable(self, mock_call):
+        """Test errors with a plain detail have the same shape and headers as in the sync view"""
+        response = self.client.post(reverse('twilio:async-group-room'), data=self.request_body,
+                                    content_type='application/json')
+        reference = self.client.post(reverse('twilio:group-room'), data=self.request_body,
+                                     content_type='application/json')
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json(), reference.json())
+        self.assertEqual(response['Retry-After'], reference['Retry-After'])
+
+    @patch('twilio.rest.video.v1.room.RoomList.create',
+           side_effect=TwilioRestException(status=400, uri='/Rooms', msg='Room exists', code=53113))
+    def test_create_group_room_with_twilio_error(self, mock_room_create):
+        """Test Twilio errors are reported as validation errors by the async view"""
+        response = self.client.post(reverse('twilio:async-group-room'), data=self.request_body,
+                                    content_type='application/json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertDictEqual(response.json(), {'twilio_err_code': '53113', 'twilio_err_msg': 'Room exists'})
+
+    @override_settings(TWILIO_ROOM_JOBS_MODE='prefer',
+                       TWILIO_ROOM_JOBS_BACKEND='test_app.tests.test_jobs.InlineBackend')
+    @patch('twilio.rest.video.v1.room.RoomList.create', side_effect=mock_create)
+    def test_create_group_room_in_the_background(self, mock_room_create):
+        """Test the async view answers with 202 and a job to poll like the sync view, as configured"""
+        response = self.client.post(reverse('twilio:async-group-room'), data=self.request_body,
+                                    content_type='application/json', HTTP_PREFER='respond-async')
+
+        self.assertEqual(response.status_code, 202)
+        job_url = reverse('twilio:room-job', kwargs={'job_id': response.json()['job_id']})
+        self.assertEqual(response['Location'], job_url)
+
+        response = self.client.get(job_url)
+        self.assertEqual(response.status_code, 201)
+        self.assertDictEqual(response.json(), {"room_name": "1234567890123456789012345678901234", "sid": "random-session-id"})
@@ -0,0 +1,134 @@
+import json
+
+import jwt
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.throttling import BaseThrottle
+from unittest.mock import patch
+
+from django_twilio_access_token.views import TwilioVideoAccessTokenView
+
+VALID_PAYLOADS = [
+    {"identity": "some-identity", "valid_until": "2030-10-17T15:53:00+07:00", "room_name": "some-random-room-name"},
+    {"identity": "  padded-identity  ", "room_name": "  padded-room-name  "},
+    {"valid_until": "2030-10-17T15:53:00", "room_name": "some-random-room-name"},
+    {"room_name": 1234, "extra": "ignored"},
+]
+
+INVALID_PAYLOADS = [
+    {},
+    {"room_name": ""},
+    {"room_name": "   "},
+    {"room_name": None},
+    {"room_name": ["some-room"]},
+    {"room_name": "some-room", "identity": None},
+    {"room_name": "some-room", "identity": True},
+    {"room_name": "some\x00room"},
+    {"room_name": "some-room", "valid_until": "tomorrow"},
+    {"room_name": "some-room", "valid_until": 1602924780},
+    ["some-room"],
+]
+
+
+class RefuseThrottle(BaseThrottle):
+
+    def allow_request(self, request, view):
+        return False
+
+    def wait(self):
+        return 30
+
+
+def claims(response):
+    payload = jwt.decode(response.json()['token'], options={'verify_signature': False})
+    return {key: payload[key] for key in ('grants', 'iss', 'sub') if key in payload}
+
+
+class TestFastVideoTokenView(TestCase):
+    """
+    The fast path must answer exactly like `TwilioVideoAccessTokenView`.
+    """
+    url = 'twilio:fast-twilio-token-video'
+
+    def post_both(self, body, content_type='application/json'):
+        reference = self.client.post(reverse('twilio:twilio-token-video'), data=body, content_type=content_type)
+        response = self.client.post(reverse(self.url), data=body, content_type=content_type)
+        return reference, response
+
+    def test_valid_payloads(self):
+        """Test valid payloads are signed into the same token"""
+        for payload in VALID_PAYLOADS:
+            with self.subTest(payload=payload):
+                reference, response = self.post_both(json.dumps(payload))
+
+                self.assertEqual(response.status_code, 201)
+                self.assertEqual(response['Content-Type'], reference['Content-Type'])
+                self.assertEqual(list(response.json()), ['token'])
+                self.assertDictEqual(claims(response), claims(reference))
+
+    def test_invalid_payloads(self):
+        """Test invalid payloads are reported with the same errors"""
+        for payload in INVALID_PAYLOADS:
+            with self.subTest(payload=payload):
+                reference, response = self.post_both(json.dumps(payload))
+
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.content, reference.content)
+
+    def test_malformed_json(self):
+        """Test malformed JSON is reported with the same error"""
+        reference, response = self.post_both('{"room_name": ')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.content, reference.content)
+
+    def test_form_data(self):
+        """Test form encoded payloads are still accepted"""
+        reference, response = self.post_both('room_name=some-room', content_type='application/x-www-form-urlencoded')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertDictEqual(claims(response), claims(reference))
+
+    def test_method_not_allowed(self):
+        """Test other methods are refused the same way"""
+        reference = self.client.get(reverse('twilio:twilio-token-video'))
+        response = self.client.get(reverse(self.url))
+
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(response.content, reference.content)
+
+    @override_settings(USE_TZ=True, TIME_ZONE='Asia/Jakarta')
+    def test_naive_valid_until(self):
+        """Test naive `valid_until` is read in the current time zone"""
+        payload = json.dumps({"valid_until": "2030-10-17T15:53:00", "room_name": "some-room"})
+        reference, response = self.post_both(payload)
+
+        self.assertEqual(jwt.decode(response.json()['token'], options={'verify_signature': False})['exp'],
+                         jwt.decode(reference.json()['token'], options={'verify_signature': False})['exp'])
+
+    @patch.object(TwilioVideoAccessTokenView, 'permission_classes', [IsAuthenticated])
+    def test_permissions(self):
+        """Test the DRF permissions of the token view apply"""
+        reference, response = self.post_both(json.dumps(VALID_PAYLOADS[0]))
+
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.content, reference.content)
+
+        self.client.force_login(User.objects.create_user('alice'))
+        self.assertEqual(self.client.post(reverse(self.url), data=json.dumps(VALID_PAYLOADS[0]),
+                                          content_type='application/json').status_code, 201)
+
+    @patch.object(TwilioVideoAccessTokenView, 'throttle_classes', [RefuseThrottle])
+    def test_throttling(self):
+        """Test the DRF throttling of the token view applies"""
+        reference, response = self.post_both(json.dumps(VALID_PAYLOADS[0]))
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.content, reference.content)
+        self.assertEqual(response['Retry-After'], '30')
+
+
+class TestAsyncFastVideoTokenView(TestFastVideoTokenView):
+    url = 'twilio:async-fast-twilio-token-video'
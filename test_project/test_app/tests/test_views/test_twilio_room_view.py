@@ -1,3 +1,4 @@
+from django.test import override_settings
 from django.urls import reverse
 from rest_framework.test import APITestCase
 from unittest.mock import patch
@@ -227,3 +228,72 @@ class TestTwilioPeerToPeerRoomView(APITestCase):
         self.assertEqual(response.status_code, 400)
         self.assertIsNotNone(response.data)
         self.assertIn('Enter a valid URL.', response.data['status_callback'])
+
+
+def mock_create_by_name(*args, **kwargs):
+    """
+    A mock function for `twilio.rest.Client.video.rooms.create` failing for the names ending with `x`.
+    """
+    from twilio.base.exceptions import TwilioRestException
+    from twilio.rest.video.v1.room import RoomInstance
+    if kwargs['unique_name'].endswith('x'):
+        raise TwilioRestException(status=400, uri='/Rooms', msg='Room creation failed.', code=53105)
+    return RoomInstance(version='test', payload={'unique_name': kwargs['unique_name'], 'sid': 'sid-' + kwargs['unique_name']})
+
+
+class TestTwilioBulkRoomView(APITestCase):
+
+    def room(self, suffix, room_type='group'):
+        return {'room_name': '1' * 33 + suffix, 'type': room_type}
+
+    @patch('twilio.rest.video.v1.room.RoomList.create', side_effect=mock_create_by_name)
+    def test_create_rooms_in_input_order(self, mock_room_create):
+        """Test bulk room creation answers every room in input order"""
+        rooms = [self.room(str(i), 'peer-to-peer' if i % 2 else 'group-small') for i in range(8)]
+        response = self.client.post(reverse('twilio:bulk-room'), data={'rooms': rooms}, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['rooms'], [
+            {'room_name': room['room_name'], 'sid': 'sid-' + room['room_name']} for room in rooms
+        ])
+        self.assertEqual(mock_room_create.call_count, 8)
+
+    @patch('twilio.rest.video.v1.room.RoomList.create', side_effect=mock_create_by_name)
+    def test_invalid_entries_are_reported_individually(self, mock_room_create):
+        """Test invalid entries of a bulk are reported without failing the valid ones"""
+        rooms = [self.room('1'), {'room_name': 'short', 'type': 'group'}, self.room('2', 'unknown')]
+        response = self.client.post(reverse('twilio:bulk-room'), data={'rooms': rooms}, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        results = response.data['rooms']
+        self.assertEqual(results[0]['sid'], 'sid-' + rooms[0]['room_name'])
+        self.assertIn('room_name', results[1]['errors'])
+        self.assertIn('"unknown" is not a valid choice.', results[2]['errors']['type'])
+        mock_room_create.assert_called_once()
+
+    @patch('twilio.rest.video.v1.room.RoomList.create', side_effect=mock_create_by_name)
+    def test_twilio_errors_are_reported_individually(self, mock_room_create):
+        """Test Twilio errors of a bulk entry do not fail the other entries"""
+        rooms = [self.room('x'), self.room('1', 'peer-to-peer')]
+        response = self.client.post(reverse('twilio:bulk-room'), data={'rooms': rooms}, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['rooms'][0]['errors'],
+                         {'twilio_err_code': '53105', 'twilio_err_msg': 'Room creation failed.'})
+        self.assertEqual(response.data['rooms'][1]['sid'], 'sid-' + rooms[1]['room_name'])
+
+    @override_settings(TWILIO_ROOM_BULK_MAX_SIZE=2)
+    def test_bulk_size_is_limited(self):
+        """Test bulks larger than `TWILIO_ROOM_BULK_MAX_SIZE` are not allowed"""
+        rooms = [self.room(str(i)) for i in range(3)]
+        response = self.client.post(reverse('twilio:bulk-room'), data={'rooms': rooms}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Ensure this field has no more than 2 elements.', response.data['rooms'])
+
+    def test_empty_bulk(self):
+        """Test empty bulks are not allowed"""
+        response = self.client.post(reverse('twilio:bulk-room'), data={'rooms': []}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('rooms', response.data)
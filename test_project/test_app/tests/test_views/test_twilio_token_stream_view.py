@@ -0,0 +1,96 @@
+import io
+import json
+
+import jwt
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework.permissions import IsAuthenticated
+from unittest.mock import patch
+
+from django_twilio_access_token.views import TwilioVideoAccessTokenBatchView
+from django_twilio_access_token.views.twilio_token_stream_view import request_lines
+
+
+def read_lines(response):
+    return [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+
+
+def room_of(token):
+    return jwt.decode(token, options={'verify_signature': False})['grants']['video']['room']
+
+
+class TestStreamVideoTokensView(TestCase):
+    url = 'twilio:twilio-token-video-stream'
+
+    def post(self, lines):
+        body = ''.join(line + '\n' for line in lines)
+        return self.client.post(reverse(self.url), data=body, content_type='application/x-ndjson')
+
+    @override_settings(TWILIO_TOKEN_STREAM_WORKERS=3, TWILIO_TOKEN_STREAM_WINDOW=4)
+    def test_tokens_in_input_order(self):
+        """Test tokens are streamed as NDJSON in input order"""
+        response = self.post([json.dumps({'identity': str(i), 'room_name': 'room-{}'.format(i)}) for i in range(20)])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertTrue(response.streaming)
+        self.assertEqual([room_of(line['token']) for line in read_lines(response)],
+                         ['room-{}'.format(i) for i in range(20)])
+
+    def test_invalid_lines_are_reported_individually(self):
+        """Test invalid lines get their own errors without failing the stream"""
+        response = self.post([
+            json.dumps({'room_name': 'some-room'}),
+            '{not json',
+            '',
+            json.dumps({'identity': 'alice'}),
+            json.dumps(['some-room']),
+        ])
+        lines = read_lines(response)
+
+        self.assertEqual(len(lines), 4)
+        self.assertEqual(room_of(lines[0]['token']), 'some-room')
+        self.assertEqual(lines[1], {'errors': {'non_field_errors': ['Invalid JSON.']}})
+        self.assertEqual(lines[2], {'errors': {'room_name': ['This field is required.']}})
+        self.assertIn('non_field_errors', lines[3]['errors'])
+
+    def test_get_is_not_allowed(self):
+        """Test only POST requests are accepted"""
+        response = self.client.get(reverse(self.url))
+
+        self.assertEqual(response.status_code, 405)
+
+    @patch.object(TwilioVideoAccessTokenBatchView, 'permission_classes', [IsAuthenticated])
+    def test_permissions(self):
+        """Test the DRF permissions of the batch view apply before any token is signed"""
+        with patch('django_twilio_access_token.views.twilio_token_stream_view.stream_tokens') as stream_tokens:
+            response = self.post([json.dumps({'identity': 'alice', 'room_name': 'some-room'})])
+
+        self.assertEqual(response.status_code, 403)
+        stream_tokens.assert_not_called()
+
+        self.client.force_login(User.objects.create_user('alice'))
+        response = self.post([json.dumps({'identity': 'alice', 'room_name': 'some-room'})])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(room_of(read_lines(response)[0]['token']), 'some-room')
+
+    @override_settings(TWILIO_TENANT_RESOLVER='test_app.tests.test_credentials.header_tenant_resolver',
+                       TWILIO_CREDENTIALS_BACKEND='django_twilio_access_token.credentials.SettingsBackend',
+                       TWILIO_TENANTS={})
+    def test_unknown_tenant(self):
+        """Test the stream is refused for an unknown tenant"""
+        response = self.client.post(reverse(self.url), data='{"room_name": "room"}\n',
+                                    content_type='application/x-ndjson', HTTP_X_TWILIO_TENANT='unknown')
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {'detail': 'Unknown tenant.'})
+
+    def test_chunked_body(self):
+        """Test chunked bodies are read from the server input stream until its end"""
+
+        class Request(object):
+            environ = {'wsgi.input': io.BytesIO(b'{"room_name": "a"}\n{"room_name": "b"}\n'), 'wsgi.input_terminated': True}
+
+        self.assertEqual(list(request_lines(Request())), [b'{"room_name": "a"}\n', b'{"room_name": "b"}\n'])
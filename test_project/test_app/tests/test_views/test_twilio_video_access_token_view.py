@@ -73,3 +73,39 @@ class TestTwilioVideoAccessTokenView(APITestCase):
         self.assertEqual(response.status_code, 400)
         self.assertIn('This field is required.', response.data['room_name'])
         self.assertIn('Datetime has wrong format. Use one of these formats instead: YYYY-MM-DDThh:mm[:ss[.uuuuuu]][+HH:MM|-HH:MM|Z].', response.data['valid_until'])
+
+
+class TestTwilioVideoAccessTokenBatchView(APITestCase):
+
+    def test_get_video_calling_access_tokens_with_valid_data(self):
+        """Test retrieve access tokens for many participants at once"""
+        request_body = {
+            "tokens": [
+                {"identity": "alice", "room_name": "some-random-room-name"},
+                {"identity": "bob", "room_name": "some-random-room-name"}
+            ]
+        }
+        response = self.client.post(reverse('twilio:twilio-token-video-batch'), data=request_body, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data['tokens']), 2)
+        self.assertIsNotNone(response.data['tokens'][0]['token'])
+        self.assertIsNotNone(response.data['tokens'][1]['token'])
+
+    def test_get_video_calling_access_tokens_with_invalid_entry(self):
+        """Test a single invalid entry does not fail the batch"""
+        request_body = {
+            "tokens": [
+                {"identity": "alice", "room_name": "some-random-room-name"},
+                {"identity": "bob", "room_name": ""}
+            ]
+        }
+        response = self.client.post(reverse('twilio:twilio-token-video-batch'), data=request_body, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertIsNotNone(response.data['tokens'][0]['token'])
+        self.assertIn('This field may not be blank.', response.data['tokens'][1]['errors']['room_name'])
+
+    def test_get_video_calling_access_tokens_without_tokens(self):
+        """Test retrieve access tokens without entries is not allowed"""
+        response = self.client.post(reverse('twilio:twilio-token-video-batch'), data={}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('This field is required.', response.data['tokens'])